@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 17-Oct-2026
+@author: Mathanaguru
+Purpose: Benchmark the .csv file reconciliation on synthetic data
+    1. Generates the source and target directory pairs with the given row
+       count, key columns and their cardinality, measure data type, null,
+       mismatch, source only and target only rates, and file count
+    2. Times each stage of the comparison (read, index, equality check,
+       concat, match, export, summary) at several scales, each run in a
+       fresh process, so the peak memory is of the run only
+    3. Appends the results to a JSON lines file, and compares the run with a
+       baseline run to flag the regressions
+    4. Measures the logging overhead per file pair of a directory of small
+       files (--engine log-overhead) - logging disabled, the synchronous log
+       file, and the queued text, JSON and DEBUG log
+
+Usage:
+    python benchmark_csv_file_recon.py --scales 10000 100000 1000000
+    python benchmark_csv_file_recon.py --baseline <run id> --threshold 0.1
+    python benchmark_csv_file_recon.py --engine log-overhead --scales 1000 \
+        --file-count 50
+
+Key Points:
+    1. Exit code is 1, when a stage is slower than the baseline
+    2. '\' is used as line wrapper
+
+"""
+#*****************************************************************************
+#  Import the modules required for the program
+#*****************************************************************************
+import os
+import sys
+import json
+import argparse
+import shutil
+import contextlib
+import subprocess
+import statistics
+import importlib.util
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Recon program, loaded by its file path (its file name is not a module name)
+RECON_PROGRAM = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'compare_csv_files_in_two_directories_v02.3.py')
+
+# Stages reported in the benchmark results, in the comparison order
+STAGES = ['fast path', 'read', 'index', 'equality check', 'concat', 'match',
+          'export', 'summary']
+
+# Logging configurations of the log overhead benchmark - the log level, log
+# format and queued flag of each; None, logging disabled
+LOG_CONFIGS = {'disabled': None,
+               'sync text INFO': ('INFO', 'text', 0),
+               'queued text INFO': ('INFO', 'text', 1),
+               'queued json INFO': ('INFO', 'json', 1),
+               'queued text DEBUG': ('DEBUG', 'text', 1)}
+
+def load_recon_module():
+    '''Load the recon program as a module'''
+    spec = importlib.util.spec_from_file_location('csv_file_recon',
+                                                  RECON_PROGRAM)
+    recon_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(recon_module)
+    return recon_module
+
+class SyntheticReconData:
+    '''Generate the source and target directory pair of .csv files - the key
+columns are Id (unique, ascending) and the text key columns K1, K2, ... of
+the given cardinality; the measure column is Value'''
+
+    def __init__(self, rows=100000, key_cols=3, key_cardinality=100,
+                 measure_dtype='float', null_rate=0.01, mismatch_rate=0.01,
+                 source_only_rate=0.01, target_only_rate=0.01, file_count=1,
+                 sorted_flag=0, seed=0):
+        '''Initialize the number of records and key columns (Id included), the
+number of distinct values of a text key column, the measure data type
+(float, int, str or bool), the rates of the null values, the mismatch,
+source only and target only records, the number of file pairs, the flag to
+keep the target file sorted by the keys (1) or shuffle it (0), and the
+random seed'''
+        self.rows = rows
+        self.key_cols = max(1, key_cols)
+        self.key_cardinality = key_cardinality
+        self.measure_dtype = measure_dtype
+        self.null_rate = null_rate
+        self.mismatch_rate = mismatch_rate
+        self.source_only_rate = source_only_rate
+        self.target_only_rate = target_only_rate
+        self.file_count = file_count
+        self.sorted_flag = sorted_flag
+        self.seed = seed
+
+    def settings(self):
+        '''Get the generator settings, to identify the benchmark case'''
+        return {'rows': self.rows, 'key_cols': self.key_cols,
+                'key_cardinality': self.key_cardinality,
+                'measure_dtype': self.measure_dtype,
+                'null_rate': self.null_rate,
+                'mismatch_rate': self.mismatch_rate,
+                'source_only_rate': self.source_only_rate,
+                'target_only_rate': self.target_only_rate,
+                'file_count': self.file_count,
+                'sorted_flag': self.sorted_flag, 'seed': self.seed}
+
+    def measure_values(self, rng, no_of_records):
+        '''Get random measure values of the measure data type'''
+        if self.measure_dtype == 'int':
+            return pd.Series(rng.integers(0, 1000000, no_of_records))
+        if self.measure_dtype == 'str':
+            return pd.Series(rng.integers(0, 1000, no_of_records)).map(
+                lambda value: f"v{value}")
+        if self.measure_dtype == 'bool':
+            return pd.Series(rng.random(no_of_records) < 0.5)
+        return pd.Series((rng.standard_normal(no_of_records) * 1000).round(2))
+
+    def records(self, rng, ids):
+        '''Get the records of the ids, with random text keys and measure'''
+        records_df = pd.DataFrame({'Id': ids})
+        for key_no in range(1, self.key_cols):
+            records_df[f"K{key_no}"] = pd.Series(rng.integers(
+                0, self.key_cardinality, len(ids))).map(
+                    lambda value, key_no=key_no: f"k{key_no}_{value}")
+        records_df['Value'] = self.measure_values(rng, len(ids))
+        return records_df
+
+    def file_pair(self, rng):
+        '''Get the source and target dataframe of one file pair'''
+        source_df = self.records(rng, np.arange(self.rows))
+        # Null values, in both source and target
+        source_df['Value'] = source_df['Value'].mask(
+            rng.random(self.rows) < self.null_rate)
+        target_df = source_df.copy()
+        # Mismatch values
+        mismatch_flags = rng.random(self.rows) < self.mismatch_rate
+        target_df.loc[mismatch_flags, 'Value'] = self.measure_values(
+            rng, int(mismatch_flags.sum())).to_numpy()
+        # Source only records are dropped from the target
+        target_df = target_df[rng.random(self.rows) >= self.source_only_rate]
+        # Target only records have new ids
+        no_target_only_records = int(self.rows * self.target_only_rate)
+        target_df = pd.concat([target_df, self.records(
+            rng, np.arange(self.rows, self.rows + no_target_only_records))],
+            ignore_index=True)
+        if self.sorted_flag == 0:
+            target_df = target_df.sample(frac=1, random_state=self.seed)
+        return source_df, target_df
+
+    def generate(self, data_dir):
+        '''Write the file pairs to <data_dir>/source and <data_dir>/target;
+the files are reused, if the directory has the same generator settings'''
+        source_dir = os.path.join(data_dir, 'source')
+        target_dir = os.path.join(data_dir, 'target')
+        settings_file_name = os.path.join(data_dir, 'settings.json')
+        if os.path.isfile(settings_file_name):
+            with open(settings_file_name, 'r') as f:
+                if json.load(f) == self.settings():
+                    return source_dir, target_dir
+        os.makedirs(source_dir, exist_ok=True)
+        os.makedirs(target_dir, exist_ok=True)
+        rng = np.random.default_rng(self.seed)
+        for file_no in range(self.file_count):
+            source_df, target_df = self.file_pair(rng)
+            file_name = f"recon_{file_no}.csv"
+            source_df.to_csv(os.path.join(source_dir, file_name), index=False)
+            target_df.to_csv(os.path.join(target_dir, file_name), index=False)
+        with open(settings_file_name, 'w') as f:
+            json.dump(self.settings(), f)
+        return source_dir, target_dir
+
+def timed_recon(source_file, target_file, output_dir, engine):
+    '''Worker - reconcile one file pair and return the processing time of
+each stage, the total processing time and the peak memory in MB'''
+    recon_module = load_recon_module()
+    recon_module.logging.disable(recon_module.logging.CRITICAL)
+    compare_class = {
+        'memory': recon_module.CompareFiles,
+        'out-of-core': recon_module.OutOfCoreCompareFiles,
+        'merge-join': recon_module.MergeJoinCompareFiles,
+        'arrow': recon_module.ArrowCompareFiles}[engine]
+    begin_time = datetime.now()
+    compare_files = compare_class(
+        source_file, target_file, output_dir,
+        os.path.join(output_dir, 'Summary Stats.csv'), 1,
+        export_summary_flag = 0, fast_path_flag = 0)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        compare_files.csv_file_recon()
+    return (compare_files.stage_times,
+            (datetime.now() - begin_time).total_seconds(),
+            recon_module.peak_memory_mb())
+
+def timed_directory_recon(source_dir, target_dir, output_dir, log_config):
+    '''Worker - reconcile the directory pair with the logging configuration
+and return the processing time; the queued log records are written after it'''
+    recon_module = load_recon_module()
+    if log_config is None:
+        recon_module.logging.disable(recon_module.logging.CRITICAL)
+    else:
+        level, log_format, queued_flag = log_config
+        recon_module.setup_logging(os.path.join(output_dir, 'python.log'),
+                                   level, log_format, queued_flag)
+    begin_time = datetime.now()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        recon_module.reconcile_directories(source_dir, target_dir, output_dir)
+    total_seconds = (datetime.now() - begin_time).total_seconds()
+    recon_module.stop_logging()
+    return total_seconds
+
+class ReconBenchmark:
+    '''Run the benchmark cases, store their results and flag the regressions
+against a baseline run'''
+
+    def __init__(self, work_dir, results_file, engine='memory', repeat=3):
+        '''Initialize the working directory of the data and outputs, the
+results file (JSON lines), the comparison engine (memory, out-of-core,
+merge-join or arrow, or log-overhead for the logging overhead) and the
+number of runs of each case'''
+        self.work_dir = work_dir
+        self.results_file = results_file
+        self.engine = engine
+        self.repeat = repeat
+
+    @staticmethod
+    def git_commit():
+        '''Get the git commit of the recon program, None if not known'''
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                text=True, check=True,
+                cwd=os.path.dirname(RECON_PROGRAM)).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def run_case(self, synthetic_data):
+        '''Run one case - the median processing time of each stage over the
+runs, summed over the file pairs'''
+        settings = synthetic_data.settings()
+        case_name = '_'.join(f"{value}" for value in settings.values())
+        source_dir, target_dir = synthetic_data.generate(
+            os.path.join(self.work_dir, 'data', case_name))
+        output_dir = os.path.join(self.work_dir, 'output', case_name)
+        os.makedirs(output_dir, exist_ok=True)
+        stage_runs = {}
+        total_runs = []
+        peak_memory_runs = []
+        for _ in range(self.repeat):
+            stage_times = {}
+            total_seconds = 0
+            peak_memory = 0
+            for file_name in sorted(os.listdir(source_dir)):
+                # A fresh process per run, for a cold start and its own peak
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    (file_stage_times, file_total_seconds,
+                     file_peak_memory) = executor.submit(
+                         timed_recon, os.path.join(source_dir, file_name),
+                         os.path.join(target_dir, file_name), output_dir,
+                         self.engine).result()
+                for stage, stage_time in file_stage_times.items():
+                    stage_times[stage] = stage_times.get(stage, 0) + stage_time
+                total_seconds += file_total_seconds
+                if file_peak_memory is not None:
+                    peak_memory = max(peak_memory, file_peak_memory)
+            for stage, stage_time in stage_times.items():
+                stage_runs.setdefault(stage, []).append(stage_time)
+            total_runs.append(total_seconds)
+            peak_memory_runs.append(peak_memory)
+        return {'case': settings, 'engine': self.engine,
+                'stage_times': {stage: round(statistics.median(stage_runs[stage]), 6)
+                                for stage in STAGES if stage in stage_runs},
+                'total_seconds': round(statistics.median(total_runs), 6),
+                'peak_memory_mb': max(peak_memory_runs) or None}
+
+    def run_log_overhead(self, synthetic_data):
+        '''Run one log overhead case - the median processing time per file
+pair of each logging configuration over the runs, as its stage times'''
+        settings = synthetic_data.settings()
+        case_name = '_'.join(f"{value}" for value in settings.values())
+        source_dir, target_dir = synthetic_data.generate(
+            os.path.join(self.work_dir, 'data', case_name))
+        config_runs = {}
+        for run_no in range(self.repeat):
+            # Configurations alternate in each run, for the same conditions
+            for config_name, log_config in LOG_CONFIGS.items():
+                output_dir = os.path.join(self.work_dir, 'output', case_name,
+                                          'log overhead',
+                                          f"{config_name} {run_no}")
+                shutil.rmtree(output_dir, ignore_errors=True)
+                os.makedirs(output_dir)
+                # A fresh process per run, for its own logging configuration
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    total_seconds = executor.submit(
+                        timed_directory_recon, source_dir, target_dir,
+                        output_dir, log_config).result()
+                config_runs.setdefault(config_name, []).append(
+                    total_seconds / synthetic_data.file_count)
+        stage_times = {config_name: round(statistics.median(runs), 6)
+                       for config_name, runs in config_runs.items()}
+        # Total is of the default logging configuration of the program
+        return {'case': settings, 'engine': self.engine,
+                'stage_times': stage_times,
+                'total_seconds': stage_times['queued text INFO'],
+                'peak_memory_mb': None}
+
+    def run(self, synthetic_data_list):
+        '''Run the cases and append their results to the results file'''
+        run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+        git_commit = self.git_commit()
+        run_case = (self.run_log_overhead if self.engine == 'log-overhead'
+                    else self.run_case)
+        results = []
+        for synthetic_data in synthetic_data_list:
+            result = {'run_id': run_id, 'date_time': str(datetime.now()),
+                      'git_commit': git_commit, **run_case(synthetic_data)}
+            print(f"{result['case']['rows']} rows: {result['total_seconds']} \
+seconds, peak memory {result['peak_memory_mb']} MB, stages \
+{result['stage_times']}")
+            results.append(result)
+        with open(self.results_file, 'a') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+        return run_id, results
+
+    def read_results(self):
+        '''Read the stored results of all runs'''
+        if not os.path.isfile(self.results_file):
+            return []
+        with open(self.results_file, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def case_key(result):
+        '''Get the key of a benchmark case, to compare it across runs'''
+        return json.dumps([result['case'], result['engine']], sort_keys=True)
+
+    def regressions(self, results, baseline_run_id=None, threshold=0.1,
+                    min_seconds=0.05):
+        '''Compare the results with the baseline run (default: the latest
+earlier run with the same cases) and get the regressions - the stages
+slower by more than the threshold ratio and the minimum seconds'''
+        run_id = results[0]['run_id']
+        stored_results = [result for result in self.read_results()
+                          if result['run_id'] != run_id]
+        case_keys = {self.case_key(result) for result in results}
+        if baseline_run_id is None:
+            baseline_run_ids = [result['run_id'] for result in stored_results
+                                if self.case_key(result) in case_keys]
+            if not baseline_run_ids:
+                return None, []
+            baseline_run_id = max(baseline_run_ids)
+        baseline_results = {self.case_key(result): result
+                            for result in stored_results
+                            if result['run_id'] == baseline_run_id}
+        regressions = []
+        for result in results:
+            baseline_result = baseline_results.get(self.case_key(result))
+            if baseline_result is None:
+                continue
+            stage_pairs = [(stage, baseline_result['stage_times'].get(stage),
+                            result['stage_times'][stage])
+                           for stage in result['stage_times']]
+            stage_pairs.append(('total', baseline_result['total_seconds'],
+                                result['total_seconds']))
+            for stage, baseline_seconds, seconds in stage_pairs:
+                if baseline_seconds is None:
+                    continue
+                if (seconds > baseline_seconds * (1 + threshold)
+                        and seconds - baseline_seconds > min_seconds):
+                    regressions.append({'rows': result['case']['rows'],
+                                        'stage': stage,
+                                        'baseline_seconds': baseline_seconds,
+                                        'seconds': seconds})
+        return baseline_run_id, regressions
+
+def main():
+    '''Generate the data, run the benchmark and flag the regressions'''
+    parser = argparse.ArgumentParser(
+        description='Benchmark the .csv file reconciliation on synthetic data')
+    parser.add_argument('--scales', type=int, nargs='+',
+                        default=[10000, 100000, 1000000],
+                        help='row counts of the benchmark cases')
+    parser.add_argument('--key-cols', type=int, default=3,
+                        help='number of key columns, Id included')
+    parser.add_argument('--key-cardinality', type=int, default=100,
+                        help='number of distinct values of a text key column')
+    parser.add_argument('--measure-dtype', default='float',
+                        choices=['float', 'int', 'str', 'bool'])
+    parser.add_argument('--null-rate', type=float, default=0.01)
+    parser.add_argument('--mismatch-rate', type=float, default=0.01)
+    parser.add_argument('--source-only-rate', type=float, default=0.01)
+    parser.add_argument('--target-only-rate', type=float, default=0.01)
+    parser.add_argument('--file-count', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', default='memory',
+                        choices=['memory', 'out-of-core', 'merge-join',
+                                 'arrow', 'log-overhead'],
+                        help='comparison engine, or log-overhead for the \
+logging overhead per file pair of the directory recon')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs of each case, the median is kept')
+    parser.add_argument('--work-dir', default='benchmark_data',
+                        help='directory of the generated data and outputs')
+    parser.add_argument('--results-file', default='benchmark_results.jsonl')
+    parser.add_argument('--baseline', default=None,
+                        help='run id to compare with (default: latest run)')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown ratio flagged as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='slowdown in seconds ignored as noise')
+    args = parser.parse_args()
+
+    synthetic_data_list = [SyntheticReconData(
+        rows = rows, key_cols = args.key_cols,
+        key_cardinality = args.key_cardinality,
+        measure_dtype = args.measure_dtype, null_rate = args.null_rate,
+        mismatch_rate = args.mismatch_rate,
+        source_only_rate = args.source_only_rate,
+        target_only_rate = args.target_only_rate,
+        file_count = args.file_count,
+        # Merge join needs the target file sorted by the keys
+        sorted_flag = 1 if args.engine == 'merge-join' else 0,
+        seed = args.seed) for rows in args.scales]
+    recon_benchmark = ReconBenchmark(args.work_dir, args.results_file,
+                                     args.engine, args.repeat)
+    run_id, results = recon_benchmark.run(synthetic_data_list)
+    print(f"Benchmark run {run_id} is stored in '{args.results_file}'")
+    if args.engine == 'log-overhead':
+        for result in results:
+            disabled_seconds = result['stage_times']['disabled']
+            for config_name, seconds in result['stage_times'].items():
+                print(f"{result['case']['rows']} rows, {config_name}: \
+{round(seconds * 1000, 3)} ms per file pair, overhead \
+{round((seconds - disabled_seconds) * 1000, 3)} ms")
+
+    baseline_run_id, regressions = recon_benchmark.regressions(
+        results, args.baseline, args.threshold, args.min_seconds)
+    if baseline_run_id is None:
+        print('No baseline run to compare with')
+        return 0
+    for regression in regressions:
+        print(f"Regression: {regression['rows']} rows, {regression['stage']} \
+{regression['baseline_seconds']} -> {regression['seconds']} seconds")
+    print(f"{len(regressions)} regressions against the baseline run \
+{baseline_run_id}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
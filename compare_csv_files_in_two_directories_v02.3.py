@@ -1,7 +1,7 @@
  # -*- coding: utf-8 -*-
 """
 Created on 30-Jan-2021
-Last updated on 06-Feb-2021
+Last updated on 17-Oct-2026
 @author: Mathanaguru
 Purpose: Utility to compare .csv files into two folders
 Change history
@@ -19,15 +19,41 @@ Change history
     2. Minor changes to the variable names
     3. Gracefully skip to next filecompare if issues with current one
     4. Some of the core program has been moved to a Class Function
+17-Oct-2026:
+    1. Parallel reconciliation of the file pairs in a process pool (worker count user input or -w)
+    2. Summary Stats file is sorted by S.No at the end of the run
+    3. Out-of-core recon of the files larger than memory in on-disk key hash buckets (--out-of-core-mb)
+    4. Tiered equality fast path (file size & header, byte digest, row fingerprint) skips the full comparison of the files proven equal
+    5. Merge join recon of the files sorted by their key columns, streamed with O(1) memory (--merge-join)
+    6. Schema-aware typed loading from a sample or a <file>.schema.json sidecar, text keys as categoricals (--exclude-columns)
+    7. Parse cache of the typed dataframes with a size cap (--parse-cache-dir, pyarrow package)
+    8. Recon result cache across runs, keyed by the file contents digests (--result-cache-dir)
+    9. Records classified in a single vectorized pass, the category counts added to the Summary Stats file
+    10. Multi-measure comparison in one vectorized pass (--measure-columns, default Value/Values)
+    11. Records aligned on a 64-bit hash of the key columns; duplicate keys reported, not failing the comparison
+    12. Benchmark suite of synthetic directory pairs with the regressions flagged (benchmark_csv_file_recon.py)
+    13. Stage metrics of each file pair in a JSON lines file, replacing the ad-hoc timers
+    14. Command line arguments (see --help) and library API; the user inputs prompted only without the directories
+    15. Directory inventory scanned once with os.scandir, subdirectories optional (-r)
+    16. SQLite summary store of the Summary Stats rows, exported once in S.No order
+    17. Optional SQLite record store of the match/mismatch records (--record-store)
+    18. Compressed .csv files (.gz, .bz2, .xz, .zst) read as a stream
+    19. Output sinks of the match/mismatch records (--output-format, --match-output)
+    20. Arrow engine of the in memory comparison (--engine arrow, pyarrow package)
+    21. Pipelined recon of the file pairs in one process (--prefetch-depth, --writer-queue-depth)
+    22. Memory budget of the run (--memory-budget-mb)
+    23. Queued logging of the program threads and worker processes (--log-level, --log-format)
+    24. Partitioned recon of a large file pair on several cores (--partition-mb)
+    25. Shared work queue of a directory recon across processes and hosts (--work-queue, --join-work-queue)
+    26. Checkpoint and resume of a run (--resume)
 
 
 Limitations:
-    1. Restricted to .csv file format
+    1. Restricted to .csv file format, also compressed as .gz, .bz2, .xz or .zst (zstandard package)
     2. Source file and target file should be the same, but the files should in different directories
-    3. .csv files should be kept as direct children in the user provided directory path
-    4. Files should be in flat structure: measure should be in just 1 column
-    5. Measure file/column name should be 'Value' as it is hardcoded in the code
-    6. Without the measure value, each record should be unique
+    3. .csv files should be kept as direct children in the user provided directory path, unless the subdirectories are included
+    4. Files should be in flat structure: each measure in its own column, named Value/Values unless the measure columns are given
+    5. Without the measure values, each record should be unique
 
 Key Points:
     1. '\' is used as line wrapper
@@ -45,9 +71,13 @@ import sys
 # To use the logging
 import logging
 
+# To write the log records on a listener thread, off the comparison
+import logging.handlers
+import multiprocessing
+import atexit
+
 # To get the current date and time
 from datetime import datetime
-now = datetime.now() # Get the current timestamp
 
 # To get the file name without extension
 from pathlib import Path
@@ -55,22 +85,232 @@ from pathlib import Path
 # To print the summary Stats file header record
 import csv
 
+# To defer the import of pandas and numpy until a comparison needs them
+import importlib.util
+
+# To parse the command line arguments of the program
+import argparse
+
+# To store the Summary Stats rows of the file pairs, also for the analysis
+import sqlite3
+from contextlib import closing
+from itertools import islice
+
+# To read the optional schema sidecar file of a .csv file
+import json
+
+# To copy the cached recon outputs, when they cannot be hard-linked
+import shutil
+
+# To report the peak memory of the process, not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# To prove the source and target file are equal before the full comparison
+import hashlib
+from array import array
+
+# To read the compressed .csv files as a stream, without an uncompressed copy
+import io
+import gzip
+import bz2
+import lzma
+
+# To read the zstandard compressed .csv files, an optional package
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# To find the column of a pyarrow CSV conversion error, to widen its type
+import re
+
+# To spill the rows of the files larger than memory to on-disk buckets
+import pickle
+import tempfile
+
+# To reconcile independent file pairs in parallel across the cores
+from concurrent.futures import ProcessPoolExecutor
+
+# To read the next file pairs ahead and write the outputs in the background
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# To admit the file pairs to the worker processes within a memory budget
+from concurrent.futures import FIRST_COMPLETED, Future
+
+# To set the comparison class options, e.g. merge join fall back class
+from functools import partial
+
+# To record the wall and CPU time of each stage, and optionally profile it
+import time
+from datetime import timedelta
+import cProfile
+import tracemalloc
+
+# To claim the file pairs of a shared work queue from the workers of any host
+import socket
+from contextlib import contextmanager
+
+#*****************************************************************************
+#  Deferred import of pandas and numpy
+#*****************************************************************************
+def lazy_import(module_name):
+    '''Import a module on the first access to one of its attributes, so that
+--help, the input validations and an importing application do not pay the
+import time of pandas and numpy'''
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.find_spec(module_name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
 # To import csv files and compare them
-import pandas as pd
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+def load_deferred_imports():
+    '''Import pandas and numpy now, e.g. before the threads of the pipeline
+start, as the lazy loader is not thread-safe'''
+    return pd.__version__, np.__version__
 
 #*****************************************************************************
 #  Setup logging
 #*****************************************************************************
-# Default logging level is set as info
-logging.basicConfig(filename='python.log', level=logging.INFO,
-                    format='%(asctime)s:python program file name-%(filename)\
+# Record format of the text log
+LOG_FORMAT = '%(asctime)s:python program file name-%(filename)\
                         s:%(funcName)s:%(name)s:%(levelno)s:%(levelname)\
                         s:%(lineno)d:%(thread)d:%(threadName)\
                         s:%(process)d:%(processName)\
-                        s:%(module)s:%(message)s')
+                        s:%(module)s:%(message)s'
+# Formats of the log file - the text format, or a JSON object per line
+LOG_FORMATS = ['text', 'json']
+
+# Listener threads of the queued log records, when the log is queued - of
+# the program threads, and of the worker processes, from the first pool
+log_listener = None
+worker_log_listener = None
+
+class JsonLogFormatter(logging.Formatter):
+    '''Format a log record as a JSON object - its time, level, logger,
+source position, process, thread and message'''
 
-# Program start log
-logging.info('Program execution starts')
+    def format(self, record):
+        '''Format the record as a JSON line'''
+        log_record = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'process': record.process,
+            'process_name': record.processName,
+            'thread': record.thread,
+            'thread_name': record.threadName,
+            'message': record.getMessage(),
+            }
+        if record.exc_info:
+            log_record['exception'] = self.formatException(record.exc_info)
+        return json.dumps(log_record, default=str)
+
+def setup_logging(log_fullfilename='python.log', level=logging.INFO,
+                  log_format='text', queued_flag=1):
+    '''Configure the program log; called by the entry point, not on import,
+so that an importing application keeps its own logging configuration. The
+records are written in the log format, one of LOG_FORMATS; queued, the
+program and its worker processes put the records on a queue, written to the
+log file by a listener thread, so that they never wait on the disk'''
+    global log_listener
+    if logging.root.handlers:
+        # Existing configuration is kept, as by logging.basicConfig
+        return
+    file_handler = logging.FileHandler(log_fullfilename)
+    file_handler.setFormatter(JsonLogFormatter() if log_format == 'json'
+                              else logging.Formatter(LOG_FORMAT))
+    # Default logging level is set as info
+    logging.root.setLevel(level)
+    if queued_flag == 0:
+        logging.root.addHandler(file_handler)
+        return
+    # Queue of the program threads; the records are not pickled
+    log_listener = logging.handlers.QueueListener(queue.SimpleQueue(),
+                                                  file_handler)
+    log_listener.start()
+    logging.root.addHandler(logging.handlers.QueueHandler(log_listener.queue))
+    atexit.register(stop_logging)
+
+def stop_logging():
+    '''Stop the log listeners, once the queued records are written; the
+records logged after it are written to the log file directly'''
+    global log_listener, worker_log_listener
+    if log_listener is None:
+        return
+    for handler in list(logging.root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logging.root.removeHandler(handler)
+    if worker_log_listener is not None:
+        worker_log_listener.stop()
+        worker_log_listener = None
+    log_listener.stop()
+    for handler in log_listener.handlers:
+        logging.root.addHandler(handler)
+    log_listener = None
+
+def worker_log_queue():
+    '''Get the log queue of the worker processes, its listener started on
+first use; None, if the log is not queued'''
+    global worker_log_listener
+    if log_listener is None:
+        return None
+    if worker_log_listener is None:
+        worker_log_listener = logging.handlers.QueueListener(
+            multiprocessing.Queue(), *log_listener.handlers)
+        worker_log_listener.start()
+    return worker_log_listener.queue
+
+def worker_logging(log_queue, level):
+    '''Initializer of a worker process - put its log records on the log
+queue of the worker processes, instead of the queue of the program threads
+inherited by a forked process; nothing, if the log is not queued'''
+    if log_queue is None:
+        return
+    for handler in list(logging.root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logging.root.removeHandler(handler)
+    logging.root.setLevel(level)
+    logging.root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+# Initializer code of a worker process - import the program by its file path,
+# as its file name is not a module name, so that the functions and classes
+# submitted to the worker are found under the spawn and forkserver start
+# methods too; then queue the worker log records
+WORKER_INIT_CODE = '''
+import importlib.util, sys
+if module_name not in sys.modules:
+    spec = importlib.util.spec_from_file_location(module_name, module_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+sys.modules[module_name].worker_logging(log_queue, level)
+'''
+
+def worker_pool(max_workers):
+    '''Get a pool of worker processes, initialized by the initializer code;
+the initializer is the built-in exec, found by every worker process'''
+    return ProcessPoolExecutor(
+        max_workers = max_workers, initializer = exec,
+        initargs = (WORKER_INIT_CODE, {
+            'module_name': __name__,
+            'module_file': os.path.abspath(__file__),
+            'log_queue': worker_log_queue(),
+            'level': logging.root.level}))
 
 #*****************************************************************************
 #  Initialize Flags/Variables
@@ -78,15 +318,234 @@ logging.info('Program execution starts')
 # Flags - Exit program
 exit_program_flag = 0
 
+# Record categories of the comparison; match and both-null are the match
+# records, the others are the mismatch records
+RECON_CATEGORIES = ['match', 'both-null', 'value-diff', 'source-only',
+                    'target-only']
+# Summary Stats column of the number of records of each category
+RECON_CATEGORY_COL_NAMES = {'match': 'No. of Value Match records',
+                            'both-null': 'No. of Both Null records',
+                            'value-diff': 'No. of Value Difference records',
+                            'source-only': 'No. of Source Only records',
+                            'target-only': 'No. of Target Only records'}
+# Summary Stats column of the number of value difference records of each
+# measure, e.g. 'Amount: 12; Quantity: 0'
+MEASURE_COUNTS_COL_NAME = 'Value Difference records by Measure'
+
+# Output of the match records - all, none, a fixed-size random sample or the
+# key hashes only; the mismatch records are always output in full
+MATCH_OUTPUTS = ['all', 'none', 'sample', 'key-hash']
+# File extension of the match and mismatch outputs of each output format
+OUTPUT_FORMATS = {'csv': '.csv', 'csv.gz': '.csv.gz', 'csv.zst': '.csv.zst',
+                  'parquet': '.parquet'}
+# Output file name of the match records of each match output, and of the
+# mismatch records, after the source file name
+MATCH_FILE_SUFFIXES = {'all': ' - match records', 'none': ' - match records',
+                       'sample': ' - match records sample',
+                       'key-hash': ' - match key hashes'}
+MISMATCH_FILE_SUFFIX = ' - mismatch records'
+
+# Engine of the in memory comparison - pandas, or Apache Arrow (pyarrow
+# package) with its multithreaded CSV reader and compute kernels
+RECON_ENGINES = ['pandas', 'arrow']
+
+# Values read as null, the same as the pandas read_csv default
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN',
+             '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN',
+             'None', 'n/a', 'nan', 'null'}
+
+# Compression codec of the .csv files by the file extension, e.g. sales.csv.gz;
+# the files are decompressed on the fly and paired by their .csv file name
+COMPRESSION_CODECS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+
 #*****************************************************************************
-#  Define class(s)
+#  Define function(s) and class(s)
 #*****************************************************************************
+def compression_codec(file_name):
+    '''Get the compression codec of the file by its extension, None if the
+file is not compressed'''
+    return COMPRESSION_CODECS.get(os.path.splitext(file_name)[1].lower())
+
+def logical_file_name(file_name):
+    '''Get the file name without the compression extension, e.g. sales.csv
+of sales.csv.gz'''
+    if compression_codec(file_name) is None:
+        return file_name
+    return os.path.splitext(file_name)[0]
+
+def file_stem(file_name):
+    '''Get the file name without the directory path, the compression
+extension and the .csv extension, e.g. sales of /data/sales.csv.gz'''
+    return Path(logical_file_name(file_name)).stem
+
+def check_codec(file_name):
+    '''Check if the compression codec of the file can be read; raise
+ValueError, if its package is not installed'''
+    if compression_codec(file_name) == 'zstd' and zstandard is None:
+        raise ValueError(f"zstandard package is not installed to read \
+{file_name}")
+
+def decompressor(raw_file, codec):
+    '''Wrap the binary file object in a stream decompressing it on the fly'''
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw_file)
+    if codec == 'bz2':
+        return bz2.BZ2File(raw_file)
+    if codec == 'xz':
+        return lzma.LZMAFile(raw_file)
+    return zstandard.ZstdDecompressor().stream_reader(raw_file, closefd=False)
+
+def open_compressed(file_name):
+    '''Open the file as a binary stream, decompressed on the fly, if it is
+compressed'''
+    codec = compression_codec(file_name)
+    if codec is None:
+        return open(file_name, 'rb')
+    check_codec(file_name)
+    if codec == 'zstd':
+        return zstandard.open(file_name, 'rb')
+    return {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[codec](
+        file_name, 'rb')
+
+def open_csv(file_name):
+    '''Open the .csv file as a text stream for the csv reader, decompressed
+on the fly, if it is compressed'''
+    return io.TextIOWrapper(open_compressed(file_name), encoding='utf-8-sig',
+                            newline='')
+
+def data_size(file_name, file_size=None, sample_bytes=4*1024*1024):
+    '''Get the size in bytes of the file data; the uncompressed size of a
+compressed file is estimated from the compression ratio of its first
+sample_bytes, without decompressing the whole file'''
+    if file_size is None:
+        file_size = os.path.getsize(file_name)
+    codec = compression_codec(file_name)
+    if codec is None or file_size == 0:
+        return file_size
+    check_codec(file_name)
+    with open(file_name, 'rb') as raw_file, \
+         decompressor(raw_file, codec) as f:
+        sample_size = len(f.read(sample_bytes))
+        # Raw file position is the compressed size of the sample
+        compressed_size = raw_file.tell()
+    if sample_size < sample_bytes or compressed_size == 0:
+        # Whole file is decompressed within the sample
+        return sample_size
+    return int(file_size * sample_size / compressed_size)
+
+def peak_memory_mb():
+    '''Get the peak resident memory of the process in MB, None if the
+resource module is not available'''
+    if resource is None:
+        return None
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in KB on Linux
+    return round(peak_memory / (1024 * 1024 if sys.platform == 'darwin'
+                                else 1024), 1)
+
+def reset_peak_memory():
+    '''Reset the peak resident memory of the process to its current resident
+memory, to measure the peak of a file pair in a reused worker process;
+return False, if it cannot be reset (Linux only), then the peak memory is
+that of the process so far'''
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            # 5 resets the peak resident memory of the process
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+class StageMetrics:
+    '''Record the metrics of each stage of a file pair comparison - wall time,
+CPU time, peak RSS delta, rows/sec and bytes/sec, and the peak traced memory
+when tracemalloc is tracing - to append them to a JSON lines metrics file'''
+
+    def __init__(self):
+        '''Initialize the metrics of the stages and the begun stages'''
+        self.stages = {}
+        self.begun_stages = {}
+
+    def begin(self, stage):
+        '''Begin a stage'''
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self.begun_stages[stage] = (time.perf_counter(), time.process_time(),
+                                    peak_memory_mb())
+
+    def end(self, stage, rows=None, bytes=None):
+        '''End a stage, add its metrics to the stage metrics (a stage run more
+than once is summed), and return its wall time as a timedelta'''
+        wall_begin, cpu_begin, peak_memory_begin = self.begun_stages.pop(stage)
+        wall_seconds = time.perf_counter() - wall_begin
+        peak_memory = peak_memory_mb()
+        metrics = self.stages.setdefault(stage, {
+            'wall_seconds': 0, 'cpu_seconds': 0, 'peak_rss_delta_mb': None,
+            'rows': None, 'bytes': None, 'calls': 0})
+        metrics['wall_seconds'] += wall_seconds
+        metrics['cpu_seconds'] += time.process_time() - cpu_begin
+        metrics['calls'] += 1
+        if peak_memory is not None:
+            metrics['peak_rss_delta_mb'] = round(
+                (metrics['peak_rss_delta_mb'] or 0)
+                + peak_memory - peak_memory_begin, 1)
+        for name, value in [('rows', rows), ('bytes', bytes)]:
+            if value is not None:
+                metrics[name] = (metrics[name] or 0) + int(value)
+        if tracemalloc.is_tracing():
+            metrics['traced_peak_mb'] = max(
+                metrics.get('traced_peak_mb', 0),
+                round(tracemalloc.get_traced_memory()[1] / 1048576, 1))
+        return timedelta(seconds=wall_seconds)
+
+    def merge(self, stage_metrics):
+        '''Add the stage metrics of another comparison, e.g. a fall back'''
+        for stage, metrics in stage_metrics.stages.items():
+            if stage not in self.stages:
+                self.stages[stage] = dict(metrics)
+                continue
+            for name, value in metrics.items():
+                if name == 'traced_peak_mb':
+                    self.stages[stage][name] = max(
+                        self.stages[stage].get(name, 0), value)
+                elif value is not None:
+                    self.stages[stage][name] = (self.stages[stage][name] or 0) + value
+
+    def stage_times(self):
+        '''Get the wall time in seconds of each stage'''
+        return {stage: metrics['wall_seconds']
+                for stage, metrics in self.stages.items()}
+
+    def records(self, **pair_fields):
+        '''Get a metrics record of each stage, with the file pair fields'''
+        records = []
+        for stage, metrics in self.stages.items():
+            record = {**pair_fields, 'stage': stage, **metrics}
+            record['wall_seconds'] = round(metrics['wall_seconds'], 6)
+            record['cpu_seconds'] = round(metrics['cpu_seconds'], 6)
+            for name in ['rows', 'bytes']:
+                record[f"{name}_per_sec"] = (
+                    round(metrics[name] / metrics['wall_seconds'], 1)
+                    if metrics[name] and metrics['wall_seconds'] > 0 else None)
+            records.append(record)
+        return records
+
+    def export(self, metrics_fullfilename, **pair_fields):
+        '''Append the metrics records to the metrics file in one write, so the
+records of the parallel workers do not interleave'''
+        lines = ''.join(json.dumps(record, default=str) + '\n'
+                        for record in self.records(**pair_fields))
+        with open(metrics_fullfilename, 'a') as f:
+            f.write(lines)
+
 class InputDirectoryValidations:
     '''Validate the user input directories'''
-    def __init__(self,dir_path, dir_type):
-        ''' Initialize directory path and directory type (source/target)'''
+    def __init__(self,dir_path, dir_type, inventory=None):
+        ''' Initialize directory path, directory type (source/target) and
+the directory inventory, for the empty and .csv file checks'''
         self.dir_path = dir_path
         self.dir_type = dir_type
+        self.inventory = inventory
 
     def dir_check_exists(self):
         '''Check if the directory exists'''
@@ -102,7 +561,7 @@ passed: A directory with user provided {self.dir_type} directory name exists")
 
     def dir_check_empty(self):
         '''Check if the directory is empty'''
-        if os.listdir(self.dir_path):
+        if self.inventory.entries:
             exit_program_flag = 0
             logging.info(f"{self.dir_type} directory empty validation has \
 passed:A directory with user provided {self.dir_type} directory is not empty")
@@ -113,10 +572,11 @@ passed:A directory with user provided {self.dir_type} directory is not empty")
         return exit_program_flag
 
     def dir_check_csv(self):
-        '''Check if the directory has at lease one .csv file'''
+        '''Check if the directory has at lease one .csv file, compressed or
+not'''
         # The program has to exit, if directory does not have any .csv files
         exit_program_flag = 1
-        for object in os.listdir(self.dir_path):
+        for object in self.inventory.objects:
             if object.lower().endswith('.csv'):
                  exit_program_flag = 0
                  break
@@ -150,19 +610,93 @@ validation has passed: Source and target files are different")
             logging.critical(msg)
         return exit_program_flag
 
-class ObjectList:
-    '''Get the list of objects in a directory'''
-    def __init__(self,dir_path, dir_type):
-        ''' Initialize directory path and directory type (source/target)'''
+class DirectoryInventory:
+    '''Scan a directory once with os.scandir, optionally with its
+subdirectories, and keep the type, size and modification time of each
+object by its path relative to the directory; a compressed .csv file, e.g.
+sales.csv.gz, is an object by its .csv file name'''
+
+    def __init__(self, dir_path, dir_type, recursive_flag=0):
+        '''Initialize directory path, directory type (source/target) and
+recursive flag, then scan the directory'''
         self.dir_path = dir_path
         self.dir_type = dir_type
-    
-    def object_list(self):
-        '''Get the list of objects in a directory'''
-        objects = os.listdir(self.dir_path)
-        logging.info(f"{self.dir_type} directory object list is {objects}")
+        self.recursive_flag = recursive_flag
+        self.entries = self.scan()
+        self.objects = self.logical_objects()
+
+    def scan(self):
+        '''Get the type, size and modification time of the objects by their
+relative path; with the recursive flag, the files of the subdirectories are
+listed instead of the subdirectories. Symbolic links to directories are not
+followed'''
+        entries = {}
+        pending_dirs = ['']
+        while pending_dirs:
+            rel_dir = pending_dirs.pop()
+            with os.scandir(os.path.join(self.dir_path, rel_dir)) as dir_entries:
+                for dir_entry in dir_entries:
+                    rel_path = os.path.join(rel_dir, dir_entry.name)
+                    if (self.recursive_flag == 1
+                            and dir_entry.is_dir(follow_symlinks=False)):
+                        pending_dirs.append(rel_path)
+                        continue
+                    # File type and stat are cached by the directory entry
+                    if dir_entry.is_file():
+                        stat = dir_entry.stat()
+                        entries[rel_path] = {'is_file': True,
+                                             'size': stat.st_size,
+                                             'mtime': stat.st_mtime}
+                    else:
+                        entries[rel_path] = {'is_file': False, 'size': None,
+                                             'mtime': None}
+        logging.info(f"{self.dir_type} directory inventory has \
+{len(entries)} objects")
+        return entries
+
+    def logical_objects(self):
+        '''Get the relative path of each object by its object name, the
+compression extension of a .csv file removed; if the directory has both,
+e.g. sales.csv and sales.csv.gz, the uncompressed file is compared'''
+        objects = {}
+        for rel_path, entry in self.entries.items():
+            object = rel_path
+            if entry['is_file'] and logical_file_name(
+                    rel_path).lower().endswith('.csv'):
+                object = logical_file_name(rel_path)
+            if object in objects:
+                # Uncompressed file is preferred, else the first one scanned
+                if compression_codec(rel_path) is None:
+                    objects[object], rel_path = rel_path, objects[object]
+                logging.warning(f"{self.dir_type} directory has more than one \
+file of {object}, {rel_path} is not compared")
+                continue
+            objects[object] = rel_path
         return objects
 
+    def object_list(self):
+        '''Get the object names to compare'''
+        # Schema sidecar files describe a .csv file, they are not compared
+        return [object for object in self.objects
+                if not object.lower().endswith('.schema.json')]
+
+    def is_file(self, object):
+        '''Check if the object is a file, from the inventory'''
+        return (object in self.objects
+                and self.entries[self.objects[object]]['is_file'])
+
+    def size(self, object):
+        '''Get the size of a file in bytes, from the inventory'''
+        return self.entries[self.objects[object]]['size']
+
+    def fingerprint(self, object):
+        '''Get the fingerprint of a file - its relative path, size and
+modification time, from the inventory - as a JSON text'''
+        rel_path = self.objects[object]
+        return json.dumps({'path': rel_path,
+                           'size': self.entries[rel_path]['size'],
+                           'mtime': self.entries[rel_path]['mtime']})
+
 class SummaryFileOutput:
     '''Export the comparison results to a summary file'''
     
@@ -174,8 +708,8 @@ unique object list, and S.No '''
         self.obj_list = obj_list
         self.sno = sno
 
-    def print_summary_file_header(self):
-        '''Print the header in the summary file '''
+    def summary_file_header(self):
+        '''Get the header of the summary file'''
         # Header record
         header=['S.No',
                 'Source Object Name',
@@ -191,11 +725,18 @@ unique object list, and S.No '''
                 'No. of records in Target File',
                 'No. of Match records',
                 'No. of Mismatch records',
+                ] + list(RECON_CATEGORY_COL_NAMES.values()) + [
+                MEASURE_COUNTS_COL_NAME,
                 'Dataset Match - Flag',
                 'Location of Match records',
                 'Location of Mismatch records',
                 'Remarks',
         ]
+        return header
+
+    def print_summary_file_header(self):
+        '''Print the header in the summary file '''
+        header = self.summary_file_header()
 
         # Print the header record
         if len(self.obj_list)>0:
@@ -204,707 +745,5446 @@ unique object list, and S.No '''
                 # Write to Summary Stats file in default, overwrite mode
                 writer.writerow(header) # write the header
         return header
-    
-    def sort_summary_file_by_sno(self):
-        ''' Read the file, then sort data by S.No series/column value'''
-        # Load the file to a datadrame
-        df = pd.read_csv(self.fullfilename)
-        logging.debug(f"Summary Stats file,{self.fullfilename},\
-output without formating is:\n{df}")
-        # Sort the data by S.No column value
-        df.sort_values(by=[self.sno]).to_csv(self.fullfilename, index=False)
-        return df
-    
 
-class CompareFiles:
-    '''Compare the file, including source and target file check validations'''
+    def export_summary_store(self, summary_store):
+        '''Export the summary store to the summary file once, sorted by
+S.No, in the summary file layout'''
+        header = self.summary_file_header()
+        summary_rows = summary_store.rows(header)
+        with open(self.fullfilename, "w", newline='') as f:
+            # Line ends of the platform, as the rows exported by pandas
+            writer = csv.writer(f, delimiter=',', lineterminator=os.linesep)
+            writer.writerow(header)
+            writer.writerows(['' if summary_row[col_name] is None
+                              else summary_row[col_name]
+                              for col_name in header]
+                             for summary_row in summary_rows)
+        logging.info(f"{len(summary_rows)} summary rows are exported to \
+'{self.fullfilename}' in S.No order")
+        return summary_rows
 
-    def __init__(self, source_file, target_file,
-                 output_dir, summary_stats_fullfilename, sno):
-        '''Initialize source file, target file, and measure name'''
-        self.source_file = source_file
-        self.target_file = target_file
-        self.output_dir = output_dir
-        self.summary_stats_fullfilename = summary_stats_fullfilename
-        self.sno = sno
+class SummaryStore:
+    '''SQLite store of the Summary Stats rows, one row per object by S.No
+with its status; the main and the worker processes insert their rows in
+their own transactions. The store is kept next to the Summary Stats file for
+the post-run analysis. Its run manifest records each reconciled file pair
+with its input file fingerprints and outputs, in the transaction of its
+summary row, for the resume of the run'''
 
-    def csv_file_recon(self):
-        '''Compare two .csv files and export the reconciliation results'''
+    table_name = 'summary_stats'
+    manifest_table_name = 'run_manifest'
+    manifest_col_names = ['S.No', 'Object', 'Source Fingerprint',
+                          'Target Fingerprint', 'Outputs', 'Date & Time']
 
-        # Set the initial flag as files are comparable
-        files_comparable = 1
+    def __init__(self, store_fullfilename, col_names):
+        '''Initialize the store full file name and the summary column
+names, then create the summary table, if not exists'''
+        self.store_fullfilename = store_fullfilename
+        self.col_names = col_names
+        self.create()
 
-        #*********************************************************************
-        #  File attributes
-        #*********************************************************************
-        output_filename_creation_begin_time = datetime.now()
+    def connect(self):
+        '''Connect to the store; a writer waits for the transaction of
+another writer, instead of failing'''
+        return closing(sqlite3.connect(self.store_fullfilename, timeout=60))
 
-        ## Export file name is the combination of source and target file
-        # Get file name without extension
-        # To construct the compare output file name
-        source_file_name_wo_ext = Path(self.source_file).stem
-        msg = 'Source file name without extension is'
-        logging.debug(f"{msg} {source_file_name_wo_ext}")
-        msg = 'Target file name without extension is'
-        target_file_name_wo_ext = Path(self.target_file).stem
-        logging.debug(f"{msg} {target_file_name_wo_ext}")
+    @staticmethod
+    def quoted(col_names):
+        '''Quote the column names, they have spaces and punctuation'''
+        return ', '.join(f'"{col_name}"' for col_name in col_names)
 
-        # Data match export file name and directory
-        match_data_file_name = source_file_name_wo_ext+ ' - match records.csv'
-        logging.debug(f"Match data file name is {match_data_file_name}")
-        match_data_full_file_name = os.path.join(self.output_dir,
-                                                 match_data_file_name)
-        msg = 'Match data file name with directory path is'
-        logging.info(f"{msg} {match_data_full_file_name}")
-        # Data mismatch export file name and directory
-        mismatch_data_file_name = (source_file_name_wo_ext
-                                   +
-                                   ' - mismatch records.csv')
-        logging.debug(f"Mismatch data file name is {mismatch_data_file_name}")
-        mismatch_data_full_file_name = os.path.join(self.output_dir,
-                                                    mismatch_data_file_name)
-        msg = 'Mismatch data file name with directory path is'
-        logging.info(f"{msg} {mismatch_data_full_file_name}")
+    def create(self):
+        '''Create the summary table, indexed by S.No and status'''
+        col_defs = ', '.join(f'"{col_name}" INTEGER PRIMARY KEY'
+                             if col_name == 'S.No' else f'"{col_name}"'
+                             for col_name in self.col_names)
+        with self.connect() as conn:
+            # Readers do not block the writers, nor the writers the readers
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table_name} \
+({col_defs}, "Status" TEXT NOT NULL)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table_name}_status \
+ON {self.table_name} ("Status")')
+            conn.execute(f'CREATE TABLE IF NOT EXISTS \
+{self.manifest_table_name} ("S.No" INTEGER PRIMARY KEY, "Object" TEXT NOT \
+NULL, "Source Fingerprint" TEXT, "Target Fingerprint" TEXT, "Outputs" TEXT, \
+"Date & Time" TEXT)')
 
-        output_filename_creation_end_time = datetime.now()
-        output_filename_creation_process_time = (
-            output_filename_creation_end_time
-            -
-            output_filename_creation_begin_time)
-        logging.info(f"Output file names created in \
-{output_filename_creation_process_time.total_seconds()} seconds")
+    @staticmethod
+    def sql_value(value):
+        '''Convert a summary value to an SQLite value'''
+        if isinstance(value, datetime):
+            return str(value)
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
 
-        #*****************************************************************
-        #  Load the source and target file in a DataFrame and Compare
-        #*****************************************************************
+    def insert(self, summary_rows, status, manifest_entry=None):
+        '''Insert the summary rows (dictionaries) with their status, and the
+run manifest entry of a reconciled file pair, if given, in one transaction;
+the row of an S.No inserted again is replaced. Raise ValueError, if a row has
+no S.No, as SQLite would number it as a new object'''
+        if not summary_rows:
+            return 0
+        for summary_row in summary_rows:
+            if pd.isnull(summary_row.get('S.No')):
+                raise ValueError(f"Summary row of \
+{summary_row.get('Source Object Name')} has no S.No")
+        col_names = [col_name for col_name in self.col_names
+                     if col_name in summary_rows[0]]
+        query = f'INSERT OR REPLACE INTO {self.table_name} \
+({self.quoted(col_names + ["Status"])}) \
+VALUES ({", ".join("?" * (len(col_names) + 1))})'
+        with self.connect() as conn, conn:
+            conn.executemany(query, [
+                [self.sql_value(summary_row[col_name])
+                 for col_name in col_names] + [status]
+                for summary_row in summary_rows])
+            if manifest_entry is not None:
+                conn.execute(f'INSERT OR REPLACE INTO \
+{self.manifest_table_name} ({self.quoted(self.manifest_col_names)}) \
+VALUES ({", ".join("?" * len(self.manifest_col_names))})',
+                             [manifest_entry[col_name]
+                              for col_name in self.manifest_col_names])
+        return len(summary_rows)
 
-        # Read csv time ounter begins
-        read_csv_begin_time = datetime.now()
+    def insert_error(self, recon_task, error_msg):
+        '''Insert the summary row of a file pair not reconciled for an
+error, with the error in its remarks'''
+        return self.insert([{
+            'S.No': recon_task['sno'],
+            'Source Object Name': file_stem(recon_task['source_file']),
+            'Target Object Name': file_stem(recon_task['target_file']),
+            'Source Object Directory & Path': recon_task['source_file'],
+            'Target Object Directory & Path': recon_task['target_file'],
+            'Source Object Exists - Flag': 1,
+            'Target Object Exists - Flag': 1,
+            'Source & Target Object is csv - Flag': 1,
+            'Reconciliation Performed - Flag': 0,
+            'Date & Time': datetime.now(),
+            'Remarks': error_msg,
+            }], 'error')
 
-        #Read the source and target .csv files
-        source_df = pd.read_csv(self.source_file)
-        logging.debug(f"Source file data read in dataframe:\n{source_df}")
-        target_df = pd.read_csv(self.target_file)
-        logging.debug(f"Target file data read in dataframe:\n{target_df}")
+    def rows(self, col_names=None, status=None):
+        '''Get the summary rows as dictionaries in S.No order, optionally
+only the rows of a status'''
+        col_names = col_names or self.col_names + ['Status']
+        query = f'SELECT {self.quoted(col_names)} FROM {self.table_name}'
+        if status is not None:
+            query += ' WHERE "Status" = ?'
+        query += ' ORDER BY "S.No"'
+        with self.connect() as conn:
+            return [dict(zip(col_names, row)) for row in conn.execute(
+                query, [] if status is None else [status])]
 
-        # Read file processing time
-        read_csv_end_time = datetime.now()
-        read_csv_process_time = read_csv_end_time - read_csv_begin_time
-        msg = 'Source and Target csv files read in'
-        logging.info(f"{msg} {read_csv_process_time}")
+    def manifest(self):
+        '''Get the run manifest entries as dictionaries, by S.No'''
+        with self.connect() as conn:
+            return {row[0]: dict(zip(self.manifest_col_names, row))
+                    for row in conn.execute(
+                        f'SELECT {self.quoted(self.manifest_col_names)} FROM \
+{self.manifest_table_name}')}
 
-        # Record time counter begins
-        no_of_records_count_begin_time = datetime.now()
+    def keep(self, snos):
+        '''Delete the summary rows and the run manifest entries of all but
+the S.No given, in one transaction'''
+        with self.connect() as conn, conn:
+            for table_name in [self.table_name, self.manifest_table_name]:
+                deleted_snos = [
+                    [sno] for (sno,) in conn.execute(
+                        f'SELECT "S.No" FROM {table_name}')
+                    if sno not in snos]
+                conn.executemany(f'DELETE FROM {table_name} WHERE \
+"S.No" = ?', deleted_snos)
 
-        # Get the length of source and target file
-        no_source_records = len(source_df)
-        logging.info(f'Number of records in source file:{no_source_records}')
-        no_target_records = len(target_df)
-        logging.info(f'Number of records in target file:{no_target_records}')
+class RecordStore:
+    '''SQLite store of the match and mismatch records of a run, a table per
+file pair with the record category, indexed by the key columns and the
+category for the drill-down by key or key prefix. The records are inserted
+in batches, a transaction each, so that the workers take turns'''
 
-        # Record count file processing time
-        no_of_records_count_end_time = datetime.now()
-        no_of_records_count_process_time = (no_of_records_count_end_time
-                                            -
-                                            no_of_records_count_begin_time)
-        logging.info(f"Number of records in source file and target file \
-processed in {no_of_records_count_process_time.total_seconds()} seconds")
+    # Records inserted in one transaction
+    batch_rows = 50000
+    category_col_name = 'Recon Category'
 
-        # Set index time counter begins
-        set_index_begin_time = datetime.now()
+    def __init__(self, store_fullfilename):
+        '''Initialize the store full file name; the store is created on the
+first insert'''
+        self.store_fullfilename = store_fullfilename
 
-        # Source - Get all the index columns,
-        # except for the Value/Values as concat_col
-        # If a column with the name value does not exist,
-        # then skip file recon and export summary stats with remarks
-        source_measure_name_value_found_flag = 0
-        source_col_names = source_df.columns
-        source_concat_key = []
-        for source_col_name in source_col_names:
-            val = ['value','values']
-            if source_col_name.lower() not in val:
-                source_concat_key.append(source_col_name)
-            else:
-                source_measure_name_value_found_flag = 1
-                source_measure_name = source_col_name
+    def connect(self):
+        '''Connect to the store; a writer waits for the batch of another
+writer, instead of failing'''
+        return closing(sqlite3.connect(self.store_fullfilename, timeout=600))
 
-        # Target - Get all the index columns,
-        # except for the Value/Values as concat_col
-        target_measure_name_value_found_flag = 0
-        target_col_names = target_df.columns
-        target_concat_key = []
-        for target_col_name in target_col_names:
-            val = ['value','values']
-            if target_col_name.lower() not in val:
-                target_concat_key.append(target_col_name)
-            else:
-                target_measure_name_value_found_flag = 1
-                target_measure_name = target_col_name
+    def location(self, table_name):
+        '''Get the location of a table, for the Summary Stats file'''
+        return f"{self.store_fullfilename}#{table_name}"
 
-        # Set the intial value of remarks as None
-        remarks = None
-        # Check, if the column names match and are in same order
-        # For the specific use case, column order should match too
-        col_match_flag = 1 if (source_col_names == target_col_names).all() else 0
-        if 0 in [col_match_flag]:
-            files_comparable = 0
-            remarks = 'Error, source and target file name column or their \
-order does not match'
+    def write_rows(self, table_name, col_names, rows, replace_flag=0):
+        '''Insert the rows into the table, created on the first insert; with
+the replace flag, the table of an earlier attempt is dropped first'''
+        quoted_col_names = SummaryStore.quoted(col_names)
+        query = f'INSERT INTO "{table_name}" ({quoted_col_names}) \
+VALUES ({", ".join("?" * len(col_names))})'
+        rows = iter(rows)
+        with self.connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Records are an output of the run, rebuilt by a rerun
+            conn.execute('PRAGMA synchronous=OFF')
+            with conn:
+                if replace_flag == 1:
+                    conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{table_name}" \
+({quoted_col_names})')
+            while True:
+                batch = list(islice(rows, self.batch_rows))
+                if not batch:
+                    break
+                with conn:
+                    conn.executemany(query, batch)
 
-        # Check if source and target measure name is value(s)
-        elif 0 in [source_measure_name_value_found_flag,
-                 target_measure_name_value_found_flag]:
-            files_comparable = 0
-            remarks = "Error, both source & target measure name \
-should be 'Value(s)'"
+    @staticmethod
+    def frame_rows(records_df):
+        '''Get the rows of a dataframe as SQLite values; the nulls of the
+extension and date columns are None'''
+        for col_name, dtype in records_df.dtypes.items():
+            if isinstance(dtype, np.dtype) and dtype.kind in 'biufO':
+                continue
+            col_values = records_df[col_name]
+            if dtype.kind in 'mM':
+                col_values = col_values.astype(str)
+            records_df[col_name] = col_values.astype(object).where(
+                records_df[col_name].notna(), None)
+        return records_df.itertuples(index=False, name=None)
 
-        else:
-            source_measure_dtype = source_df[source_measure_name].dtypes
-            target_measure_dtype = target_df[target_measure_name].dtypes
-            if source_measure_dtype != target_measure_dtype:
-                files_comparable = 0
-                remarks = "Error, source & target measure data type \
-does not match"
+    def create_indexes(self, table_name, key_col_names):
+        '''Index the table by the key columns, also for the lookups by key
+prefix, and by the record category'''
+        with self.connect() as conn, conn:
+            if key_col_names:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "{table_name} - key" \
+ON "{table_name}" ({SummaryStore.quoted(key_col_names)})')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{table_name} - category" \
+ON "{table_name}" ("{self.category_col_name}")')
 
-        if files_comparable == 0:
-            logging.info(remarks)
-            print(remarks)
-            summary_stats_set_n_export_begin_time = datetime.now()
-            #*****************************************************************
-            #  Export the summary stats - for partial comparison done
-            #*****************************************************************
-            summary_stats_data = {'S.No': [self.sno],
-                                  'Source Object Name': [source_file_name_wo_ext],
-                                  'Target Object Name': [target_file_name_wo_ext],
-                                  'Source Object Directory & Path': [self.source_file],
-                                  'Target Object Directory & Path': [self.target_file],
-                                  'Source Object Exists - Flag': 1,
-                                  'Target Object Exists - Flag':1,
-                                  'Source & Target Object is csv - Flag': 1,
-                                  'Reconciliation Performed - Flag': 0,
-                                  'Date & Time': [datetime.now()],
-                                  'No. of records in Source File': [no_source_records],
-                                  'No. of records in Target File': [no_target_records],
-                                  'No. of Match records': None,
-                                  'No. of Mismatch records': None,
-                                  'Dataset Match - Flag': None,
-                                  'Location of Match records': None,
-                                  'Location of Mismatch records': None,
-                                  'Remarks': remarks
-                                  }
+class RecordSink:
+    '''Output of the match or mismatch records of a file pair, written whole,
+in chunks, e.g. the out-of-core ranges, or row by row, e.g. the merge join,
+the rows buffered to chunks; the output is created by its first record, so
+that its location is reported only if written. The base of the output
+sinks, e.g. CsvRecordSink'''
+
+    # Rows of the row by row writes buffered to a chunk
+    batch_rows = 50000
+
+    def __init__(self, full_file_name, header=None):
+        '''Initialize the output full file name and, for the row by row
+writes, the record header'''
+        self.full_file_name = full_file_name
+        self.header = header
+        self.no_of_records = 0
+        self.rows = []
+        self.row_categories = []
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
         else:
-            msg = 'Original Source file measure name is'
-            logging.info(f"{msg} {source_measure_name}")
-            msg = 'Original Target file measure name is'
-            logging.info(f"{msg} {target_measure_name}")
-            msg = 'Source and Target files are comparable'
-            print(msg)
+            self.discard()
 
-            # Source - Set the concat_col as the multi-index
-            source_df = source_df.set_index(list(source_concat_key))
-            msg = 'Source dataframe with concat key set as index:'
-            logging.debug(f"{msg}\n{source_df}")
+    def write(self, records_df, categories, row_flags=None, index_flag=True):
+        '''Write a chunk of the records, the records of the row flags only,
+if given; the categories are a Series of the records, or one category'''
+        if row_flags is not None:
+            row_flags = np.asarray(row_flags)
+            records_df = records_df[row_flags]
+            if isinstance(categories, pd.Series):
+                categories = categories[row_flags]
+        if len(records_df) == 0:
+            return
+        self.write_frame(records_df, categories, index_flag)
+        self.no_of_records += len(records_df)
 
-            # Target - Set the concat_col as the multi-index
-            target_df = target_df.set_index(list(target_concat_key))
-            msg = 'Target dataframe with concat key set as index:'
-            logging.debug(f"{msg}\n{target_df}")
+    def write_frame(self, records_df, categories, index_flag):
+        '''Write a chunk of the records to the output'''
+        raise NotImplementedError
 
-            # Set index processing time
-            set_index_end_time = datetime.now()
-            set_index_process_time = set_index_end_time - set_index_begin_time
-            logging.info(f"Multi-index set for both source and target \
-dataframe in {set_index_process_time.total_seconds()} seconds")
+    def writerow(self, row, category):
+        '''Buffer a record with its category, write the full chunk'''
+        self.rows.append(row)
+        self.row_categories.append(category)
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
 
-            # Check if source = target
-            overall_match_begin_time = datetime.now()
-            overall_match = source_df.equals(target_df)
-            overall_match = 1 if overall_match==True else 0
+    def flush(self):
+        '''Write the buffered records'''
+        if self.rows:
+            rows_df = pd.DataFrame(self.rows, columns=self.header)
+            categories = pd.Series(self.row_categories)
+            self.rows = []
+            self.row_categories = []
+            self.write(rows_df, categories, index_flag=False)
 
-            if overall_match:
-                logging.info('Overall reconciliation result: Number of \
-records and Each data in the source file match with the target file')
-            else:
-                logging.info('Overall reconciliation result: Atleast some \
-source and target file data does not match')
+    def close(self):
+        '''Write the buffered records and close the output'''
+        self.flush()
 
-            overall_match_end_time = datetime.now()
-            overall_match_process_time = (overall_match_end_time
-                                          -
-                                          overall_match_begin_time)
-            logging.info(f"Overall match result is processed in \
-{overall_match_process_time.total_seconds()} seconds")
-            print(f"Overall match result is {overall_match} - processed in \
-{overall_match_process_time.total_seconds()} seconds")
+    def discard(self):
+        '''Close and remove the output, e.g. of a merge join fallen back'''
+        self.rows = []
+        self.close()
+        if self.no_of_records > 0 and os.path.isfile(self.full_file_name):
+            os.remove(self.full_file_name)
+        self.no_of_records = 0
 
-            # Rename column time counter begins
-            rename_column_begin_time = datetime.now()
+    def location(self):
+        '''Get the location of the output, None if nothing is written'''
+        return self.full_file_name if self.no_of_records > 0 else None
 
-            # Rename the value column as Source_Value and Target_Value
-            source_df = source_df.rename(
-                columns={source_measure_name:"Source_Value"})
-            target_df = target_df.rename(
-                columns={target_measure_name:"Target_Value"})
+    def bytes(self):
+        '''Get the number of bytes of the output file'''
+        return (os.path.getsize(self.full_file_name)
+                if self.location() is not None else 0)
 
-            # Rename column processing time
-            rename_column_end_time = datetime.now()
-            rename_column_process_time = (rename_column_end_time
-                                          -
-                                          rename_column_begin_time)
-            logging.info(f"Measure columns renamed in \
-{rename_column_process_time.total_seconds()} seconds")
+class CsvRecordSink(RecordSink):
+    '''Write the records to a .csv output file; the category is not in the
+.csv layout'''
 
-            # Concat time counter begins
-            concat_begin_time = datetime.now()
+    def __init__(self, full_file_name, header=None):
+        '''Initialize the output full file name and the record header'''
+        super().__init__(full_file_name, header)
+        self.file = None
+        self.writer = None
 
-            # Combine the source and target file data with outer join
-            #combined_df = pd.merge(source_df,target_df, left_index=True,
-            #right_index=True, how='outer')
-            combined_df = pd.concat([source_df,target_df], axis=1)
-            msg='Source and target comnbined dataframe:'
-            logging.debug(f"{msg}\n{combined_df}")
-            concat_records = len(combined_df)
-            msg = 'Number of records in the merged file is'
-            logging.info(f"{msg} {concat_records}")
+    def open_file(self):
+        '''Open the output file as text'''
+        return open(self.full_file_name, 'w', newline='')
 
-            # Concat processing time
-            concat_end_time = datetime.now()
-            concat_process_time  = concat_end_time - concat_begin_time
-            logging.info(f"Source and Target Concatenated in \
-{concat_process_time.total_seconds()} seconds")
+    def write_frame(self, records_df, categories, index_flag):
+        '''Write a chunk of the records, with the header first'''
+        if self.file is None:
+            self.file = self.open_file()
+        records_df.to_csv(self.file, index=index_flag,
+                          header=self.no_of_records == 0)
 
-            # Match column creation time counter begins
-            match_col_create_begin_time = datetime.now()
-
-            # Create a new column, Match
-            # If either/both source and target measure value is None,
-            # then Match is set as False by default
-            combined_df['Match'] = (combined_df.loc[:,'Source_Value']
-                                    ==
-                                    combined_df.loc[:,'Target_Value'])
-            logging.debug(f"Combined dataframe prior to null records \
-exception:\n{combined_df}")
-
-            # Match column creation processing time
-            match_col_create_end_time = datetime.now()
-            match_col_create_process_time = (match_col_create_end_time
-                                             -
-                                             match_col_create_begin_time)
-            logging.info(f"Match column creation processed in \
-{match_col_create_process_time.total_seconds()} seconds")
-
-            # Match column update time counter begins
-            match_col_update_begin_time = datetime.now()
-
-            # If both the source and target measure value is None,
-            # then update the Match flag as True
-            combined_df.loc[(combined_df['Source_Value'].isnull() == True) & (combined_df['Target_Value'].isnull() == True), 'Match'] = True
-            logging.debug(f"Combined dataframe post to null records exception:\n{combined_df}")
-
-            # Match column update processing time
-            match_col_update_end_time = datetime.now()
-            match_col_update_process_time = (match_col_update_end_time
-                                             -
-                                             match_col_update_begin_time)
-            logging.info(f"Match column update for null data processed in \
-{match_col_update_process_time.total_seconds()} seconds")
+    def writerow(self, row, category):
+        '''Write a record, with the header first'''
+        if self.writer is None:
+            if self.file is None:
+                self.file = self.open_file()
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.header)
+        self.writer.writerow(row)
+        self.no_of_records += 1
 
-            #*****************************************************************************
-            #  Export the match and mismatch data to respective files
-            #*****************************************************************************
-            # Export the data, only when match/mismatch data is available
-            logging.info("Match/Misatch file is created, \
-only when the corresponding dataset exist")
-            # Comparison #records time counter
-            no_of_compare_records_count_begin_time = datetime.now()
-
-            match_records = len(combined_df[combined_df['Match']==True])
-            mismatch_records = len(combined_df[combined_df['Match']==False])
-
-            # Comparison #records processing time
-            no_of_compare_records_count_end_time = datetime.now()
-            no_of_compare_records_count_process_time = (
-                no_of_compare_records_count_end_time
-                -
-                no_of_compare_records_count_begin_time)
-            logging.info(f"Count of mismatch and match records is processed \
-in {no_of_compare_records_count_process_time.total_seconds()} seconds")
-            print(f"Count of mismatch records is {mismatch_records} and \
-match records is {match_records}, processed in \
-{no_of_compare_records_count_process_time.total_seconds()} seconds")
+    def close(self):
+        '''Close the output file'''
+        super().close()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
 
-            # Match data export time counter begins
-            match_data_export_begin_time = datetime.now()
+class CompressedCsvRecordSink(CsvRecordSink):
+    '''Write the records to a gzip or zstandard compressed .csv output file,
+compressed as a stream'''
 
-            if match_records> 0:
-                # Export match records
-                combined_df[combined_df['Match']==True].to_csv(match_data_full_file_name)
-                logging.info(f"{match_records} records has been exported \
-to '{match_data_full_file_name}'")
-            else:
-                logging.info('Source and target file has no match records')
+    def __init__(self, full_file_name, header=None, codec='gzip'):
+        '''Initialize the output full file name, the record header and the
+compression codec (gzip or zstd)'''
+        super().__init__(full_file_name, header)
+        self.codec = codec
 
-            # Match data export processing time
-            match_data_export_end_time = datetime.now()
-            match_data_export_process_time = (match_data_export_end_time
-                                              -
-                                              match_data_export_begin_time)
-            logging.info(f"Match data filtered and .csv file exported in \
-{match_data_export_process_time.total_seconds()} seconds")
-            print(f"Match data filtered and .csv file exported in \
-{match_data_export_process_time.total_seconds()} seconds")
+    def open_file(self):
+        '''Open the compressed output file as text'''
+        if self.codec == 'zstd':
+            return zstandard.open(self.full_file_name, 'wt', newline='')
+        # Level 6, as the gzip command line, not the slower default 9
+        return gzip.open(self.full_file_name, 'wt', compresslevel=6,
+                         newline='')
 
-            # Mismatch data & its export time counter begins
-            mismatch_data_export_begin_time = datetime.now()
+class ParquetRecordSink(RecordSink):
+    '''Write the records to a Parquet output file, a row group per chunk;
+the schema is set by the first chunk, the category is not in the layout'''
 
-            if mismatch_records > 0:
-                # Export mismatch records
-                combined_df[combined_df['Match']==False].to_csv(mismatch_data_full_file_name)
-                logging.info(f"{mismatch_records} records has been exported \
-to '{mismatch_data_full_file_name}'")
-            else:
-                logging.info('Source and target file has no mismatch records')
-            # Mismtach data & its export processing time
-            mismatch_data_export_end_time = datetime.now()
-            mismatch_data_export_process_time = (mismatch_data_export_end_time
-                                                 -
-                                                 mismatch_data_export_begin_time)
-            logging.info(f"Mismatch data filtered and .csv file exported in \
-{mismatch_data_export_process_time.total_seconds()} seconds")
-            print(f"Mismatch data filtered and .csv file exported in \
-{mismatch_data_export_process_time.total_seconds()} seconds")
+    def __init__(self, full_file_name, header=None):
+        '''Initialize the output full file name and the record header'''
+        super().__init__(full_file_name, header)
+        self.writer = None
 
-            # Total checks time counter begins
-            totals_check_recon_begin_time = datetime.now()
+    def write_frame(self, records_df, categories, index_flag):
+        '''Write a chunk of the records as a row group'''
+        # pyarrow is optional, imported by the first Parquet output only
+        import pyarrow
+        import pyarrow.parquet
+        if index_flag:
+            records_df = records_df.reset_index()
+        # Categorical columns are written as their values, so that the
+        # dictionaries of the chunks need not be the same
+        records_df = records_df.astype({
+            col_name: object for col_name, dtype in records_df.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)})
+        table = pyarrow.Table.from_pandas(
+            records_df, preserve_index=False,
+            schema=None if self.writer is None else self.writer.schema)
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.full_file_name,
+                                                        table.schema)
+        self.writer.write_table(table)
 
-            # Totals Check reconciliation
-            if concat_records == match_records + mismatch_records:
-                logging.info(f"Sum check has passed: Merge file data records \
-{concat_records} in memory = Match records({match_records}) + \
-Mismatch records({mismatch_records})")
-            else:
-                logging.info(f"Sum check has failed: Merge file data records \
-{concat_records} in memory != Match records({match_records}) + \
-Mismatch records({mismatch_records})")
+    def close(self):
+        '''Close the output file'''
+        super().close()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
 
-            # Total checks processing time
-            totals_check_recon_end_time = datetime.now()
-            totals_check_recon_process_time = (totals_check_recon_end_time
-                                               -
-                                               totals_check_recon_begin_time)
-            logging.info(f"Total sum check processed in \
-{totals_check_recon_process_time.total_seconds()} seconds")
+class StoreRecordSink(RecordSink):
+    '''Write the records with their category to the record store table of
+a file pair, inserted in batches'''
 
-            #*****************************************************************************
-            #  Export the summary stats - for full comparison done
-            #*****************************************************************************
-            summary_stats_set_n_export_begin_time = datetime.now()
-            summary_stats_data = {'S.No': [self.sno],
-                                  'Source Object Name': [source_file_name_wo_ext],
-                                  'Target Object Name': [target_file_name_wo_ext],
-                                  'Source Object Directory & Path': [self.source_file],
-                                  'Target Object Directory & Path': [self.target_file],
-                                  'Source Object Exists - Flag': 1,
-                                  'Target Object Exists - Flag':1,
-                                  'Source & Target Object is csv - Flag': 1,
-                                  'Reconciliation Performed - Flag': 1,
-                                  'Date & Time': [datetime.now()],
-                                  'No. of records in Source File': [no_source_records],
-                                  'No. of records in Target File': [no_target_records],
-                                  'No. of Match records': [match_records],
-                                  'No. of Mismatch records': [mismatch_records],
-                                  'Dataset Match - Flag': [overall_match],
-                                  'Location of Match records': [match_data_full_file_name],
-                                  'Location of Mismatch records': [mismatch_data_full_file_name],
-                                  'Remarks': ''
-                                  }
-        summary_stats_df = pd.DataFrame(data=summary_stats_data)
-        logging.debug(f"Summary Stats dataframe data is:\n{summary_stats_df}")
-        summary_stats_df.to_csv(summary_stats_fullfilename,index=False,
-                                mode='a', header=None)
-        logging.info(F"Comparison summary stats of {source_file_name_wo_ext} \
-and {target_file_name_wo_ext} is exported successfully")
+    def __init__(self, compare_files, header=None):
+        '''Initialize the file comparison and the record header'''
+        super().__init__(None, header)
+        self.compare_files = compare_files
 
-        # Summary Stats output processing time
-        summary_stats_set_n_export_end_time = datetime.now()
-        summary_stats_set_n_export_process_time = (
-            summary_stats_set_n_export_end_time
-            -
-            summary_stats_set_n_export_begin_time)
-        logging.info(f"Summary Stats created and expored in \
-{summary_stats_set_n_export_process_time.total_seconds()} seconds")
+    def write_frame(self, records_df, categories, index_flag):
+        '''Insert a chunk of the records with their categories'''
+        records_df = (records_df.reset_index() if index_flag
+                      else records_df.copy(deep=False))
+        records_df[RecordStore.category_col_name] = (
+            categories.to_numpy() if isinstance(categories, pd.Series)
+            else categories)
+        self.compare_files.store_records(list(records_df.columns),
+                                         RecordStore.frame_rows(records_df))
 
-        return summary_stats_df
+    def writerow(self, row, category):
+        '''Buffer a record with its category, insert the full batch'''
+        self.rows.append(row + [category])
+        self.no_of_records += 1
+        if len(self.rows) >= RecordStore.batch_rows:
+            self.flush()
 
-#*****************************************************************************
-#  User inputs for source and target directory
-#*****************************************************************************
+    def flush(self):
+        '''Insert the buffered records'''
+        if self.rows:
+            self.compare_files.store_records(
+                self.header + [RecordStore.category_col_name], self.rows)
+            self.rows = []
 
-text = 'Enter the source directoy path of .csv files for comparison:\n'
-source_dir = input(text)
+    def discard(self):
+        '''Drop the buffered records; the table is replaced by the next
+attempt of the file pair'''
+        self.rows = []
+        self.no_of_records = 0
 
-text = 'Enter the target directory path of .csv files for comparison:\n'
-target_dir = input(text)
+    def location(self):
+        '''Get the location of the record store table, None if nothing is
+written'''
+        if self.no_of_records == 0:
+            return None
+        return self.compare_files.record_store.location(
+            self.compare_files.record_table_name())
 
-#*****************************************************************************
-#  User inputs for Output file path and Summary file path
-#*****************************************************************************
-text = 'Enter the Output directory path:\n'
-output_dir = input(text)
+    def bytes(self):
+        '''Records are in the store, not in a file of their own'''
+        return 0
 
-# Program start time
-begin_time = datetime.now()
-logging.info(f"\nProgram execution starts @ {begin_time}")
-print(f"\nProgram execution starts @ {begin_time}")
+class NoRecordSink(RecordSink):
+    '''Write no records, e.g. the match records nobody reads'''
 
-# Log the user inputs
-msg = 'User provided source directory path of .csv files for comparison is'
-logging.info(f"{msg} '{source_dir}'")
+    def write(self, records_df, categories, row_flags=None, index_flag=True):
+        '''Skip the records, without filtering them'''
 
-msg = 'User provided target directoy path of .csv files for comparison is'
-logging.info(f"{msg} '{target_dir}'")
+    def writerow(self, row, category):
+        '''Skip the record'''
 
-logging.info(f"User provided output directory path is '{output_dir}'")
+class SampleRecordSink(RecordSink):
+    '''Write a fixed-size uniform random sample of the records to another
+sink - a reservoir of the records with the smallest random keys, so that
+the chunks need not be known in advance; the sampled records keep their
+order'''
 
-#*****************************************************************************
-#  Validations - User input; If fails, exit the program
-#*****************************************************************************
-# Check for directory existence and directory difference
-dir_validations_fail1 = [
-                        InputDirectoryValidations(
-                            dir_path = source_dir,
-                            dir_type='Source').dir_check_exists(),
-                        InputDirectoryValidations(
-                            dir_path = target_dir,
-                            dir_type='Target').dir_check_exists(),
-                        InputDirectoryValidations(
-                            dir_path = output_dir,
-                            dir_type='Output').dir_check_exists(),
-                        CompareDirectoriesValidation(
-                            source_dir = source_dir,
-                            target_dir = target_dir,
-                            output_dir = output_dir).dirs_are_same(),
-                        ]
-
-if 1 in dir_validations_fail1:
-    logging.critical("Enter valid inputs! Exiting the program...")
-    print('Atleast one of the validations has failed. \
-Refer to the log file for error details')
-    sys.exit(0)
-
-# 2nd level check as these checks cannot be combined with the 1st one
-# Because if the directory does not exist, then the program cannot check if it has any files/directory
-# Check for empty directory and at least one .csv file
-dir_validations_fail2 = [
-                        InputDirectoryValidations(
-                            dir_path = source_dir,
-                            dir_type='Source').dir_check_empty(),
-                        InputDirectoryValidations(
-                            dir_path = target_dir
-                            ,dir_type='Target').dir_check_empty(),
-                        InputDirectoryValidations(
-                            dir_path = source_dir,
-                            dir_type='Source').dir_check_csv(),
-                        InputDirectoryValidations(
-                            dir_path = target_dir,
-                            dir_type='Target').dir_check_csv(),
-                        ]
-
-if 1 in dir_validations_fail2:
-    logging.critical("Enter valid inputs! Exiting the program...")
-    print('Atleast one of the validations has failed. \
-Refer to the log file for error details')
-    sys.exit(0)
+    def __init__(self, sink, sample_rows=10000, seed=0):
+        '''Initialize the sink of the sample, the sample size and the
+random seed, for a repeatable sample'''
+        super().__init__(sink.full_file_name, sink.header)
+        self.sink = sink
+        self.sample_rows = sample_rows
+        self.random = np.random.default_rng(seed)
+        self.sample_df = None
 
-#*****************************************************************************
-#  Set the Summary Stats file name
-#*****************************************************************************
+    def write(self, records_df, categories, row_flags=None, index_flag=True):
+        '''Add a chunk of the records to the reservoir; only the records
+that may be sampled are copied'''
+        positions = (np.arange(len(records_df)) if row_flags is None
+                     else np.flatnonzero(np.asarray(row_flags)))
+        sample_keys = self.random.random(len(positions))
+        sample_orders = self.no_of_records + np.arange(len(positions))
+        self.no_of_records += len(positions)
+        if len(positions) > self.sample_rows:
+            sampled = np.argpartition(sample_keys, self.sample_rows)[
+                :self.sample_rows]
+            positions = positions[sampled]
+            sample_keys = sample_keys[sampled]
+            sample_orders = sample_orders[sampled]
+        if len(positions) == 0:
+            return
+        chunk_df = records_df.iloc[positions]
+        if index_flag:
+            chunk_df = chunk_df.reset_index()
+        chunk_df = chunk_df.assign(
+            _category = (categories.to_numpy()[positions]
+                         if isinstance(categories, pd.Series) else categories),
+            _sample_key = sample_keys, _sample_order = sample_orders)
+        if self.sample_df is not None:
+            chunk_df = pd.concat([self.sample_df, chunk_df], ignore_index=True)
+        if len(chunk_df) > self.sample_rows:
+            chunk_df = chunk_df.nsmallest(self.sample_rows, '_sample_key')
+        self.sample_df = chunk_df
 
-# Summary Stats file is combination of directory path and hardcoded file name
-# Date string in the format: yyyy-mm-dd hh.mm.ss
-dt_string = now.strftime("%Y-%m-%d %H.%M.%S")
-summary_stats_filename = 'Summary Stats csv File Compare_'+dt_string+'.csv'
-summary_stats_fullfilename = os.path.join(output_dir, summary_stats_filename)
+    def close(self):
+        '''Write the sample to its sink, in the order of the records'''
+        super().close()
+        if self.sample_df is not None:
+            sample_df = self.sample_df.sort_values('_sample_order').drop(
+                columns=['_sample_key', '_sample_order'])
+            self.sample_df = None
+            categories = sample_df.pop('_category')
+            self.sink.write(sample_df, categories, index_flag=False)
+        self.sink.close()
 
-#*****************************************************************************
-#  Load source and target directory objects into a list for processing
-#*****************************************************************************
-# Get the unique list of objects
-source_objects=ObjectList(dir_path=source_dir,dir_type='Source').object_list()
-target_objects=ObjectList(dir_path=target_dir,dir_type='Target').object_list()
-unique_object_list = set(source_objects+target_objects)
-msg = 'Combined source and target directory unique object set is'
-logging.info(f"{msg} {unique_object_list}")
-msg = 'Total number of unqiue objects identified for processing:'
-print(f"{msg} {len(unique_object_list)}")
+    def discard(self):
+        '''Drop the sample and discard its sink'''
+        self.rows = []
+        self.sample_df = None
+        self.sink.discard()
+        self.no_of_records = 0
 
-#*****************************************************************************
-#  Print the Summary Stats file header
-#*****************************************************************************
+    def location(self):
+        '''Get the location of the sample'''
+        return self.sink.location()
 
-# Print the header record to the summary stats file
-SummaryFileOutput(
-    dir_path = output_dir,
-    fullfilename = summary_stats_fullfilename,
-    obj_list = unique_object_list,
-    # S.No info is a dummmy entry passed to satisfy the syntax
-    sno = ''
-    ).print_summary_file_header()
+    def bytes(self):
+        '''Get the number of bytes of the sample'''
+        return self.sink.bytes()
 
-#*****************************************************************************
-#  Loop through each object, check if recon can be performed
-#*****************************************************************************
+class KeyHashRecordSink(RecordSink):
+    '''Write only the 64-bit hash of the key values of each record to
+another sink, e.g. to prove which keys match at a fraction of the output
+size; the key values are hashed as text, the same for all comparison
+classes'''
 
-dir_compare = {}
-s_no = 0
+    key_hash_col_name = 'Key Hash'
 
-for object in unique_object_list:
-    s_no +=1
-    logging.info(f"Object#{s_no}-{object} recon processing starts \
-@ {datetime.now()}")
-    print(f"\nObject#{s_no}-{object} recon processing starts \
-@ {datetime.now()}")
-    object_process_begin_time = datetime.now()
-    dir_compare[object] = {}
-    dir_compare[object]['S.No'] = s_no
-    # If the object 1) ends with .csv and 2) is a file, then it is a .csv file
-    dir_compare[object]['Is csv Flag'] = 1 if object.endswith('.csv') & os.path.isfile(os.path.join(source_dir, object)) & os.path.isfile(os.path.join(target_dir, object)) else 0
-    logging.info(f".csv file check result is \
+    def __init__(self, sink, key_col_names):
+        '''Initialize the sink of the key hashes and the key column names'''
+        super().__init__(sink.full_file_name, sink.header)
+        self.sink = sink
+        self.sink.header = [self.key_hash_col_name]
+        self.key_col_names = list(key_col_names or [])
+
+    def write(self, records_df, categories, row_flags=None, index_flag=True):
+        '''Hash the keys of a chunk of the records and write them; the key
+columns are the index, or the key columns of the records'''
+        if row_flags is not None:
+            row_flags = np.asarray(row_flags)
+            if isinstance(categories, pd.Series):
+                categories = categories[row_flags]
+        if index_flag:
+            key_index = (records_df.index if row_flags is None
+                         else records_df.index[row_flags])
+            key_df = key_index.to_frame(index=False)
+        else:
+            key_df = records_df[self.key_col_names]
+            if row_flags is not None:
+                key_df = key_df[row_flags]
+        if len(key_df) == 0:
+            return
+        key_hashes = pd.util.hash_pandas_object(key_df.astype(str),
+                                                index=False).to_numpy()
+        self.sink.write(pd.DataFrame({self.key_hash_col_name: key_hashes}),
+                        categories, index_flag=False)
+        self.no_of_records += len(key_df)
+
+    def close(self):
+        '''Write the buffered records and close the sink'''
+        super().close()
+        self.sink.close()
+
+    def discard(self):
+        '''Drop the buffered records and discard the sink'''
+        self.rows = []
+        self.sink.discard()
+        self.no_of_records = 0
+
+    def location(self):
+        '''Get the location of the key hashes'''
+        return self.sink.location()
+
+    def bytes(self):
+        '''Get the number of bytes of the key hashes'''
+        return self.sink.bytes()
+
+def error_message(err):
+    '''Get the error message of a file pair not reconciled for an error'''
+    if isinstance(err, OSError):
+        return "An unexpected OS error: {0}".format(err)
+    if isinstance(err, ValueError):
+        return "An unexpected Value error: {0}".format(err)
+    return 'An unexpected error has occured'
+
+class BackgroundWriter:
+    '''Write the outputs of the file pairs - the match and mismatch records
+and the summary rows - on a writer thread, in the order they are handed off,
+through a bounded queue: at most the queue depth of writes, e.g. chunks of
+the records, are pending in memory. A failed write is the error of its file
+pair, and the next writes of the pair are skipped'''
+
+    def __init__(self, queue_depth=8):
+        '''Initialize the queue of the writes, up to the queue depth, and
+start the writer thread'''
+        self.queue = queue.Queue(maxsize=queue_depth)
+        # Error of each file pair with a failed write, by S.No
+        self.errors = {}
+        self.thread = threading.Thread(target=self.run, name='recon-writer',
+                                       daemon=True)
+        self.thread.start()
+
+    def submit(self, sno, function, *args, failed_flag=0):
+        '''Hand off a write of a file pair, waiting while the queue is full;
+with the failed flag, it is written even after a failed write of the pair,
+e.g. the close of its output'''
+        self.queue.put((sno, function, args, failed_flag))
+
+    def run(self):
+        '''Writer thread - write the queued writes until the queue is closed'''
+        while True:
+            write = self.queue.get()
+            if write is None:
+                break
+            sno, function, args, failed_flag = write
+            if sno in self.errors and failed_flag == 0:
+                continue
+            try:
+                function(*args)
+            except Exception as err:
+                logging.error(f"Background write of Object#{sno} failed: {err}")
+                self.errors.setdefault(sno, error_message(err))
+
+    def close(self):
+        '''Write the queued writes and stop the writer thread'''
+        self.queue.put(None)
+        self.thread.join()
+
+class BackgroundRecordSink(RecordSink):
+    '''Write the records to another sink on the background writer thread;
+the chunks of the records are filtered as they are handed off, so that the
+count and the location of the output are known at once, but not its bytes'''
+
+    def __init__(self, sink, background_writer, sno):
+        '''Initialize the sink written in the background, the background
+writer and the S.No of the file pair'''
+        super().__init__(sink.full_file_name, sink.header)
+        self.sink = sink
+        self.background_writer = background_writer
+        self.sno = sno
+
+    def write_frame(self, records_df, categories, index_flag):
+        '''Hand off a chunk of the records'''
+        self.background_writer.submit(self.sno, self.sink.write, records_df,
+                                      categories, None, index_flag)
+
+    def writerow(self, row, category):
+        '''Buffer a record with its category, hand off the full batch'''
+        self.rows.append(row)
+        self.row_categories.append(category)
+        self.no_of_records += 1
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        '''Hand off the buffered records, written row by row by the sink'''
+        if self.rows:
+            self.background_writer.submit(self.sno, self.write_rows,
+                                          self.rows, self.row_categories)
+            self.rows = []
+            self.row_categories = []
+
+    def write_rows(self, rows, row_categories):
+        '''Writer thread - write the records row by row to the sink'''
+        for row, category in zip(rows, row_categories):
+            self.sink.writerow(row, category)
+
+    def close(self):
+        '''Hand off the buffered records and the close of the sink'''
+        self.flush()
+        self.background_writer.submit(self.sno, self.sink.close,
+                                      failed_flag = 1)
+
+    def discard(self):
+        '''Drop the buffered records and hand off the discard of the sink'''
+        self.rows = []
+        self.row_categories = []
+        self.background_writer.submit(self.sno, self.sink.discard,
+                                      failed_flag = 1)
+        self.no_of_records = 0
+
+    def bytes(self):
+        '''Output is not written yet, its bytes are not known'''
+        return 0
+
+class FileEqualityCheck:
+    '''Tiered check if the source and target file are equal, escalated only
+when needed: 1) file size and header record, 2) streaming byte digest,
+3) order independent multiset fingerprint of the row hashes'''
+
+    def __init__(self, source_file, target_file, block_size=1024*1024):
+        '''Initialize source file, target file and the read block size'''
+        self.source_file = source_file
+        self.target_file = target_file
+        self.block_size = block_size
+
+    @staticmethod
+    def header_record(file_name):
+        '''Get the header record of the file, as the list of column names'''
+        with open_csv(file_name) as f:
+            return next(csv.reader(f), [])
+
+    def size_n_header_check(self):
+        '''Tier 1 - Check if the file size and header record are the same;
+the size of a compressed file is not its data size, so it is not checked if
+either file is compressed'''
+        if (compression_codec(self.source_file) is None
+                and compression_codec(self.target_file) is None
+                and os.path.getsize(self.source_file)
+                != os.path.getsize(self.target_file)):
+            return 0
+        source_header = self.header_record(self.source_file)
+        return 1 if (source_header
+                     and source_header == self.header_record(self.target_file)) else 0
+
+    def byte_digest(self, file_name):
+        '''Tier 2 - Get the streaming byte digest of the file, the number of
+records, and the flag if the file has quotes or blank lines, where the
+record count by new lines does not apply; a compressed file is digested
+as decompressed'''
+        digest = hashlib.blake2b()
+        no_of_new_lines = 0
+        quote_or_blank_found_flag = 0
+        previous_tail = b''
+        last_byte = b''
+        with open_compressed(file_name) as f:
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                digest.update(block)
+                no_of_new_lines += block.count(b'\n')
+                check_block = previous_tail + block
+                if (b'"' in block or b'\n\n' in check_block
+                        or b'\n\r\n' in check_block):
+                    quote_or_blank_found_flag = 1
+                previous_tail = block[-2:]
+                last_byte = block[-1:]
+        # Header record is not counted, last record may not have a new line
+        no_of_records = (no_of_new_lines + (1 if last_byte not in [b'', b'\n'] else 0)
+                         - 1)
+        if quote_or_blank_found_flag == 1:
+            no_of_records = self.row_fingerprint(file_name, 1)[1]
+        return digest.hexdigest(), no_of_records, quote_or_blank_found_flag
+
+    @staticmethod
+    def row_fingerprint(file_name, quote_or_blank_found_flag):
+        '''Tier 3 - Get the order independent fingerprint of the file records,
+as the sum of the 128 bit row hashes, and the number of records'''
+        fingerprint = 0
+        no_of_records = 0
+        if quote_or_blank_found_flag == 1:
+            # Records are parsed, as a quoted value may have a new line
+            with open_csv(file_name) as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                rows = ('\x1f'.join(row).encode() for row in reader if row)
+                for row in rows:
+                    fingerprint += int.from_bytes(
+                        hashlib.blake2b(row, digest_size=16).digest(), 'little')
+                    no_of_records += 1
+        else:
+            with open_compressed(file_name) as f:
+                next(f, None)
+                for row in f:
+                    row = row.rstrip(b'\r\n')
+                    if row:
+                        fingerprint += int.from_bytes(
+                            hashlib.blake2b(row, digest_size=16).digest(),
+                            'little')
+                        no_of_records += 1
+        return fingerprint % (1 << 128), no_of_records
+
+    @staticmethod
+    def key_n_null_scan(file_name, key_positions, measure_positions):
+        '''Check if a key of the file is duplicate and count the records with
+all measures null, in one pass over its records; the keys are compared by
+their typed values, as the full comparison loads them, and by a 64-bit hash,
+so a hash collision only sends the file pair to the full comparison. Return
+the duplicate key found flag and the number of records with all measures
+null'''
+        key_hashes = array('q')
+        no_of_null_records = 0
+        with open_csv(file_name) as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if not row:
+                    continue
+                key_hashes.append(hash(tuple(
+                    MergeJoinCompareFiles.typed_value(
+                        row[key_position] if key_position < len(row) else '')
+                    for key_position in key_positions)))
+                if all((row[measure_position] if measure_position < len(row)
+                        else '') in NA_VALUES
+                       for measure_position in measure_positions):
+                    no_of_null_records += 1
+        duplicate_key_found_flag = 1 if pd.Index(
+            np.frombuffer(key_hashes, dtype=np.int64)).has_duplicates else 0
+        return duplicate_key_found_flag, no_of_null_records
+
+    def files_equal(self):
+        '''Check if the files are equal; return the equal flag, the check
+that has proven it, and the number of source and target records'''
+        if self.size_n_header_check() == 0:
+            logging.info('Equality check: file size or header record differs')
+            return 0, 'file size and header', None, None
+        source_digest, no_source_records, source_quote_or_blank_found_flag = (
+            self.byte_digest(self.source_file))
+        target_digest, no_target_records, target_quote_or_blank_found_flag = (
+            self.byte_digest(self.target_file))
+        if source_digest == target_digest:
+            logging.info('Equality check: byte digest matches')
+            return 1, 'byte digest', no_source_records, no_target_records
+        quote_or_blank_found_flag = max(source_quote_or_blank_found_flag,
+                                        target_quote_or_blank_found_flag)
+        source_fingerprint, no_source_records = self.row_fingerprint(
+            self.source_file, quote_or_blank_found_flag)
+        target_fingerprint, no_target_records = self.row_fingerprint(
+            self.target_file, quote_or_blank_found_flag)
+        if (source_fingerprint == target_fingerprint
+                and no_source_records == no_target_records):
+            logging.info('Equality check: row fingerprint matches')
+            return 1, 'row fingerprint', no_source_records, no_target_records
+        logging.info('Equality check: row fingerprint differs')
+        return 0, 'row fingerprint', None, None
+
+class ParseCache:
+    '''On-disk cache of the parsed, typed dataframes of the .csv files,
+keyed by the absolute path, size and modification time of the file and
+its schema; the least recently used entries are evicted above the size cap.
+The entries are Feather files, the cache needs the pyarrow package'''
+
+    # Key and data types of a Feather entry, in its schema metadata
+    metadata_key = b'recon_parse_cache'
+    entry_ext = '.feather'
+
+    def __init__(self, cache_dir, size_cap_mb=10240):
+        '''Initialize the cache directory and its size cap in MB'''
+        self.cache_dir = cache_dir
+        self.size_cap_mb = size_cap_mb
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def file_stat(file_name):
+        '''Get the absolute path, size and modification time of the file'''
+        stat = os.stat(file_name)
+        return [os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns]
+
+    def cache_key(self, file_stat, dtypes, exclude_col_names):
+        '''Get the cache entry key of the file stat and schema'''
+        key = json.dumps({'file': file_stat, 'dtypes': dtypes,
+                          'exclude_columns': sorted(exclude_col_names)},
+                         sort_keys=True, default=str)
+        return key, hashlib.sha256(key.encode()).hexdigest()
+
+    def load(self, file_name, dtypes, exclude_col_names):
+        '''Load the dataframe and data types of the file from the cache;
+None, if the entry does not exist or does not match the file anymore'''
+        key, digest = self.cache_key(self.file_stat(file_name), dtypes,
+                                     exclude_col_names)
+        entry_file_name = os.path.join(self.cache_dir, digest + self.entry_ext)
+        try:
+            entry = self.read_entry(entry_file_name)
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logging.warning(f"Parse cache entry {entry_file_name} is not \
+readable and is removed: {err}")
+            self.remove(entry_file_name)
+            return None
+        if entry['key'] != key:
+            return None
+        # Mark the entry as recently used
+        os.utime(entry_file_name)
+        logging.info(f"{file_name} is loaded from the parse cache")
+        return entry['df'], entry['dtypes']
+
+    def store(self, file_name, file_stat, requested_dtypes, exclude_col_names,
+              df, dtypes):
+        '''Store the parsed dataframe of the file, only if the file has not
+changed while it was parsed'''
+        if self.file_stat(file_name) != file_stat:
+            logging.info(f"{file_name} has changed while parsed, it is not \
+stored in the parse cache")
+            return
+        key, digest = self.cache_key(file_stat, requested_dtypes,
+                                     exclude_col_names)
+        entry_file_name = os.path.join(self.cache_dir, digest + self.entry_ext)
+        # Written to a temporary file first, so a partial entry is never read
+        temp_file_name = f"{entry_file_name}.{os.getpid()}.tmp"
+        try:
+            self.write_entry(temp_file_name,
+                             {'key': key, 'df': df, 'dtypes': dtypes})
+            os.replace(temp_file_name, entry_file_name)
+        except Exception as err:
+            # The cache is an optimization, the recon goes on without it
+            logging.warning(f"{file_name} is not stored in the parse cache: \
+{err}")
+            self.remove(temp_file_name)
+            return
+        logging.info(f"{file_name} is stored in the parse cache")
+        self.evict()
+
+    def read_entry(self, entry_file_name):
+        '''Read a cache entry - its key, dataframe and data types'''
+        import pyarrow.feather
+        table = pyarrow.feather.read_table(entry_file_name)
+        entry = json.loads(table.schema.metadata[self.metadata_key])
+        df = table.to_pandas()
+        # Null text values are read as None, they were parsed as NaN
+        for col_name in df.columns[df.dtypes == object]:
+            df[col_name] = df[col_name].where(df[col_name].notnull(), np.nan)
+        entry['df'] = df
+        return entry
+
+    def write_entry(self, entry_file_name, entry):
+        '''Write a cache entry - its key, dataframe and data types'''
+        import pyarrow
+        import pyarrow.feather
+        table = pyarrow.Table.from_pandas(entry['df'])
+        table = table.replace_schema_metadata({
+            **table.schema.metadata,
+            self.metadata_key: json.dumps({'key': entry['key'],
+                                           'dtypes': entry['dtypes']})})
+        pyarrow.feather.write_feather(table, entry_file_name)
+
+    @staticmethod
+    def remove(entry_file_name):
+        '''Remove a cache entry, if it is not already removed'''
+        try:
+            os.remove(entry_file_name)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        '''Evict the least recently used entries above the size cap'''
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.entry_ext) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        cache_size = sum(entry[1] for entry in entries)
+        for _, entry_size, entry_file_name in sorted(entries):
+            if cache_size <= self.size_cap_mb * 1024 * 1024:
+                break
+            self.remove(entry_file_name)
+            cache_size -= entry_size
+            logging.info(f"Parse cache entry {entry_file_name} is evicted")
+
+class ResultCache:
+    '''Persistent cache of the recon results across runs, keyed by the
+content digests of the source and target file, of the schema sidecar file
+and the recon settings; it stores the summary row counts and, optionally,
+the match/mismatch outputs, and evicts the least recently used results above
+the size cap'''
+
+    # Summary row columns, that depend only on the file contents
+    result_col_names = ['Reconciliation Performed - Flag',
+                        'No. of records in Source File',
+                        'No. of records in Target File',
+                        'No. of Match records',
+                        'No. of Mismatch records',
+                        ] + list(RECON_CATEGORY_COL_NAMES.values()) + [
+                        MEASURE_COUNTS_COL_NAME,
+                        'Dataset Match - Flag',
+                        'Remarks']
+
+    def __init__(self, cache_dir, size_cap_mb=10240, store_outputs_flag=1):
+        '''Initialize the cache directory, its size cap in MB, and the flag
+to store the match/mismatch outputs'''
+        self.cache_dir = cache_dir
+        self.size_cap_mb = size_cap_mb
+        self.store_outputs_flag = store_outputs_flag
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def content_digest(file_name, block_size=1024*1024):
+        '''Get the streaming byte digest of the file content'''
+        digest = hashlib.blake2b()
+        with open(file_name, 'rb') as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                digest.update(block)
+        return digest.hexdigest()
+
+    def cache_key(self, compare_files):
+        '''Get the cache key of the file pair contents, its schema sidecar
+file content and the recon settings'''
+        sidecar_file_name = ReconSchema.sidecar_file_name(
+            compare_files.source_file)
+        key = json.dumps({
+            'source': self.content_digest(compare_files.source_file),
+            'target': self.content_digest(compare_files.target_file),
+            'sidecar': (self.content_digest(sidecar_file_name)
+                        if os.path.isfile(sidecar_file_name) else None),
+            'compare_class': type(compare_files).__name__,
+            # Trusted key order of unsorted files gives another result
+            'merge_join_order': {1: 'C', 0: 'T'}.get(
+                getattr(compare_files, 'check_order_flag', None), ''),
+            'exclude_columns': sorted(compare_files.exclude_col_names or []),
+            'measure_columns': compare_files.measure_col_names or [],
+            'fast_path_flag': compare_files.fast_path_flag,
+            'fast_path_match_export_flag':
+                compare_files.fast_path_match_export_flag,
+            'output_format': compare_files.output_format,
+            'match_output': compare_files.match_output,
+            'match_sample_rows': compare_files.match_sample_rows,
+            # Results of an earlier classification are not reused
+            'recon_categories': RECON_CATEGORIES,
+            }, sort_keys=True)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def entry_file_name(self, cache_key, suffix):
+        '''Get the cache entry file name of the cache key'''
+        return os.path.join(self.cache_dir, f"{cache_key}{suffix}")
+
+    @staticmethod
+    def link_or_copy(from_file_name, to_file_name):
+        '''Hard-link the file, or copy it if it cannot be linked'''
+        if os.path.isfile(to_file_name):
+            os.remove(to_file_name)
+        try:
+            os.link(from_file_name, to_file_name)
+        except OSError:
+            shutil.copyfile(from_file_name, to_file_name)
+
+    def restore(self, cache_key, compare_files):
+        '''Restore the cached result of the file pair - link its outputs to
+the output directory and export its summary row; None, if not cached'''
+        entry_file_name = self.entry_file_name(cache_key, '.json')
+        try:
+            with open(entry_file_name, 'r') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as err:
+            logging.warning(f"Recon result cache entry {entry_file_name} is \
+not readable: {err}")
+            return None
+        compare_files.metrics.begin('summary')
+        (source_file_name_wo_ext, target_file_name_wo_ext,
+         match_data_full_file_name,
+         mismatch_data_full_file_name) = compare_files.output_file_names()
+        output_file_names = {'match': match_data_full_file_name,
+                             'mismatch': mismatch_data_full_file_name}
+        result = entry['result']
+        for output_type, full_file_name in output_file_names.items():
+            if entry['location'][output_type] == 0:
+                output_file_names[output_type] = None
+            elif entry['output'][output_type] == 1:
+                self.link_or_copy(self.entry_file_name(
+                    cache_key, f" - {output_type} records.csv"), full_file_name)
+            elif entry['output'][output_type] == -1:
+                # Output is exported, but not cached
+                output_file_names[output_type] = None
+                result['Remarks'] = ((result['Remarks'] or '')
+                                     + f" {output_type} records not cached").strip()
+        # Mark the entry as recently used
+        os.utime(entry_file_name)
+        logging.info(f"Recon result of {compare_files.source_file} is reused \
+from the recon result cache")
+        print('Recon result is reused from the recon result cache')
+        summary_stats_data = compare_files.summary_stats_data(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            result['No. of records in Source File'],
+            result['No. of records in Target File'],
+            recon_performed_flag = result['Reconciliation Performed - Flag'],
+            match_records = result['No. of Match records'],
+            mismatch_records = result['No. of Mismatch records'],
+            overall_match = result['Dataset Match - Flag'],
+            match_data_full_file_name = output_file_names['match'],
+            mismatch_data_full_file_name = output_file_names['mismatch'],
+            remarks = result['Remarks'],
+            category_counts = {category: result.get(col_name)
+                               for category, col_name
+                               in RECON_CATEGORY_COL_NAMES.items()},
+            measure_diff_counts = result.get(MEASURE_COUNTS_COL_NAME))
+        return compare_files.export_summary_stats(summary_stats_data)
+
+    def store(self, cache_key, compare_files, summary_stats_df):
+        '''Store the recon result of the file pair and, optionally, its
+match/mismatch outputs'''
+        summary_row = summary_stats_df.iloc[0]
+        result = {col_name: (None if pd.isnull(summary_row[col_name])
+                             else summary_row[col_name].item()
+                             if hasattr(summary_row[col_name], 'item')
+                             else summary_row[col_name])
+                  for col_name in self.result_col_names}
+        entry = {'result': result, 'location': {}, 'output': {}}
+        try:
+            for output_type in ['match', 'mismatch']:
+                full_file_name = summary_row[
+                    f"Location of {output_type.capitalize()} records"]
+                entry['location'][output_type] = (
+                    0 if pd.isnull(full_file_name) else 1)
+                # 1: cached, 0: not exported, -1: exported, but not cached
+                entry['output'][output_type] = 0
+                if entry['location'][output_type] == 1 and os.path.isfile(
+                        full_file_name):
+                    if self.store_outputs_flag == 1:
+                        self.link_or_copy(full_file_name, self.entry_file_name(
+                            cache_key, f" - {output_type} records.csv"))
+                        entry['output'][output_type] = 1
+                    else:
+                        entry['output'][output_type] = -1
+            # Entry is written last, so it is only read when complete
+            entry_file_name = self.entry_file_name(cache_key, '.json')
+            temp_file_name = f"{entry_file_name}.{os.getpid()}.tmp"
+            with open(temp_file_name, 'w') as f:
+                json.dump(entry, f)
+            os.replace(temp_file_name, entry_file_name)
+        except OSError as err:
+            # The cache is an optimization, the recon goes on without it
+            logging.warning(f"Recon result of {compare_files.source_file} is \
+not stored in the recon result cache: {err}")
+            return
+        logging.info(f"Recon result of {compare_files.source_file} is stored \
+in the recon result cache")
+        self.evict()
+
+    def evict(self):
+        '''Evict the least recently used results above the size cap'''
+        entries = {}
+        cache_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            cache_key = entry.name[:64]
+            stat = entry.stat()
+            cache_size += stat.st_size
+            mtime_ns, entry_size, file_names = entries.get(cache_key,
+                                                           (None, 0, []))
+            if entry.name.endswith('.json'):
+                mtime_ns = stat.st_mtime_ns
+            entries[cache_key] = (mtime_ns, entry_size + stat.st_size,
+                                  file_names + [entry.path])
+        # Files without an entry, e.g. an interrupted store, go first
+        for mtime_ns, entry_size, file_names in sorted(
+                entries.values(), key=lambda entry: entry[0] or 0):
+            if cache_size <= self.size_cap_mb * 1024 * 1024:
+                break
+            for file_name in file_names:
+                ParseCache.remove(file_name)
+            cache_size -= entry_size
+            logging.info(f"Recon result cache entry {file_names[0]} is evicted")
+
+class ReconSchema:
+    '''Infer the data types of a file pair once - from the header and a
+sample of both files, or from the optional schema sidecar file
+<source file>.schema.json - and load both files with the same explicit
+data types and shared categorical dictionaries for the text key columns'''
+
+    def __init__(self, source_file, target_file, exclude_col_names=None,
+                 sample_rows=10000, parse_cache=None, measure_col_names=None):
+        '''Initialize source file, target file, the column names not to be
+parsed, the number of sample records read to infer the data types, the
+optional parse cache of the typed dataframes, and the measure column names
+(default: Value/Values)'''
+        self.source_file = source_file
+        self.target_file = target_file
+        self.exclude_col_names = list(exclude_col_names or [])
+        self.sample_rows = sample_rows
+        self.parse_cache = parse_cache
+        self.sidecar = self.read_sidecar(source_file)
+        self.exclude_col_names += self.sidecar.get('exclude_columns', [])
+        self.measure_col_names = list(measure_col_names
+                                      or self.sidecar.get('measure_columns', []))
+
+    @staticmethod
+    def sidecar_file_name(file_name):
+        '''Get the schema sidecar file name of a .csv file, the same for its
+compressed file, e.g. sales.csv.schema.json of sales.csv.gz'''
+        return logical_file_name(file_name) + '.schema.json'
+
+    def read_sidecar(self, file_name):
+        '''Read the schema sidecar file, e.g.
+{"dtypes": {"Region": "category", "Value": "float64"},
+ "exclude_columns": ["Comments"], "measure_columns": ["Amount", "Quantity"]};
+empty, if it does not exist'''
+        sidecar_file_name = self.sidecar_file_name(file_name)
+        if not os.path.isfile(sidecar_file_name):
+            return {}
+        with open(sidecar_file_name, 'r') as f:
+            sidecar = json.load(f)
+        logging.info(f"Schema sidecar file {sidecar_file_name} is read")
+        return sidecar
+
+    def usecols(self, col_name):
+        '''Check if a column is parsed, i.e. it is not excluded'''
+        return col_name not in self.exclude_col_names
+
+    def is_measure(self, col_name):
+        '''Check if a column is a measure, i.e. compared, not a key column'''
+        if self.measure_col_names:
+            return col_name in self.measure_col_names
+        return col_name.lower() in ['value','values']
+
+    def measure_names(self, col_names):
+        '''Get the measure column names of a file in the file column order;
+None, if a measure column (Value/Values, when not configured) is not found'''
+        measure_names = [col_name for col_name in col_names
+                         if self.is_measure(col_name)]
+        if not measure_names or (self.measure_col_names and
+                                 len(measure_names) != len(self.measure_col_names)):
+            return None
+        return measure_names
+
+    def measure_error_remarks(self):
+        '''Get the remarks, when the measure columns are not found'''
+        if self.measure_col_names:
+            return f"Error, both source & target file should have the \
+measure columns {', '.join(self.measure_col_names)}"
+        return "Error, both source & target measure name should be 'Value(s)'"
+
+    @staticmethod
+    def sample_dtype(series, measure_flag):
+        '''Get the explicit data type of a column from its sample data;
+None to leave it to the pandas inference'''
+        if series.isnull().all() or pd.api.types.is_bool_dtype(series):
+            return None
+        if pd.api.types.is_integer_dtype(series):
+            return 'int64'
+        if pd.api.types.is_float_dtype(series):
+            return 'float64'
+        # Text key columns share a categorical dictionary, not the measure
+        return None if measure_flag == 1 else 'category'
+
+    def infer_dtypes(self):
+        '''Infer the data types once for the file pair, the same for the
+source and target file'''
+        source_sample_df = pd.read_csv(self.source_file, nrows=self.sample_rows,
+                                       usecols=self.usecols)
+        target_sample_df = pd.read_csv(self.target_file, nrows=self.sample_rows,
+                                       usecols=self.usecols)
+        dtypes = {}
+        for col_name in source_sample_df.columns:
+            if col_name not in target_sample_df.columns:
+                continue
+            measure_flag = 1 if self.is_measure(col_name) else 0
+            source_dtype = self.sample_dtype(source_sample_df[col_name],
+                                             measure_flag)
+            target_dtype = self.sample_dtype(target_sample_df[col_name],
+                                             measure_flag)
+            if source_dtype == target_dtype:
+                dtypes[col_name] = source_dtype
+            elif {source_dtype, target_dtype} == {'int64', 'float64'}:
+                dtypes[col_name] = 'float64'
+            else:
+                dtypes[col_name] = None
+        dtypes.update(self.sidecar.get('dtypes', {}))
+        return {col_name: dtype for col_name, dtype in dtypes.items()
+                if dtype is not None}
+
+    def widen_dtypes(self, dtypes, err, file_name):
+        '''Get the data types widened for the error of a data type that does
+not fit the data beyond the sample - a measure int64 to float64, a key int64
+to the nullable Int64, as a float key would round the large integers, else
+pandas inference - for the column in the error, by its position in the
+header, else all numeric columns, else all columns; raise the error, if there
+is none to widen'''
+        widen_col_names = []
+        match = re.search(r'in column (\d+)$', str(err))
+        if match is not None:
+            header = FileEqualityCheck.header_record(file_name)
+            position = int(match.group(1))
+            if position < len(header) and header[position] in dtypes:
+                widen_col_names = [header[position]]
+        if not widen_col_names:
+            widen_col_names = [col_name for col_name, dtype in dtypes.items()
+                               if dtype in ['int64', 'Int64', 'float64']]
+        if not widen_col_names:
+            widen_col_names = list(dtypes)
+        if not widen_col_names:
+            raise err
+        dtypes = dict(dtypes)
+        for col_name in widen_col_names:
+            if dtypes[col_name] == 'int64' and self.is_measure(col_name):
+                dtypes[col_name] = 'float64'
+            elif dtypes[col_name] == 'int64':
+                dtypes[col_name] = 'Int64'
+            else:
+                del dtypes[col_name]
+        logging.info(f"Data type of {widen_col_names} widened, as the \
+sample data type does not fit {file_name}: {err}")
+        return dtypes
+
+    def read_csv(self, file_name, dtypes):
+        '''Read the file with the explicit data types; a data type that does
+not fit the data beyond the sample, e.g. null in an integer column, is
+widened (int64 to float64, else pandas inference) and the file re-read;
+the parse cache is used, if it has the file with the same schema'''
+        if self.parse_cache is not None:
+            cached_df_n_dtypes = self.parse_cache.load(
+                file_name, dtypes, self.exclude_col_names)
+            if cached_df_n_dtypes is not None:
+                return cached_df_n_dtypes
+            file_stat = ParseCache.file_stat(file_name)
+        requested_dtypes = dtypes
+        dtypes = dict(dtypes)
+        while True:
+            try:
+                df = pd.read_csv(file_name, dtype=dtypes, usecols=self.usecols)
+                if self.parse_cache is not None:
+                    self.parse_cache.store(file_name, file_stat,
+                                           requested_dtypes,
+                                           self.exclude_col_names, df, dtypes)
+                return df, dtypes
+            except (ValueError, TypeError) as err:
+                dtypes = self.widen_dtypes(dtypes, err, file_name)
+
+    def load(self):
+        '''Load the source and target file with the inferred data types'''
+        dtypes = self.infer_dtypes()
+        logging.info(f"Inferred data types of the file pair: {dtypes}")
+        source_df, source_dtypes = self.read_csv(self.source_file, dtypes)
+        target_df, target_dtypes = self.read_csv(self.target_file,
+                                                 source_dtypes)
+        if target_dtypes != source_dtypes:
+            # Source is re-read, if its data types are widened by the target
+            source_df, source_dtypes = self.read_csv(self.source_file,
+                                                     target_dtypes)
+
+        # Categorical key columns share the same dictionary
+        for col_name, dtype in source_dtypes.items():
+            if (dtype == 'category' and col_name in target_df.columns
+                    and isinstance(source_df[col_name].dtype, pd.CategoricalDtype)
+                    and isinstance(target_df[col_name].dtype, pd.CategoricalDtype)):
+                shared_dtype = pd.CategoricalDtype(
+                    pd.api.types.union_categoricals(
+                        [source_df[col_name], target_df[col_name]]).categories)
+                source_df[col_name] = source_df[col_name].astype(shared_dtype)
+                target_df[col_name] = target_df[col_name].astype(shared_dtype)
+        return source_df, target_df
+
+class CompareFiles:
+    '''Compare the file, including source and target file check validations'''
+
+    # Both files are loaded in memory, so they can be read ahead
+    prefetch_load_flag = 1
+
+    def __init__(self, source_file, target_file,
+                 output_dir, summary_stats_fullfilename, sno,
+                 export_summary_flag=1, fast_path_flag=1,
+                 fast_path_match_export_flag=0, exclude_col_names=None,
+                 parse_cache=None, measure_col_names=None, hashed_join_flag=1,
+                 record_store=None, output_format='csv', match_output='all',
+                 match_sample_rows=10000, background_writer=None):
+        '''Initialize source file, target file, and measure name
+export_summary_flag=0 returns the summary row without appending it to the
+Summary Stats file, e.g. when the parent process writes it
+fast_path_flag=1 skips the full comparison of the files proven equal, and
+fast_path_match_export_flag=1 still exports their match records
+exclude_col_names are the columns never parsed nor compared
+parse_cache is the optional ParseCache of the typed dataframes
+measure_col_names are the measure columns compared together (default:
+Value/Values), the other columns are the key columns
+hashed_join_flag=1 aligns the records on a hash of the key columns, instead
+of the MultiIndex of the key columns
+record_store is the optional RecordStore of the match and mismatch records,
+instead of the .csv output files
+output_format is the file format of the outputs, one of OUTPUT_FORMATS
+match_output is all, none, a sample of match_sample_rows or the key hashes
+of the match records, one of MATCH_OUTPUTS
+background_writer is the optional BackgroundWriter of the output files'''
+        self.source_file = source_file
+        self.target_file = target_file
+        self.output_dir = output_dir
+        self.summary_stats_fullfilename = summary_stats_fullfilename
+        self.sno = sno
+        self.export_summary_flag = export_summary_flag
+        self.fast_path_flag = fast_path_flag
+        self.fast_path_match_export_flag = fast_path_match_export_flag
+        self.exclude_col_names = exclude_col_names
+        self.parse_cache = parse_cache
+        self.measure_col_names = measure_col_names
+        self.hashed_join_flag = hashed_join_flag
+        self.record_store = record_store
+        self.output_format = output_format
+        self.match_output = match_output
+        self.match_sample_rows = match_sample_rows
+        self.background_writer = background_writer
+        # Compressed files are read as a stream, if their codec is installed
+        check_codec(source_file)
+        check_codec(target_file)
+        # Record store table of the file pair is replaced on the first insert
+        self.record_table_flag = 0
+        # Metrics of each stage of the comparison
+        self.metrics = StageMetrics()
+        # Equality check and loaded files of the file pair read ahead
+        self.prefetched = None
+
+    @property
+    def stage_times(self):
+        '''Processing time in seconds of each stage of the comparison'''
+        return self.metrics.stage_times()
+
+    def input_bytes(self):
+        '''Get the size in bytes of the source and target file'''
+        return os.path.getsize(self.source_file) + os.path.getsize(self.target_file)
+
+    def record_table_name(self):
+        '''Get the record store table name of the file pair'''
+        return f"{file_stem(self.source_file)} - {self.sno}"
+
+    def store_records(self, col_names, rows):
+        '''Insert the records into the record store table of the file pair;
+the table of an earlier attempt, e.g. a merge join fallen back, is replaced
+on the first insert'''
+        self.record_store.write_rows(self.record_table_name(), col_names, rows,
+                                     replace_flag = 1 - self.record_table_flag)
+        self.record_table_flag = 1
+
+    def record_sink(self, output_type, full_file_name, key_col_names=None,
+                    header=None):
+        '''Get the output sink of the match or mismatch records - the record
+store table, else the output file in the output format; the match records
+are all, none, a sample or their key hashes, by the match output'''
+        if output_type == 'match' and self.match_output == 'none':
+            return NoRecordSink(full_file_name, header)
+        if self.record_store is not None:
+            sink = StoreRecordSink(self, header)
+        elif self.output_format == 'parquet':
+            sink = ParquetRecordSink(full_file_name, header)
+        elif self.output_format in ['csv.gz', 'csv.zst']:
+            sink = CompressedCsvRecordSink(
+                full_file_name, header,
+                codec = compression_codec(self.output_format))
+        else:
+            sink = CsvRecordSink(full_file_name, header)
+        # Output files are written by the background writer; the record store
+        # table is written by the comparison, which replaces it on its first
+        # insert
+        if self.background_writer is not None and self.record_store is None:
+            sink = BackgroundRecordSink(sink, self.background_writer, self.sno)
+        if output_type == 'match' and self.match_output == 'sample':
+            # Same sample of the same file pair in each run
+            return SampleRecordSink(sink, self.match_sample_rows,
+                                    seed = self.sno)
+        if output_type == 'match' and self.match_output == 'key-hash':
+            return KeyHashRecordSink(sink, key_col_names)
+        return sink
+
+    def index_records(self, key_col_names):
+        '''Index the record store table of the file pair, once exported'''
+        if self.record_store is not None and self.record_table_flag == 1:
+            self.record_store.create_indexes(self.record_table_name(),
+                                             list(key_col_names))
+
+    def recon_schema(self, parse_cache=None):
+        '''Get the ReconSchema of the file pair'''
+        return ReconSchema(self.source_file, self.target_file,
+                           self.exclude_col_names, parse_cache = parse_cache,
+                           measure_col_names = self.measure_col_names)
+
+    def output_file_names(self):
+        '''Get the source and target file name without extension, and the
+match and mismatch output file name with directory path'''
+        output_filename_creation_begin_time = datetime.now()
+
+        ## Export file name is the combination of source and target file
+        # Get file name without extension
+        # To construct the compare output file name
+        source_file_name_wo_ext = file_stem(self.source_file)
+        msg = 'Source file name without extension is'
+        logging.debug(f"{msg} {source_file_name_wo_ext}")
+        msg = 'Target file name without extension is'
+        target_file_name_wo_ext = file_stem(self.target_file)
+        logging.debug(f"{msg} {target_file_name_wo_ext}")
+
+        # Data match export file name and directory, in the output format;
+        # a sample or the key hashes of the match records by their name
+        extension = OUTPUT_FORMATS[self.output_format]
+        match_data_file_name = (source_file_name_wo_ext
+                                + MATCH_FILE_SUFFIXES[self.match_output]
+                                + extension)
+        logging.debug(f"Match data file name is {match_data_file_name}")
+        match_data_full_file_name = os.path.join(self.output_dir,
+                                                 match_data_file_name)
+        msg = 'Match data file name with directory path is'
+        logging.info(f"{msg} {match_data_full_file_name}")
+        # Data mismatch export file name and directory
+        mismatch_data_file_name = (source_file_name_wo_ext
+                                   + MISMATCH_FILE_SUFFIX + extension)
+        logging.debug(f"Mismatch data file name is {mismatch_data_file_name}")
+        mismatch_data_full_file_name = os.path.join(self.output_dir,
+                                                    mismatch_data_file_name)
+        msg = 'Mismatch data file name with directory path is'
+        logging.info(f"{msg} {mismatch_data_full_file_name}")
+
+        output_filename_creation_end_time = datetime.now()
+        output_filename_creation_process_time = (
+            output_filename_creation_end_time
+            -
+            output_filename_creation_begin_time)
+        logging.info(f"Output file names created in \
+{output_filename_creation_process_time.total_seconds()} seconds")
+
+        return (source_file_name_wo_ext, target_file_name_wo_ext,
+                match_data_full_file_name, mismatch_data_full_file_name)
+
+    def summary_stats_data(self, source_file_name_wo_ext,
+                           target_file_name_wo_ext, no_source_records,
+                           no_target_records, recon_performed_flag,
+                           match_records=None, mismatch_records=None,
+                           overall_match=None, match_data_full_file_name=None,
+                           mismatch_data_full_file_name=None, remarks='',
+                           category_counts=None, measure_diff_counts=None):
+        '''Set the summary stats row of the file comparison; the value
+difference records by measure is a dict, or its text from the Summary Stats;
+the match and mismatch locations are of the outputs written, else None'''
+        category_counts = category_counts or {}
+        if isinstance(measure_diff_counts, dict):
+            measure_diff_counts = '; '.join(
+                f"{measure_name}: {count}" for measure_name, count
+                in measure_diff_counts.items())
+        summary_stats_data = {'S.No': [self.sno],
+                              'Source Object Name': [source_file_name_wo_ext],
+                              'Target Object Name': [target_file_name_wo_ext],
+                              'Source Object Directory & Path': [self.source_file],
+                              'Target Object Directory & Path': [self.target_file],
+                              'Source Object Exists - Flag': 1,
+                              'Target Object Exists - Flag':1,
+                              'Source & Target Object is csv - Flag': 1,
+                              'Reconciliation Performed - Flag': recon_performed_flag,
+                              'Date & Time': [datetime.now()],
+                              'No. of records in Source File': [no_source_records],
+                              'No. of records in Target File': [no_target_records],
+                              'No. of Match records': [match_records],
+                              'No. of Mismatch records': [mismatch_records],
+                              **{col_name: [category_counts.get(category)]
+                                 for category, col_name
+                                 in RECON_CATEGORY_COL_NAMES.items()},
+                              MEASURE_COUNTS_COL_NAME: [measure_diff_counts],
+                              'Dataset Match - Flag': [overall_match],
+                              'Location of Match records': [match_data_full_file_name],
+                              'Location of Mismatch records': [mismatch_data_full_file_name],
+                              'Remarks': remarks
+                              }
+        return summary_stats_data
+
+    def export_summary_stats(self, summary_stats_data):
+        '''Export the summary stats row to the Summary Stats file,
+unless the summary is returned to the parent process'''
+        summary_stats_df = pd.DataFrame(data=summary_stats_data)
+        logging.debug("Summary Stats dataframe data is:\n%s", summary_stats_df)
+        if self.export_summary_flag == 1:
+            summary_stats_df.to_csv(self.summary_stats_fullfilename,
+                                    index=False, mode='a', header=None)
+            logging.info(F"Comparison summary stats of \
+{summary_stats_data['Source Object Name'][0]} and \
+{summary_stats_data['Target Object Name'][0]} is exported successfully")
+
+        # Summary Stats output processing time
+        summary_stats_set_n_export_process_time = self.metrics.end(
+            'summary', rows = len(summary_stats_df))
+        logging.info(f"Summary Stats created and expored in \
+{summary_stats_set_n_export_process_time.total_seconds()} seconds")
+
+        return summary_stats_df
+
+    def files_equal_check(self):
+        '''Check if the files are proven equal by the tiered equality check;
+return the files equal flag, the equality check name, the number of source
+and target records and the number of both null records, None if the files
+are not comparable'''
+        self.metrics.begin('fast path')
+        # Only the files with the measure columns (Value/Values) are comparable
+        header = FileEqualityCheck.header_record(self.source_file)
+        schema = self.recon_schema()
+        if schema.measure_names(header) is None:
+            return None
+        files_equal_check = FileEqualityCheck(
+            self.source_file, self.target_file).files_equal() + (None,)
+        # Equal files have the same keys and measures - a duplicate key of
+        # the source file is reported by the full comparison, and its records
+        # with all measures null are the both null records
+        if files_equal_check[0] == 1:
+            duplicate_key_found_flag, no_of_null_records = (
+                FileEqualityCheck.key_n_null_scan(
+                    self.source_file,
+                    [position for position, col_name in enumerate(header)
+                     if not schema.is_measure(col_name)
+                     and schema.usecols(col_name)],
+                    [position for position, col_name in enumerate(header)
+                     if schema.is_measure(col_name)]))
+            if duplicate_key_found_flag == 1:
+                logging.info('Equality check: the files have a duplicate \
+key, they are compared in full')
+                files_equal_check = (0, 'duplicate key', None, None, None)
+            else:
+                files_equal_check = files_equal_check[:4] + (no_of_null_records,)
+        no_source_records, no_target_records = files_equal_check[2:4]
+        equality_check_process_time = self.metrics.end(
+            'fast path', rows = (no_source_records + no_target_records
+                                 if no_source_records is not None else None),
+            bytes = self.input_bytes())
+        logging.info(f"Equality check processed in \
+{equality_check_process_time.total_seconds()} seconds")
+        return files_equal_check
+
+    def load_files(self):
+        '''Load the source and target file in a dataframe each, with the same
+data types; return the schema and both dataframes'''
+        schema = self.recon_schema(parse_cache = self.parse_cache)
+        return (schema, *schema.load())
+
+    def read_files(self):
+        '''Read the source and target file as the read stage; return the
+schema, both loaded files and the read time'''
+        self.metrics.begin('read')
+        schema, source_data, target_data = self.load_files()
+        read_process_time = self.metrics.end(
+            'read', rows = len(source_data) + len(target_data),
+            bytes = self.input_bytes())
+        return schema, source_data, target_data, read_process_time
+
+    def prefetch(self):
+        '''Read the file pair ahead of its comparison, e.g. on the reader
+thread of the pipeline - the equality check and, unless the files are proven
+equal, both files loaded; the files streamed by the comparison, e.g. larger
+than memory, are not loaded ahead'''
+        files_equal_check = (self.files_equal_check()
+                             if self.fast_path_flag == 1 else None)
+        loaded_files = None
+        if self.prefetch_load_flag == 1 and (files_equal_check is None
+                                             or files_equal_check[0] == 0):
+            loaded_files = self.read_files()
+        self.prefetched = (files_equal_check, loaded_files)
+
+    def loaded_files(self):
+        '''Get the schema, the loaded source and target file and the read
+time - read ahead, else read now; the files read ahead are released to the
+comparison'''
+        if self.prefetched is None or self.prefetched[1] is None:
+            return self.read_files()
+        loaded_files = self.prefetched[1]
+        self.prefetched = (self.prefetched[0], None)
+        return loaded_files
+
+    def equality_fast_path(self, source_file_name_wo_ext,
+                           target_file_name_wo_ext, match_data_full_file_name,
+                           mismatch_data_full_file_name):
+        '''Check if the files are proven equal before the full comparison,
+unless checked ahead; if so, export and return the summary stats, else
+return None'''
+        if self.fast_path_flag == 0:
+            return None
+        files_equal_check = (self.files_equal_check() if self.prefetched is None
+                             else self.prefetched[0])
+        if files_equal_check is None:
+            return None
+        (files_equal_flag, equality_check_name, no_source_records,
+         no_target_records, no_of_null_records) = files_equal_check
+        if files_equal_flag == 0:
+            return None
+
+        msg = f"Source and Target files are proven equal by {equality_check_name} check"
+        logging.info(msg)
+        print(msg)
+        remarks = f"Dataset match proven by {equality_check_name} check"
+        match_data_full_file_name = (
+            self.export_equal_match_records(match_data_full_file_name)
+            if self.fast_path_match_export_flag == 1
+            and self.match_output != 'none' else None)
+        if match_data_full_file_name is None:
+            remarks = remarks + ', match records not exported'
+        else:
+            logging.info(f"{no_source_records} records has been exported \
+to '{match_data_full_file_name}'")
+        self.metrics.begin('summary')
+        summary_stats_data = self.summary_stats_data(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            no_source_records, no_target_records,
+            recon_performed_flag = 1,
+            match_records = no_source_records,
+            mismatch_records = 0,
+            overall_match = 1,
+            match_data_full_file_name = match_data_full_file_name,
+            remarks = remarks,
+            category_counts = {'match': no_source_records - no_of_null_records,
+                               'both-null': no_of_null_records,
+                               'value-diff': 0, 'source-only': 0,
+                               'target-only': 0},
+            measure_diff_counts = dict.fromkeys(self.recon_schema().measure_names(
+                FileEqualityCheck.header_record(self.source_file)), 0))
+        return self.export_summary_stats(summary_stats_data)
+
+    def export_equal_match_records(self, match_data_full_file_name):
+        '''Export the match records of the files proven equal, in the same
+layout as the full comparison, from the source file only; return their
+location, None if not written'''
+        schema = self.recon_schema()
+        source_df = schema.read_csv(self.source_file, {})[0]
+        measure_names = schema.measure_names(source_df.columns)
+        combined_df = source_df.set_index(
+            [col_name for col_name in source_df.columns
+             if col_name not in measure_names])
+        value_col_pairs = self.value_col_pairs(measure_names)
+        combined_df = combined_df.rename(columns={
+            measure_name: source_col_name for measure_name, (source_col_name, _)
+            in zip(measure_names, value_col_pairs)})
+        for source_col_name, target_col_name in value_col_pairs:
+            combined_df[target_col_name] = combined_df[source_col_name]
+        combined_df = self.measure_match_columns(
+            combined_df, measure_names,
+            pd.DataFrame(True, index=combined_df.index, columns=measure_names))
+        combined_df['Match'] = True
+        with self.record_sink('match', match_data_full_file_name,
+                              combined_df.index.names) as match_sink:
+            match_sink.write(combined_df, 'match')
+        self.index_records(combined_df.index.names)
+        return match_sink.location()
+
+    @staticmethod
+    def value_col_pairs(measure_names):
+        '''Get the source and target value column names of the measures -
+Source_Value and Target_Value for one measure, else <measure>_Source and
+<measure>_Target for each measure'''
+        if len(measure_names) == 1:
+            return [('Source_Value', 'Target_Value')]
+        return [(f"{measure_name}_Source", f"{measure_name}_Target")
+                for measure_name in measure_names]
+
+    @classmethod
+    def classify_records(cls, combined_df, measure_names=('Value',)):
+        '''Classify each record of the combined dataframe in one vectorized
+pass over all the measures as match, both-null, value-diff, source-only or
+target-only; the record exists flag columns are dropped. A record matches,
+when each measure value matches or both are null. Return the Match flags
+(match and both-null records), the number of records of each category, the
+match flags of each measure (null for the records on one side only) and the
+category of each record'''
+        source_exists = combined_df.pop('_source_exists').notnull().to_numpy()
+        target_exists = combined_df.pop('_target_exists').notnull().to_numpy()
+        both_null_flags = []
+        measure_match_flags = []
+        for source_col_name, target_col_name in cls.value_col_pairs(
+                measure_names):
+            source_null = combined_df[source_col_name].isnull().to_numpy()
+            target_null = combined_df[target_col_name].isnull().to_numpy()
+            values_equal = (combined_df[source_col_name]
+                            == combined_df[target_col_name]).to_numpy(dtype=bool)
+            both_null_flags.append(source_null & target_null)
+            measure_match_flags.append(values_equal | (source_null & target_null))
+        both_null_flags = np.column_stack(both_null_flags)
+        measure_match_flags = np.column_stack(measure_match_flags)
+        # Category codes are the positions in RECON_CATEGORIES
+        category_codes = np.select(
+            [~target_exists, ~source_exists, both_null_flags.all(axis=1),
+             measure_match_flags.all(axis=1)],
+            [RECON_CATEGORIES.index('source-only'),
+             RECON_CATEGORIES.index('target-only'),
+             RECON_CATEGORIES.index('both-null'),
+             RECON_CATEGORIES.index('match')],
+            RECON_CATEGORIES.index('value-diff'))
+        counts = np.bincount(category_codes, minlength=len(RECON_CATEGORIES))
+        category_counts = {category: int(count) for category, count
+                           in zip(RECON_CATEGORIES, counts)}
+        match_flags = pd.Series(
+            category_codes <= RECON_CATEGORIES.index('both-null'),
+            index=combined_df.index)
+        one_side_flags = ~(source_exists & target_exists)
+        measure_match_df = pd.DataFrame(
+            {measure_name: pd.arrays.BooleanArray(
+                measure_match_flags[:, position], one_side_flags)
+             for position, measure_name in enumerate(measure_names)},
+            index=combined_df.index)
+        categories = pd.Series(
+            pd.Categorical.from_codes(category_codes, RECON_CATEGORIES),
+            index=combined_df.index)
+        return match_flags, category_counts, measure_match_df, categories
+
+    @staticmethod
+    def measure_diff_counts(measure_match_df):
+        '''Get the number of value difference records of each measure'''
+        return {measure_name: int((~measure_match_df[measure_name]).sum())
+                for measure_name in measure_match_df.columns}
+
+    @classmethod
+    def measure_match_columns(cls, combined_df, measure_names,
+                              measure_match_df):
+        '''Add the Match column of each measure next to its values and the
+number of mismatch measures of each record, when more than one measure
+is compared; the key columns, when not the index, stay the leading columns'''
+        if len(measure_names) == 1:
+            return combined_df
+        value_col_pairs = cls.value_col_pairs(measure_names)
+        col_names = [col_name for col_name in combined_df.columns
+                     if not any(col_name in value_col_names
+                                for value_col_names in value_col_pairs)]
+        for measure_name, value_col_names in zip(measure_names,
+                                                 value_col_pairs):
+            combined_df[f"{measure_name}_Match"] = measure_match_df[measure_name]
+            col_names += list(value_col_names) + [f"{measure_name}_Match"]
+        combined_df['Mismatch Measures'] = (
+            ~measure_match_df.fillna(False).astype(bool)).sum(axis=1)
+        return combined_df[col_names + ['Mismatch Measures']]
+
+    @staticmethod
+    def surrogate_key(key_df):
+        '''Hash the key columns of each record to one 64-bit surrogate key'''
+        return pd.util.hash_pandas_object(key_df, index=False).to_numpy()
+
+    @staticmethod
+    def duplicate_keys(key_df, key_hash):
+        '''Get the duplicate keys of a file and their number of records, in
+O(n) from the surrogate keys; the same surrogate key of different keys is
+a hash collision, not a duplicate'''
+        duplicate_flags = pd.Index(key_hash).duplicated(keep=False)
+        duplicate_key_df = key_df[duplicate_flags]
+        duplicate_key_df = duplicate_key_df[
+            duplicate_key_df.duplicated(keep=False)]
+        return duplicate_key_df.groupby(
+            list(key_df.columns), dropna=False, observed=True,
+            sort=False).size().reset_index(name='No. of records')
+
+    def export_duplicate_keys(self, source_file_name_wo_ext, duplicate_keys_df):
+        '''Export the duplicate keys of the source and target file to
+'<file> - duplicate keys.csv' and return the remarks of the file pair'''
+        duplicate_keys_full_file_name = os.path.join(
+            self.output_dir, source_file_name_wo_ext + ' - duplicate keys.csv')
+        duplicate_keys_df.to_csv(duplicate_keys_full_file_name, index=False)
+        return f"Error, source and/or target file has {len(duplicate_keys_df)} \
+duplicate keys, reported in '{duplicate_keys_full_file_name}'"
+
+    @staticmethod
+    def align_surrogate_keys(source_key_df, target_key_df, source_key_hash,
+                             target_key_hash):
+        '''Get the target position of each source record by its surrogate
+key, -1 for the source only records; None, if the surrogate keys collide'''
+        target_key_index = pd.Index(target_key_hash)
+        if (not target_key_index.is_unique
+                or not pd.Index(source_key_hash).is_unique):
+            return None
+        target_positions = target_key_index.get_indexer(source_key_hash)
+        # Keys of the matched candidates are checked for a hash collision
+        source_positions = np.flatnonzero(target_positions >= 0)
+        for col_name in source_key_df.columns:
+            source_values = source_key_df[col_name].to_numpy()[source_positions]
+            target_values = target_key_df[col_name].to_numpy()[
+                target_positions[source_positions]]
+            if not (pd.isnull(source_values) & pd.isnull(target_values)
+                    | (source_values == target_values)).all():
+                return None
+        return target_positions
+
+    @staticmethod
+    def hashed_join(source_df, target_df, key_col_names, target_positions):
+        '''Join the source and target records aligned by their surrogate keys,
+in the same order as the MultiIndex concat: the source records, then the
+target only records; the key columns are the leading columns'''
+        target_only_flags = np.ones(len(target_df), dtype=bool)
+        target_only_flags[target_positions[target_positions >= 0]] = False
+        target_only_positions = np.flatnonzero(target_only_flags)
+        no_of_records = len(source_df) + len(target_only_positions)
+        key_df = pd.concat(
+            [source_df[key_col_names],
+             target_df[key_col_names].iloc[target_only_positions]],
+            ignore_index=True)
+        source_value_df = source_df.drop(columns=key_col_names)
+        source_value_df.index = pd.RangeIndex(len(source_value_df))
+        source_value_df = source_value_df.reindex(pd.RangeIndex(no_of_records))
+        target_value_df = target_df.drop(columns=key_col_names)
+        target_value_df.index = pd.RangeIndex(len(target_value_df))
+        # Position -1 is not found, i.e. null values as the source only record
+        target_value_df = target_value_df.reindex(
+            np.concatenate([target_positions, target_only_positions]))
+        target_value_df.index = pd.RangeIndex(no_of_records)
+        return pd.concat([key_df, source_value_df, target_value_df], axis=1)
+
+    def csv_file_recon(self):
+        '''Compare two .csv files and export the reconciliation results'''
+
+        # Set the initial flag as files are comparable
+        files_comparable = 1
+
+        #*********************************************************************
+        #  File attributes
+        #*********************************************************************
+        (source_file_name_wo_ext, target_file_name_wo_ext,
+         match_data_full_file_name,
+         mismatch_data_full_file_name) = self.output_file_names()
+
+        # Skip the full comparison, if the files are proven equal
+        summary_stats_df = self.equality_fast_path(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            match_data_full_file_name, mismatch_data_full_file_name)
+        if summary_stats_df is not None:
+            return summary_stats_df
+
+        #*****************************************************************
+        #  Load the source and target file in a DataFrame and Compare
+        #*****************************************************************
+
+        #Read the source and target .csv files with the same data types,
+        # unless read ahead
+        peak_memory_before_read = peak_memory_mb()
+        schema, source_df, target_df, read_csv_process_time = (
+            self.loaded_files())
+        # Dataframes are rendered only when the debug level is enabled
+        logging.debug("Source file data read in dataframe:\n%s", source_df)
+        logging.debug("Target file data read in dataframe:\n%s", target_df)
+
+        msg = 'Source and Target csv files read in'
+        logging.info(f"{msg} {read_csv_process_time}")
+        logging.info(f"Peak memory in MB before the read is \
+{peak_memory_before_read} and after the read is {peak_memory_mb()}; source \
+dataframe is {round(source_df.memory_usage(deep=True).sum() / 1048576, 1)} MB \
+and target dataframe is \
+{round(target_df.memory_usage(deep=True).sum() / 1048576, 1)} MB")
+
+        # Record time counter begins
+        self.metrics.begin('count')
+
+        # Get the length of source and target file
+        no_source_records = len(source_df)
+        logging.info(f'Number of records in source file:{no_source_records}')
+        no_target_records = len(target_df)
+        logging.info(f'Number of records in target file:{no_target_records}')
+
+        # Record count file processing time
+        no_of_records_count_process_time = self.metrics.end('count')
+        logging.info(f"Number of records in source file and target file \
+processed in {no_of_records_count_process_time.total_seconds()} seconds")
+
+        # Set index time counter begins
+        self.metrics.begin('index')
+
+        # Source - Get all the index columns,
+        # except for the measure columns (Value/Values) as concat_col
+        # If the measure columns does not exist,
+        # then skip file recon and export summary stats with remarks
+        source_col_names = source_df.columns
+        source_measure_names = schema.measure_names(source_col_names)
+        source_measure_name_value_found_flag = (
+            0 if source_measure_names is None else 1)
+        source_concat_key = [col_name for col_name in source_col_names
+                             if not schema.is_measure(col_name)]
+
+        # Target - Get all the index columns,
+        # except for the measure columns (Value/Values) as concat_col
+        target_col_names = target_df.columns
+        target_measure_names = schema.measure_names(target_col_names)
+        target_measure_name_value_found_flag = (
+            0 if target_measure_names is None else 1)
+        target_concat_key = [col_name for col_name in target_col_names
+                             if not schema.is_measure(col_name)]
+
+        # Set the intial value of remarks as None
+        remarks = None
+        # Check, if the column names match and are in same order
+        # For the specific use case, column order should match too
+        col_match_flag = 1 if list(source_col_names) == list(target_col_names) else 0
+        if 0 in [col_match_flag]:
+            files_comparable = 0
+            remarks = 'Error, source and target file name column or their \
+order does not match'
+
+        # Check if source and target measure name is value(s)
+        elif 0 in [source_measure_name_value_found_flag,
+                 target_measure_name_value_found_flag]:
+            files_comparable = 0
+            remarks = schema.measure_error_remarks()
+
+        else:
+            if any(source_df[source_measure_name].dtypes
+                   != target_df[target_measure_name].dtypes
+                   for source_measure_name, target_measure_name
+                   in zip(source_measure_names, target_measure_names)):
+                files_comparable = 0
+                remarks = "Error, source & target measure data type \
+does not match"
+
+        # Hash the key columns of each record to a surrogate key, to report
+        # the duplicate keys in O(n) and to align the records on
+        if files_comparable == 1 and len(source_concat_key) > 0:
+            source_key_hash = self.surrogate_key(source_df[source_concat_key])
+            target_key_hash = self.surrogate_key(target_df[target_concat_key])
+            duplicate_keys_df = pd.concat(
+                [self.duplicate_keys(source_df[source_concat_key],
+                                     source_key_hash).assign(Side='Source'),
+                 self.duplicate_keys(target_df[target_concat_key],
+                                     target_key_hash).assign(Side='Target')],
+                ignore_index=True)
+            # Duplicate keys cannot be aligned, the file pair is not compared
+            if len(duplicate_keys_df) > 0:
+                files_comparable = 0
+                remarks = self.export_duplicate_keys(source_file_name_wo_ext,
+                                                     duplicate_keys_df)
+
+        if files_comparable == 0:
+            logging.info(remarks)
+            print(remarks)
+            self.metrics.begin('summary')
+            #*****************************************************************
+            #  Export the summary stats - for partial comparison done
+            #*****************************************************************
+            summary_stats_data = self.summary_stats_data(
+                source_file_name_wo_ext, target_file_name_wo_ext,
+                no_source_records, no_target_records,
+                recon_performed_flag = 0,
+                remarks = remarks)
+
+        else:
+            msg = 'Original Source file measure name is'
+            logging.info(f"{msg} {source_measure_names}")
+            msg = 'Original Target file measure name is'
+            logging.info(f"{msg} {target_measure_names}")
+            msg = 'Source and Target files are comparable'
+            print(msg)
+
+            # Align the records on the surrogate key, when the key columns
+            # have the same data types and no surrogate keys collide
+            target_positions = None
+            if (self.hashed_join_flag == 1 and len(source_concat_key) > 0
+                    and all(source_df[col_name].dtype == target_df[col_name].dtype
+                            for col_name in source_concat_key)):
+                target_positions = self.align_surrogate_keys(
+                    source_df[source_concat_key], target_df[target_concat_key],
+                    source_key_hash, target_key_hash)
+                if target_positions is None:
+                    logging.warning('Surrogate keys collide, the records are \
+aligned on the multi-index')
+
+            # Else, the records are aligned on the multi-index
+            if target_positions is None:
+                # Source - Set the concat_col as the multi-index
+                source_df = source_df.set_index(list(source_concat_key))
+                msg = 'Source dataframe with concat key set as index:'
+                logging.debug("%s\n%s", msg, source_df)
+
+                # Target - Set the concat_col as the multi-index
+                target_df = target_df.set_index(list(target_concat_key))
+                msg = 'Target dataframe with concat key set as index:'
+                logging.debug("%s\n%s", msg, target_df)
+
+            # Set index processing time
+            set_index_process_time = self.metrics.end(
+                'index', rows = no_source_records + no_target_records)
+            index_name = ('Multi-index' if target_positions is None
+                          else 'Surrogate key')
+            logging.info(f"{index_name} set for both source and target \
+dataframe in {set_index_process_time.total_seconds()} seconds")
+
+            # Check if source = target
+            self.metrics.begin('equality check')
+            overall_match = source_df.equals(target_df)
+            overall_match = 1 if overall_match==True else 0
+
+            if overall_match:
+                logging.info('Overall reconciliation result: Number of \
+records and Each data in the source file match with the target file')
+            else:
+                logging.info('Overall reconciliation result: Atleast some \
+source and target file data does not match')
+
+            overall_match_process_time = self.metrics.end(
+                'equality check', rows = no_source_records + no_target_records)
+            logging.info(f"Overall match result is processed in \
+{overall_match_process_time.total_seconds()} seconds")
+            print(f"Overall match result is {overall_match} - processed in \
+{overall_match_process_time.total_seconds()} seconds")
+
+            # Rename column time counter begins
+            self.metrics.begin('rename')
+
+            # Rename the value column as Source_Value and Target_Value, or
+            # <measure>_Source and <measure>_Target for more than one measure
+            value_col_pairs = self.value_col_pairs(source_measure_names)
+            source_df = source_df.rename(columns={
+                measure_name: source_col_name
+                for measure_name, (source_col_name, _)
+                in zip(source_measure_names, value_col_pairs)})
+            target_df = target_df.rename(columns={
+                measure_name: target_col_name
+                for measure_name, (_, target_col_name)
+                in zip(target_measure_names, value_col_pairs)})
+            # Record exists flags, to classify the source/target only records
+            source_df['_source_exists'] = True
+            target_df['_target_exists'] = True
+
+            # Rename column processing time
+            rename_column_process_time = self.metrics.end('rename')
+            logging.info(f"Measure columns renamed in \
+{rename_column_process_time.total_seconds()} seconds")
+
+            # Concat time counter begins
+            self.metrics.begin('concat')
+
+            # Combine the source and target file data with outer join
+            #combined_df = pd.merge(source_df,target_df, left_index=True,
+            #right_index=True, how='outer')
+            if target_positions is None:
+                combined_df = pd.concat([source_df,target_df], axis=1)
+            else:
+                combined_df = self.hashed_join(source_df, target_df,
+                                               source_concat_key,
+                                               target_positions)
+            msg='Source and target comnbined dataframe:'
+            logging.debug("%s\n%s", msg, combined_df)
+            concat_records = len(combined_df)
+            msg = 'Number of records in the merged file is'
+            logging.info(f"{msg} {concat_records}")
+
+            # Concat processing time
+            concat_process_time = self.metrics.end('concat',
+                                                   rows = concat_records)
+            logging.info(f"Source and Target Concatenated in \
+{concat_process_time.total_seconds()} seconds")
+
+            # Classification time counter begins
+            self.metrics.begin('match')
+
+            # Classify each record in a single pass over all the measures
+            # and create the Match column: match and both null records are
+            # the match records
+            match_flags, category_counts, measure_match_df, categories = (
+                self.classify_records(combined_df, source_measure_names))
+            combined_df = self.measure_match_columns(
+                combined_df, source_measure_names, measure_match_df)
+            combined_df['Match'] = match_flags
+            measure_diff_counts = self.measure_diff_counts(measure_match_df)
+            match_records = (category_counts['match']
+                             + category_counts['both-null'])
+            mismatch_records = concat_records - match_records
+            logging.debug("Combined dataframe with Match column:\n%s",
+                          combined_df)
+
+            # Classification processing time
+            classification_process_time = self.metrics.end(
+                'match', rows = concat_records)
+            logging.info(f"Records classified as {category_counts}, value \
+difference records by measure {measure_diff_counts} in \
+{classification_process_time.total_seconds()} seconds")
+            print(f"Count of mismatch records is {mismatch_records} and \
+match records is {match_records}, processed in \
+{classification_process_time.total_seconds()} seconds")
+
+            #*****************************************************************************
+            #  Export the match and mismatch data to respective files
+            #*****************************************************************************
+            # Export the data, only when match/mismatch data is available
+            logging.info("Match/Misatch file is created, \
+only when the corresponding dataset exist")
+
+            # Match data export time counter begins
+            self.metrics.begin('export')
+
+            # Export match records; the sink filters the match records, a
+            # sample or their key hashes only, or none
+            with self.record_sink('match', match_data_full_file_name,
+                                  source_concat_key) as match_sink:
+                match_sink.write(combined_df, categories, match_flags,
+                                 index_flag = target_positions is None)
+            match_data_full_file_name = match_sink.location()
+            if match_data_full_file_name is not None:
+                logging.info(f"{match_records} records has been exported \
+to '{match_data_full_file_name}'")
+            else:
+                logging.info('Source and target file match records are not \
+exported')
+
+            # Match data export processing time
+            match_data_export_process_time = self.metrics.end(
+                'export', rows = match_records, bytes = match_sink.bytes())
+            logging.info(f"Match data filtered and .csv file exported in \
+{match_data_export_process_time.total_seconds()} seconds")
+            print(f"Match data filtered and .csv file exported in \
+{match_data_export_process_time.total_seconds()} seconds")
+
+            # Mismatch data & its export time counter begins
+            self.metrics.begin('export')
+
+            # Export mismatch records
+            with self.record_sink('mismatch', mismatch_data_full_file_name,
+                                  source_concat_key) as mismatch_sink:
+                if mismatch_records > 0:
+                    mismatch_sink.write(combined_df, categories, ~match_flags,
+                                        index_flag = target_positions is None)
+            mismatch_data_full_file_name = mismatch_sink.location()
+            if mismatch_data_full_file_name is not None:
+                logging.info(f"{mismatch_records} records has been exported \
+to '{mismatch_data_full_file_name}'")
+            else:
+                logging.info('Source and target file has no mismatch records')
+            # Mismtach data & its export processing time
+            mismatch_data_export_process_time = self.metrics.end(
+                'export', rows = mismatch_records, bytes = mismatch_sink.bytes())
+            self.index_records(source_concat_key)
+            logging.info(f"Mismatch data filtered and .csv file exported in \
+{mismatch_data_export_process_time.total_seconds()} seconds")
+            print(f"Mismatch data filtered and .csv file exported in \
+{mismatch_data_export_process_time.total_seconds()} seconds")
+
+            # Total checks time counter begins
+            self.metrics.begin('totals check')
+
+            # Totals Check reconciliation
+            if concat_records == sum(category_counts.values()):
+                logging.info(f"Sum check has passed: Merge file data records \
+{concat_records} in memory = sum of the classified records {category_counts}")
+            else:
+                logging.info(f"Sum check has failed: Merge file data records \
+{concat_records} in memory != sum of the classified records {category_counts}")
+
+            # Total checks processing time
+            totals_check_recon_process_time = self.metrics.end(
+                'totals check', rows = concat_records)
+            logging.info(f"Total sum check processed in \
+{totals_check_recon_process_time.total_seconds()} seconds")
+
+            #*****************************************************************************
+            #  Export the summary stats - for full comparison done
+            #*****************************************************************************
+            self.metrics.begin('summary')
+            summary_stats_data = self.summary_stats_data(
+                source_file_name_wo_ext, target_file_name_wo_ext,
+                no_source_records, no_target_records,
+                recon_performed_flag = 1,
+                match_records = match_records,
+                mismatch_records = mismatch_records,
+                overall_match = overall_match,
+                match_data_full_file_name = match_data_full_file_name,
+                mismatch_data_full_file_name = mismatch_data_full_file_name,
+                category_counts = category_counts,
+                measure_diff_counts = measure_diff_counts)
+        return self.export_summary_stats(summary_stats_data)
+
+class OutOfCoreCompareFiles(CompareFiles):
+    '''Compare the files larger than memory - stream both files in chunks,
+spill the rows to on-disk buckets by a hash of the key columns, and then
+reconcile one bucket pair at a time'''
+
+    # Files are streamed in chunks, not loaded ahead
+    prefetch_load_flag = 0
+
+    def __init__(self, *args, chunk_rows=1000000, bucket_mb=256,
+                 spill_dir=None, **kwargs):
+        '''Initialize the CompareFiles attributes, the number of rows read
+per chunk, the bucket size in MB and the spill directory (default: output
+directory)'''
+        super().__init__(*args, **kwargs)
+        self.chunk_rows = chunk_rows
+        self.bucket_mb = bucket_mb
+        self.spill_dir = spill_dir if spill_dir else self.output_dir
+
+    @staticmethod
+    def chunk_dtype(series):
+        '''Get the data type of a chunk column, as the whole file read would
+infer it; None when the chunk column has only null values'''
+        null_flags = series.isnull()
+        if null_flags.all():
+            return None
+        if (series.dtype == object
+                and series[~null_flags].map(type).eq(bool).all()):
+            return np.dtype(bool)
+        return series.dtype
+
+    @staticmethod
+    def promote_dtype(dtype_a, dtype_b):
+        '''Get the common data type of two chunk column data types'''
+        if dtype_a is None or dtype_a == dtype_b:
+            return dtype_b
+        if dtype_b is None:
+            return dtype_a
+        if (pd.api.types.is_numeric_dtype(dtype_a)
+                and pd.api.types.is_numeric_dtype(dtype_b)
+                and not pd.api.types.is_bool_dtype(dtype_a)
+                and not pd.api.types.is_bool_dtype(dtype_b)):
+            return np.result_type(dtype_a, dtype_b)
+        return np.dtype(object)
+
+    @staticmethod
+    def final_dtype(dtype, null_found_flag):
+        '''Get the whole file data type of a column from its chunk data type
+and if the column has at least one null value'''
+        if dtype is None:
+            return np.dtype('float64')
+        if null_found_flag == 1:
+            # As pandas does, when the null values are added to a column
+            return pd.Series([], dtype=dtype).reindex([0]).dtype
+        return dtype
+
+    @staticmethod
+    def key_hash(key_df):
+        '''Hash the key columns of a chunk, so the same key is hashed the same
+in the source and target, even if its data type differs (e.g. 1 vs 1.0)'''
+        key_df = key_df.copy()
+        for col_name in key_df.columns:
+            if pd.api.types.is_numeric_dtype(key_df[col_name]):
+                key_df[col_name] = key_df[col_name].astype('float64')
+            else:
+                key_df[col_name] = key_df[col_name].astype(str)
+        return pd.util.hash_pandas_object(key_df, index=False).to_numpy()
+
+    @staticmethod
+    def spill(spill_file_name, df):
+        '''Append a dataframe piece to a spill file'''
+        with open(spill_file_name, 'ab') as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load_spill(spill_file_name):
+        '''Load all dataframe pieces of a spill file, None if not found'''
+        if not os.path.isfile(spill_file_name):
+            return None
+        pieces = []
+        with open(spill_file_name, 'rb') as f:
+            while True:
+                try:
+                    pieces.append(pickle.load(f))
+                except EOFError:
+                    break
+        return pd.concat(pieces)
+
+    def export_equal_match_records(self, match_data_full_file_name):
+        '''Export the match records of the files proven equal, streamed in
+chunks from the source file; the data is exported as in the source file.
+Return their location, None if not written'''
+        schema = self.recon_schema()
+        key_col_names = None
+        with self.record_sink('match', match_data_full_file_name) as match_sink:
+            for chunk in pd.read_csv(self.source_file,
+                                     chunksize=self.chunk_rows, dtype=str,
+                                     keep_default_na=False,
+                                     usecols=schema.usecols):
+                measure_names = schema.measure_names(chunk.columns)
+                value_col_pairs = self.value_col_pairs(measure_names)
+                chunk = chunk.set_index([col_name for col_name in chunk.columns
+                                         if col_name not in measure_names])
+                chunk = chunk.rename(columns={
+                    measure_name: source_col_name
+                    for measure_name, (source_col_name, _)
+                    in zip(measure_names, value_col_pairs)})
+                for source_col_name, target_col_name in value_col_pairs:
+                    chunk[target_col_name] = chunk[source_col_name]
+                chunk = self.measure_match_columns(
+                    chunk, measure_names,
+                    pd.DataFrame(True, index=chunk.index, columns=measure_names))
+                chunk['Match'] = True
+                match_sink.write(chunk, 'match')
+                key_col_names = chunk.index.names
+        if key_col_names is not None:
+            self.index_records(key_col_names)
+        return match_sink.location()
+
+    @staticmethod
+    def schema_dtype(dtype):
+        '''Get the data type of a column read with a schema data type; the
+text key columns of a shared categorical dictionary are compared as text in
+the buckets'''
+        if dtype == 'category':
+            return np.dtype(object)
+        return pd.api.types.pandas_dtype(dtype)
+
+    @staticmethod
+    def remove_spill(bucket_dir, side):
+        '''Remove the spill files of the source or target buckets, e.g. to
+spill the file again with the widened data types'''
+        for spill_file_name in os.listdir(bucket_dir):
+            if spill_file_name.startswith(f"{side}_"):
+                os.remove(os.path.join(bucket_dir, spill_file_name))
+
+    def spill_to_buckets(self, file_name, side, bucket_dir, no_of_buckets,
+                         key_col_names, dtypes):
+        '''Stream the file in chunks with the schema data types of the file
+pair, as the in-memory comparison loads it, and spill each row to its key
+hash bucket, with the row number as order column; return the column names,
+the whole file data types and the number of records. The columns without a
+schema data type are inferred by pandas, as the whole file read would;
+raise ValueError or TypeError, if a schema data type does not fit the
+data, to widen it'''
+        col_names = None
+        chunk_dtypes = {}
+        null_found_flags = {}
+        no_of_records = 0
+        # Header only file has no chunk, its data types are the empty read
+        header_df = pd.read_csv(file_name, nrows=0, usecols=self.usecols,
+                                dtype=dtypes)
+        if len(header_df.columns) and list(header_df.columns) == key_col_names:
+            chunk_dtypes = dict(header_df.dtypes)
+        for chunk in pd.read_csv(file_name, chunksize=self.chunk_rows,
+                                 usecols=self.usecols, dtype=dtypes):
+            if col_names is None:
+                col_names = chunk.columns
+                # Columns does not match, the file pair cannot be compared
+                if key_col_names is None or list(col_names) != key_col_names:
+                    return col_names, None, None
+                for col_name in col_names:
+                    chunk_dtypes[col_name] = None
+                    null_found_flags[col_name] = 0
+            for col_name in col_names:
+                if col_name not in dtypes:
+                    chunk_dtypes[col_name] = self.promote_dtype(
+                        chunk_dtypes[col_name],
+                        self.chunk_dtype(chunk[col_name]))
+                if chunk[col_name].isnull().any():
+                    null_found_flags[col_name] = 1
+            chunk['_recon_order'] = np.arange(no_of_records,
+                                              no_of_records + len(chunk))
+            no_of_records += len(chunk)
+            bucket_ids = self.key_hash(
+                chunk[self.bucket_key_names(col_names)]) % no_of_buckets
+            for bucket_id, bucket_df in chunk.groupby(bucket_ids):
+                self.spill(os.path.join(bucket_dir,
+                                        f"{side}_{bucket_id}.pkl"),
+                           bucket_df)
+        if col_names is None:
+            if key_col_names is None:
+                return header_df.columns, None, None
+            return header_df.columns, {
+                col_name: (self.schema_dtype(dtypes[col_name])
+                           if col_name in dtypes else dtype)
+                for col_name, dtype in chunk_dtypes.items()}, 0
+        col_dtypes = {col_name: (self.schema_dtype(dtypes[col_name])
+                                 if col_name in dtypes
+                                 else self.final_dtype(
+                                     chunk_dtypes[col_name],
+                                     null_found_flags[col_name]))
+                      for col_name in col_names}
+        return col_names, col_dtypes, no_of_records
+
+    def spill_files(self, bucket_dir, no_of_buckets, key_col_names):
+        '''Spill the source and target file to the buckets with the schema
+data types of the file pair; a data type that does not fit the data beyond
+the sample is widened and the file spilled again, the source file also
+when the target file widens it, as the in-memory comparison re-reads it.
+Return the column names, data types and number of records of each file'''
+        dtypes = self.schema.infer_dtypes()
+        logging.info(f"Inferred data types of the file pair: {dtypes}")
+        spilled = {}
+        for side, file_name in [('source', self.source_file),
+                                ('target', self.target_file),
+                                ('source', self.source_file)]:
+            if side in spilled and spilled[side][0] == dtypes:
+                continue
+            while True:
+                self.remove_spill(bucket_dir, side)
+                try:
+                    spilled[side] = (dtypes, self.spill_to_buckets(
+                        file_name, side, bucket_dir, no_of_buckets,
+                        key_col_names, dtypes))
+                    break
+                except (ValueError, TypeError) as err:
+                    dtypes = self.schema.widen_dtypes(dtypes, err, file_name)
+        return spilled['source'][1], spilled['target'][1]
+
+    @classmethod
+    def bucket_duplicate_keys(cls, source_df, target_df, key_col_names):
+        '''Get the duplicate keys of a bucket pair, as the in-memory comparison
+reports them, with the row number of their first record; a key is spilled to
+one bucket only, so the duplicate keys of the files are those of all bucket
+pairs'''
+        duplicate_keys_dfs = []
+        for side, df in [('Source', source_df), ('Target', target_df)]:
+            if len(df) < 2:
+                continue
+            key_df = df[key_col_names]
+            duplicate_keys_df = cls.duplicate_keys(
+                key_df, cls.surrogate_key(key_df)).assign(Side=side)
+            duplicate_keys_dfs.append(duplicate_keys_df.merge(
+                df[key_col_names + ['_recon_order']].drop_duplicates(
+                    key_col_names),
+                on=key_col_names, how='left'))
+        if not duplicate_keys_dfs:
+            return None
+        duplicate_keys_df = pd.concat(duplicate_keys_dfs, ignore_index=True)
+        return duplicate_keys_df if len(duplicate_keys_df) > 0 else None
+
+    @classmethod
+    def reconcile_bucket(cls, bucket_id, range_suffix, bucket_dir,
+                         source_dtypes, target_dtypes, key_dtypes,
+                         key_col_names, measure_names, no_source_records,
+                         range_size, match_output):
+        '''Reconcile a bucket pair over all the measures and spill its output
+rows to the row number range files, with the range file suffix; return the
+number of records of each category, the value difference records by measure,
+the source only and target only flags, the number of match records at the
+same row number and the duplicate keys; None, if the bucket pair is empty. A
+bucket pair with duplicate keys is not reconciled'''
+        source_df = cls.load_spill(
+            os.path.join(bucket_dir, f"source_{bucket_id}.pkl"))
+        target_df = cls.load_spill(
+            os.path.join(bucket_dir, f"target_{bucket_id}.pkl"))
+        if source_df is None and target_df is None:
+            return None
+        if source_df is None:
+            source_df = pd.DataFrame(columns=target_df.columns)
+        if target_df is None:
+            target_df = pd.DataFrame(columns=source_df.columns)
+        source_df = source_df.astype(
+            {**source_dtypes, **key_dtypes, '_recon_order': 'float64'})
+        target_df = target_df.astype(
+            {**target_dtypes, **key_dtypes, '_recon_order': 'float64'})
+
+        # Duplicate keys cannot be aligned, the file pair is not compared
+        duplicate_keys_df = cls.bucket_duplicate_keys(source_df, target_df,
+                                                      key_col_names)
+        if duplicate_keys_df is not None:
+            return None, None, 0, 0, 0, duplicate_keys_df
+
+        value_col_pairs = cls.value_col_pairs(measure_names)
+        source_df = source_df.set_index(key_col_names).rename(
+            columns={**{measure_name: source_col_name
+                        for measure_name, (source_col_name, _)
+                        in zip(measure_names, value_col_pairs)},
+                     '_recon_order': '_source_order'})
+        target_df = target_df.set_index(key_col_names).rename(
+            columns={**{measure_name: target_col_name
+                        for measure_name, (_, target_col_name)
+                        in zip(measure_names, value_col_pairs)},
+                     '_recon_order': '_target_order'})
+        combined_df = pd.concat([source_df, target_df], axis=1)
+        # Row numbers are null for the records missing on one side
+        combined_df['_source_exists'] = combined_df['_source_order']
+        combined_df['_target_exists'] = combined_df['_target_order']
+        (match_flags, bucket_category_counts, measure_match_df,
+         categories) = cls.classify_records(combined_df, measure_names)
+        combined_df = cls.measure_match_columns(combined_df, measure_names,
+                                                measure_match_df)
+        combined_df['Match'] = match_flags
+        combined_df['_category'] = categories
+        bucket_measure_diff_counts = cls.measure_diff_counts(measure_match_df)
+
+        source_only_flag = 1 if combined_df['_target_order'].isnull().any() else 0
+        target_only_flag = 1 if combined_df['_source_order'].isnull().any() else 0
+        same_position_match_records = int((
+            combined_df['Match']
+            & (combined_df['_source_order']
+               == combined_df['_target_order'])).sum())
+        # In-memory order: source rows, then target only rows
+        combined_df['_recon_order'] = combined_df[
+            '_source_order'].fillna(
+                no_source_records + combined_df['_target_order'])
+        combined_df = combined_df.drop(
+            columns=['_source_order', '_target_order'])
+
+        bucket_match_records = (bucket_category_counts['match']
+                                + bucket_category_counts['both-null'])
+        # Match records are not spilled, if they are not exported
+        if match_output == 'none':
+            combined_df = combined_df[~combined_df['Match']]
+        range_ids = (combined_df['_recon_order'] // range_size).astype(int)
+        for (match_flag, range_id), range_df in combined_df.groupby(
+                [combined_df['Match'], range_ids]):
+            output_type = 'match' if match_flag else 'mismatch'
+            # Key levels of the other ranges are not spilled
+            if isinstance(range_df.index, pd.MultiIndex):
+                range_df.index = range_df.index.remove_unused_levels()
+            cls.spill(os.path.join(
+                bucket_dir, f"{output_type}_range_{range_id}{range_suffix}.pkl"),
+                range_df)
+        logging.debug(f"Bucket {bucket_id} reconciled with \
+{bucket_match_records} match records")
+        return (bucket_category_counts, bucket_measure_diff_counts,
+                source_only_flag, target_only_flag,
+                same_position_match_records, None)
+
+    def reconcile_buckets(self, no_of_buckets, *args):
+        '''Reconcile the bucket pairs one at a time, appended to the same
+range files; yield the counts of each bucket pair'''
+        for bucket_id in range(no_of_buckets):
+            yield self.reconcile_bucket(bucket_id, '', *args)
+
+    def load_range(self, bucket_dir, output_type, range_id, no_of_buckets):
+        '''Load the output rows of a row number range, None if none'''
+        return self.load_spill(os.path.join(
+            bucket_dir, f"{output_type}_range_{range_id}.pkl"))
+
+    def no_of_buckets(self, file_size):
+        '''Get the number of buckets, so a bucket pair fits in the bucket
+size'''
+        return max(1, int(-(-file_size // (self.bucket_mb * 1024 * 1024))))
+
+    def bucket_key_names(self, col_names):
+        '''Get the column names hashed to the bucket of a row - the key
+columns'''
+        return [col_name for col_name in col_names
+                if not self.schema.is_measure(col_name)]
+
+    def csv_file_recon(self):
+        '''Compare two .csv files out-of-core and export the same
+reconciliation results as the in-memory comparison'''
+
+        self.schema = self.recon_schema()
+        (source_file_name_wo_ext, target_file_name_wo_ext,
+         match_data_full_file_name,
+         mismatch_data_full_file_name) = self.output_file_names()
+
+        # Skip the full comparison, if the files are proven equal
+        summary_stats_df = self.equality_fast_path(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            match_data_full_file_name, mismatch_data_full_file_name)
+        if summary_stats_df is not None:
+            return summary_stats_df
+
+        # Excluded columns are never parsed
+        self.usecols = self.schema.usecols
+
+        # Uncompressed size of a compressed file is estimated
+        file_size = data_size(self.source_file) + data_size(self.target_file)
+        no_of_buckets = self.no_of_buckets(file_size)
+        logging.info(f"Out-of-core recon of {source_file_name_wo_ext} with \
+{no_of_buckets} buckets of {self.bucket_mb} MB")
+
+        with tempfile.TemporaryDirectory(prefix='recon_spill_',
+                                         dir=self.spill_dir) as bucket_dir:
+            #*****************************************************************
+            #  Spill the source and target file rows to the key hash buckets
+            #*****************************************************************
+            self.metrics.begin('read')
+            # Header record is read first to validate the columns
+            source_col_names = list(pd.read_csv(self.source_file, nrows=0,
+                                                usecols=self.usecols).columns)
+            target_col_names = list(pd.read_csv(self.target_file, nrows=0,
+                                                usecols=self.usecols).columns)
+            key_col_names = (source_col_names
+                             if source_col_names == target_col_names else None)
+            ((source_col_names, source_dtypes, no_source_records),
+             (target_col_names, target_dtypes, no_target_records)) = (
+                self.spill_files(bucket_dir, no_of_buckets, key_col_names))
+            spill_process_time = self.metrics.end(
+                'read', rows = (no_source_records or 0) + (no_target_records or 0),
+                bytes = self.input_bytes())
+            logging.info(f"Source and Target csv files spilled to buckets in \
+{spill_process_time.total_seconds()} seconds")
+
+            # Same validations and remarks as the in-memory comparison
+            source_measure_names = self.schema.measure_names(source_col_names)
+            target_measure_names = self.schema.measure_names(target_col_names)
+            remarks = None
+            if key_col_names is None:
+                remarks = 'Error, source and target file name column or their \
+order does not match'
+            elif None in [source_measure_names, target_measure_names]:
+                remarks = self.schema.measure_error_remarks()
+            elif any(source_dtypes[source_measure_name]
+                     != target_dtypes[target_measure_name]
+                     for source_measure_name, target_measure_name
+                     in zip(source_measure_names, target_measure_names)):
+                remarks = "Error, source & target measure data type \
+does not match"
+
+            if remarks is not None:
+                logging.info(remarks)
+                print(remarks)
+                if no_source_records is None:
+                    # Row count, when the columns does not match
+                    no_source_records = sum(
+                        len(chunk) for chunk in pd.read_csv(
+                            self.source_file, chunksize=self.chunk_rows,
+                            usecols=self.usecols))
+                    no_target_records = sum(
+                        len(chunk) for chunk in pd.read_csv(
+                            self.target_file, chunksize=self.chunk_rows,
+                            usecols=self.usecols))
+                self.metrics.begin('summary')
+                summary_stats_data = self.summary_stats_data(
+                    source_file_name_wo_ext, target_file_name_wo_ext,
+                    no_source_records, no_target_records,
+                    recon_performed_flag = 0,
+                    remarks = remarks)
+                return self.export_summary_stats(summary_stats_data)
+
+            msg = 'Source and Target files are comparable'
+            print(msg)
+            measure_names = source_measure_names
+            key_col_names = [col_name for col_name in source_col_names
+                             if col_name not in measure_names]
+            # Key data types, common for the source and target key columns
+            key_dtypes = {col_name: self.promote_dtype(
+                source_dtypes[col_name], target_dtypes[col_name])
+                for col_name in key_col_names}
+            # Overall match needs the same data types, as DataFrame.equals
+            same_dtypes_flag = 1 if all(
+                source_dtypes[col_name] == target_dtypes[col_name]
+                for col_name in key_col_names) else 0
+
+            #*****************************************************************
+            #  Reconcile one bucket pair at a time
+            #*****************************************************************
+            self.metrics.begin('match')
+            category_counts = dict.fromkeys(RECON_CATEGORIES, 0)
+            measure_diff_counts = dict.fromkeys(measure_names, 0)
+            same_position_match_records = 0
+            source_only_flag = 0
+            target_only_flag = 0
+            duplicate_keys_dfs = []
+            # Output rows are spilled to row number ranges, to export them
+            # in the same order as the in-memory comparison
+            no_of_output_records = no_source_records + no_target_records
+            range_size = max(1, -(-no_of_output_records // no_of_buckets))
+            for bucket_counts in self.reconcile_buckets(
+                    no_of_buckets, bucket_dir, source_dtypes, target_dtypes,
+                    key_dtypes, key_col_names, measure_names,
+                    no_source_records, range_size, self.match_output):
+                if bucket_counts is None:
+                    continue
+                (bucket_category_counts, bucket_measure_diff_counts,
+                 bucket_source_only_flag, bucket_target_only_flag,
+                 bucket_same_position_match_records,
+                 bucket_duplicate_keys_df) = bucket_counts
+                if bucket_duplicate_keys_df is not None:
+                    duplicate_keys_dfs.append(bucket_duplicate_keys_df)
+                    continue
+                for category, count in bucket_category_counts.items():
+                    category_counts[category] += count
+                for measure_name, count in bucket_measure_diff_counts.items():
+                    measure_diff_counts[measure_name] += count
+                source_only_flag = max(source_only_flag, bucket_source_only_flag)
+                target_only_flag = max(target_only_flag, bucket_target_only_flag)
+                same_position_match_records += bucket_same_position_match_records
+
+            # Duplicate keys in the order of the in-memory comparison - source
+            # then target, by the row number of the first record of the key
+            if duplicate_keys_dfs:
+                self.metrics.end('match')
+                duplicate_keys_df = pd.concat(
+                    duplicate_keys_dfs, ignore_index=True).sort_values(
+                        ['Side', '_recon_order'], kind='stable').drop(
+                            columns=['_recon_order'])
+                remarks = self.export_duplicate_keys(source_file_name_wo_ext,
+                                                     duplicate_keys_df)
+                logging.info(remarks)
+                print(remarks)
+                self.metrics.begin('summary')
+                summary_stats_data = self.summary_stats_data(
+                    source_file_name_wo_ext, target_file_name_wo_ext,
+                    no_source_records, no_target_records,
+                    recon_performed_flag = 0,
+                    remarks = remarks)
+                return self.export_summary_stats(summary_stats_data)
+
+            match_records = (category_counts['match']
+                             + category_counts['both-null'])
+            mismatch_records = sum(category_counts.values()) - match_records
+            overall_match = 1 if (
+                same_dtypes_flag == 1
+                and no_source_records == no_target_records
+                and same_position_match_records == no_source_records) else 0
+            recon_process_time = self.metrics.end(
+                'match', rows = sum(category_counts.values()))
+            logging.info(f"Bucket pairs reconciled in \
+{recon_process_time.total_seconds()} seconds")
+            print(f"Count of mismatch records is {mismatch_records} and \
+match records is {match_records}, overall match result is {overall_match}")
+
+            #*****************************************************************
+            #  Export the match and mismatch data in row number order
+            #*****************************************************************
+            self.metrics.begin('export')
+            # Measure data types of the in-memory combined dataframe
+            value_dtypes = {}
+            for measure_name, (source_col_name, target_col_name) in zip(
+                    measure_names, self.value_col_pairs(measure_names)):
+                value_dtypes[source_col_name] = self.final_dtype(
+                    source_dtypes[measure_name], target_only_flag)
+                value_dtypes[target_col_name] = self.final_dtype(
+                    target_dtypes[measure_name], source_only_flag)
+            output_locations = {}
+            for output_type, no_of_records, full_file_name in [
+                    ('match', match_records, match_data_full_file_name),
+                    ('mismatch', mismatch_records,
+                     mismatch_data_full_file_name)]:
+                with self.record_sink(output_type, full_file_name,
+                                      key_col_names) as record_sink:
+                    for range_id in range(no_of_buckets if no_of_records else 0):
+                        range_df = self.load_range(bucket_dir, output_type,
+                                                   range_id, no_of_buckets)
+                        if range_df is None:
+                            continue
+                        range_df = range_df.sort_values(
+                            '_recon_order').drop(columns=['_recon_order'])
+                        categories = range_df.pop('_category')
+                        range_df = range_df.astype(value_dtypes)
+                        record_sink.write(range_df, categories)
+                output_locations[output_type] = record_sink.location()
+                if output_locations[output_type] is None:
+                    logging.info(f"Source and target file {output_type} \
+records are not exported")
+                else:
+                    logging.info(f"{no_of_records} records has been exported \
+to '{output_locations[output_type]}'")
+            match_data_full_file_name = output_locations['match']
+            mismatch_data_full_file_name = output_locations['mismatch']
+            self.index_records(key_col_names)
+            export_process_time = self.metrics.end(
+                'export', rows = match_records + mismatch_records)
+            logging.info(f"Match and mismatch data exported in \
+{export_process_time.total_seconds()} seconds")
+
+        self.metrics.begin('summary')
+        summary_stats_data = self.summary_stats_data(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            no_source_records, no_target_records,
+            recon_performed_flag = 1,
+            match_records = match_records,
+            mismatch_records = mismatch_records,
+            overall_match = overall_match,
+            match_data_full_file_name = match_data_full_file_name,
+            mismatch_data_full_file_name = mismatch_data_full_file_name,
+            category_counts = category_counts,
+            measure_diff_counts = measure_diff_counts)
+        return self.export_summary_stats(summary_stats_data)
+
+class PartitionedCompareFiles(OutOfCoreCompareFiles):
+    '''Compare a large file pair in partitions on several cores - spill
+both files to the partitions by a hash of the key columns, or of a
+partition column (e.g. a date or an entity key column), reconcile the
+partition pairs in a pool of worker processes, and merge their counts and
+output rows into the same outputs and Summary Stats row as the in-memory
+comparison'''
+
+    def __init__(self, *args, partition_workers=None, partition_col=None,
+                 **kwargs):
+        '''Initialize the OutOfCoreCompareFiles attributes, the number of
+worker processes of the partitions (default: the number of CPUs, also the
+least number of partitions) and the partition column name (default: the
+key columns)'''
+        super().__init__(*args, **kwargs)
+        self.partition_workers = partition_workers or os.cpu_count() or 1
+        self.partition_col = partition_col
+
+    def bucket_key_names(self, col_names):
+        '''Get the column names hashed to the partition of a row - the
+partition column, if it is a key column, else the key columns'''
+        key_col_names = super().bucket_key_names(col_names)
+        if self.partition_col is None:
+            return key_col_names
+        if self.partition_col in key_col_names:
+            return [self.partition_col]
+        logging.warning(f"Partition column {self.partition_col} is not a key \
+column of {self.source_file}, it is partitioned by the key columns")
+        self.partition_col = None
+        return key_col_names
+
+    def no_of_buckets(self, file_size):
+        '''Get the number of partitions - at least one per worker process,
+more if a partition pair would not fit in the bucket size'''
+        return max(self.partition_workers, super().no_of_buckets(file_size))
+
+    def reconcile_buckets(self, no_of_buckets, *args):
+        '''Reconcile the partition pairs in the worker processes, each to its
+own range files; yield the counts of each partition pair, in partition
+order'''
+        logging.info(f"{no_of_buckets} partitions of {self.source_file} are \
+reconciled by {self.partition_workers} worker processes")
+        with worker_pool(min(self.partition_workers,
+                             no_of_buckets)) as executor:
+            futures = [executor.submit(self.reconcile_bucket, bucket_id,
+                                       f"_{bucket_id}", *args)
+                       for bucket_id in range(no_of_buckets)]
+            for future in futures:
+                yield future.result()
+
+    def load_range(self, bucket_dir, output_type, range_id, no_of_buckets):
+        '''Load the output rows of a row number range from the range files
+of all partitions, None if none'''
+        range_dfs = [self.load_spill(os.path.join(
+            bucket_dir, f"{output_type}_range_{range_id}_{bucket_id}.pkl"))
+            for bucket_id in range(no_of_buckets)]
+        range_dfs = [range_df for range_df in range_dfs if range_df is not None]
+        return pd.concat(range_dfs) if range_dfs else None
+
+class KeyOrderError(Exception):
+    '''The file is not sorted by its key columns'''
+
+class DuplicateKeyError(Exception):
+    '''The file has a duplicate key'''
+
+class MergeJoinCompareFiles(CompareFiles):
+    '''Compare the files sorted by their key columns - walk both files at
+once and export the match and mismatch records straight to their output
+files; out-of-order files and files with a duplicate key fall back to the
+full comparison'''
+
+    # Files are streamed row by row, not loaded ahead
+    prefetch_load_flag = 0
+
+    def __init__(self, *args, check_order_flag=1, fallback_class=CompareFiles,
+                 **kwargs):
+        '''Initialize the CompareFiles attributes, the flag to check (1) or
+trust (0) the key order, and the comparison class to fall back to'''
+        super().__init__(*args, **kwargs)
+        self.check_order_flag = check_order_flag
+        self.fallback_class = fallback_class
+
+    @staticmethod
+    def typed_value(value):
+        '''Get the value to compare: None for null, float for a number,
+else the text'''
+        if value in NA_VALUES:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    def sort_key(self, row, key_positions):
+        '''Get the sort key of a record: nulls first, then numbers, then
+text, for each key column'''
+        sort_key = []
+        for key_position in key_positions:
+            value = self.typed_value(row[key_position])
+            if value is None:
+                sort_key.append((0, 0))
+            elif isinstance(value, float):
+                sort_key.append((1, value))
+            else:
+                sort_key.append((2, value))
+        return tuple(sort_key)
+
+    def sorted_records(self, reader, key_positions, measure_position, side):
+        '''Yield the sort key, the record and the measure value of each
+record in the file, checking that the keys are in ascending order'''
+        previous_sort_key = None
+        for row in reader:
+            if not row:
+                continue
+            sort_key = self.sort_key(row, key_positions)
+            if previous_sort_key is not None and self.check_order_flag == 1:
+                if sort_key < previous_sort_key:
+                    raise KeyOrderError(f"{side} file is not sorted by the \
+key columns at {row}")
+                if sort_key == previous_sort_key:
+                    raise DuplicateKeyError(f"{side} file has a duplicate \
+key {row}")
+            previous_sort_key = sort_key
+            yield sort_key, row, row[measure_position]
+
+    def merge_join(self, match_data_full_file_name,
+                   mismatch_data_full_file_name, header, key_positions,
+                   measure_position):
+        '''Walk the sorted source and target file at once, classify and export
+the records; return the number of source and target records, the number of
+records of each category, if each source record matches the target record
+in the same position and the location of the match and mismatch records'''
+        no_source_records = 0
+        no_target_records = 0
+        category_counts = dict.fromkeys(RECON_CATEGORIES, 0)
+        same_position_flag = 1
+        output_header = ([header[key_position] for key_position in key_positions]
+                         + ['Source_Value', 'Target_Value', 'Match'])
+        with open_csv(self.source_file) as sf, \
+             open_csv(self.target_file) as tf, \
+             self.record_sink('match', match_data_full_file_name,
+                              output_header[:len(key_positions)],
+                              output_header) as match_writer, \
+             self.record_sink('mismatch', mismatch_data_full_file_name,
+                              output_header[:len(key_positions)],
+                              output_header) as mismatch_writer:
+            source_reader = csv.reader(sf)
+            target_reader = csv.reader(tf)
+            next(source_reader, None)
+            next(target_reader, None)
+            source_records = self.sorted_records(source_reader, key_positions,
+                                                 measure_position, 'Source')
+            target_records = self.sorted_records(target_reader, key_positions,
+                                                 measure_position, 'Target')
+            source_record = next(source_records, None)
+            target_record = next(target_records, None)
+            while source_record is not None or target_record is not None:
+                if target_record is None or (source_record is not None
+                                             and source_record[0] < target_record[0]):
+                    # Source only record
+                    row = source_record[1]
+                    source_value, target_value = source_record[2], ''
+                    category = 'source-only'
+                    source_record = next(source_records, None)
+                    no_source_records += 1
+                    same_position_flag = 0
+                elif source_record is None or target_record[0] < source_record[0]:
+                    # Target only record
+                    row = target_record[1]
+                    source_value, target_value = '', target_record[2]
+                    category = 'target-only'
+                    target_record = next(target_records, None)
+                    no_target_records += 1
+                    same_position_flag = 0
+                else:
+                    row = source_record[1]
+                    source_value, target_value = source_record[2], target_record[2]
+                    source_typed_value = self.typed_value(source_value)
+                    target_typed_value = self.typed_value(target_value)
+                    if source_typed_value is None and target_typed_value is None:
+                        category = 'both-null'
+                    elif source_typed_value == target_typed_value:
+                        category = 'match'
+                    else:
+                        category = 'value-diff'
+                    source_record = next(source_records, None)
+                    target_record = next(target_records, None)
+                    no_source_records += 1
+                    no_target_records += 1
+                match = category in ['match', 'both-null']
+                output_row = ([row[key_position] for key_position in key_positions]
+                              + [source_value, target_value, match])
+                if match:
+                    match_writer.writerow(output_row, category)
+                else:
+                    mismatch_writer.writerow(output_row, category)
+                category_counts[category] += 1
+        self.index_records(output_header[:len(key_positions)])
+        overall_match = 1 if (same_position_flag == 1
+                              and category_counts['value-diff'] == 0) else 0
+        return (no_source_records, no_target_records, category_counts,
+                overall_match, match_writer.location(),
+                mismatch_writer.location())
+
+    def csv_file_recon(self):
+        '''Compare two sorted .csv files by merge join and export the
+reconciliation results; values are exported as in the files'''
+
+        (source_file_name_wo_ext, target_file_name_wo_ext,
+         match_data_full_file_name,
+         mismatch_data_full_file_name) = self.output_file_names()
+
+        # Skip the full comparison, if the files are proven equal
+        summary_stats_df = self.equality_fast_path(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            match_data_full_file_name, mismatch_data_full_file_name)
+        if summary_stats_df is not None:
+            return summary_stats_df
+
+        # Columns are validated as the full comparison, else it falls back;
+        # more than one measure is compared by the fall back comparison
+        header = FileEqualityCheck.header_record(self.source_file)
+        schema = self.recon_schema()
+        measure_positions = [position for position, col_name in enumerate(header)
+                             if schema.is_measure(col_name)]
+        if (header != FileEqualityCheck.header_record(self.target_file)
+                or len(measure_positions) != 1):
+            return self.fallback_recon()
+        exclude_col_names = schema.exclude_col_names
+        key_positions = [position for position in range(len(header))
+                         if position != measure_positions[0]
+                         and header[position] not in exclude_col_names]
+
+        self.metrics.begin('match')
+        try:
+            (no_source_records, no_target_records, category_counts,
+             overall_match, match_data_full_file_name,
+             mismatch_data_full_file_name) = self.merge_join(
+                 match_data_full_file_name, mismatch_data_full_file_name,
+                 header, key_positions, measure_positions[0])
+        except KeyOrderError as err:
+            # Outputs written so far are discarded by their sinks
+            logging.warning(f"{err}; falling back to the full comparison")
+            print('Files are not sorted by the key columns, falling back to \
+the full comparison')
+            return self.fallback_recon()
+        except DuplicateKeyError as err:
+            # Full comparison reports the duplicate keys of both files
+            logging.warning(f"{err}; falling back to the full comparison")
+            print('Files have a duplicate key, falling back to the full \
+comparison')
+            return self.fallback_recon()
+        merge_join_process_time = self.metrics.end(
+            'match', rows = sum(category_counts.values()),
+            bytes = self.input_bytes())
+        logging.info(f"Source and Target merge joined in \
+{merge_join_process_time.total_seconds()} seconds")
+        match_records = category_counts['match'] + category_counts['both-null']
+        mismatch_records = sum(category_counts.values()) - match_records
+        print(f"Count of mismatch records is {mismatch_records} and \
+match records is {match_records}, overall match result is {overall_match}")
+
+        # Match/Mismatch output is created, only when the dataset exist
+        for no_of_records, full_file_name in [
+                (match_records, match_data_full_file_name),
+                (mismatch_records, mismatch_data_full_file_name)]:
+            if full_file_name is not None:
+                logging.info(f"{no_of_records} records has been exported \
+to '{full_file_name}'")
+
+        self.metrics.begin('summary')
+        summary_stats_data = self.summary_stats_data(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            no_source_records, no_target_records,
+            recon_performed_flag = 1,
+            match_records = match_records,
+            mismatch_records = mismatch_records,
+            overall_match = overall_match,
+            match_data_full_file_name = match_data_full_file_name,
+            mismatch_data_full_file_name = mismatch_data_full_file_name,
+            category_counts = category_counts,
+            measure_diff_counts = {header[measure_positions[0]]:
+                                   category_counts['value-diff']})
+        return self.export_summary_stats(summary_stats_data)
+
+    def fallback_recon(self):
+        '''Compare the files with the fall back comparison class'''
+        logging.info(f"{self.source_file} is reconciled with \
+{getattr(self.fallback_class, 'func', self.fallback_class).__name__}")
+        compare_files = self.fallback_class(
+            self.source_file, self.target_file, self.output_dir,
+            self.summary_stats_fullfilename, self.sno,
+            export_summary_flag = self.export_summary_flag,
+            fast_path_flag = 0,
+            fast_path_match_export_flag = self.fast_path_match_export_flag,
+            exclude_col_names = self.exclude_col_names,
+            parse_cache = self.parse_cache,
+            measure_col_names = self.measure_col_names,
+            hashed_join_flag = self.hashed_join_flag,
+            record_store = self.record_store,
+            output_format = self.output_format,
+            match_output = self.match_output,
+            match_sample_rows = self.match_sample_rows,
+            background_writer = self.background_writer)
+        summary_stats_df = compare_files.csv_file_recon()
+        self.metrics.merge(compare_files.metrics)
+        return summary_stats_df
+
+class ArrowCompareFiles(CompareFiles):
+    '''Compare the files with Apache Arrow - read both files with the
+multithreaded pyarrow CSV reader, join the records on their key columns and
+classify them with the Arrow compute kernels; the records are converted to
+pandas only for their outputs. The summary counts are those of the in memory
+comparison. pyarrow is an optional package'''
+
+    # Data types of the schema sidecar file, read as these Arrow data types
+    sidecar_types = {'int64': 'int64', 'float64': 'float64', 'bool': 'bool_',
+                     'category': 'string', 'object': 'string', 'str': 'string',
+                     'string': 'string'}
+    # Records converted to pandas and exported at a time
+    export_rows = 1000000
+
+    @staticmethod
+    def pandas_type(data_type):
+        '''Check if an Arrow data type is read by pandas too - integer, float,
+boolean, text or null; pandas reads the dates and times as text'''
+        import pyarrow
+        return (pyarrow.types.is_integer(data_type)
+                or pyarrow.types.is_floating(data_type)
+                or pyarrow.types.is_boolean(data_type)
+                or pyarrow.types.is_string(data_type)
+                or pyarrow.types.is_null(data_type))
+
+    def sidecar_column_types(self, schema):
+        '''Get the Arrow data types of the columns in the schema sidecar file;
+the other data types are inferred by the reader'''
+        import pyarrow
+        return {col_name: getattr(pyarrow, self.sidecar_types[dtype])()
+                for col_name, dtype in schema.sidecar.get('dtypes', {}).items()
+                if dtype in self.sidecar_types}
+
+    def read_table(self, file_name, schema, column_types):
+        '''Read the columns of a file, but the excluded columns, into an Arrow
+table with the multithreaded pyarrow CSV reader and the same null values as
+pandas; a column type that does not fit the data, e.g. a decimal in an
+integer column of the sidecar file, is widened (int64 to float64, else
+text) and the file re-read, and so are the dates and times as text'''
+        import pyarrow
+        import pyarrow.csv
+        header = FileEqualityCheck.header_record(file_name)
+        column_types = dict(column_types)
+        while True:
+            convert_options = pyarrow.csv.ConvertOptions(
+                column_types = column_types,
+                include_columns = [col_name for col_name in header
+                                   if schema.usecols(col_name)],
+                null_values = sorted(NA_VALUES), strings_can_be_null = True,
+                true_values = ['True', 'TRUE', 'true'],
+                false_values = ['False', 'FALSE', 'false'])
+            try:
+                # A compressed file is read as a stream, decompressed on the fly
+                if compression_codec(file_name) is None:
+                    table = pyarrow.csv.read_csv(
+                        file_name, convert_options = convert_options)
+                else:
+                    with open_compressed(file_name) as raw_file:
+                        table = pyarrow.csv.read_csv(
+                            raw_file, convert_options = convert_options)
+            except pyarrow.ArrowInvalid as err:
+                # e.g. In CSV column #1: CSV conversion error to int64: ...
+                col_position = re.search(r'column #(\d+)', str(err))
+                col_name = (header[int(col_position.group(1))]
+                            if col_position else None)
+                if column_types.get(col_name) in [None, pyarrow.string()]:
+                    raise
+                column_types[col_name] = (
+                    pyarrow.float64() if column_types[col_name] == pyarrow.int64()
+                    else pyarrow.string())
+                logging.info(f"Data type of {col_name} widened to \
+{column_types[col_name]}, as the sidecar data type does not fit {file_name}: \
+{err}")
+                continue
+            text_col_names = [field.name for field in table.schema
+                              if not self.pandas_type(field.type)]
+            if not text_col_names:
+                return table
+            column_types.update(dict.fromkeys(text_col_names, pyarrow.string()))
+            logging.info(f"{text_col_names} of {file_name} are re-read as text")
+
+    def load_files(self):
+        '''Load the source and target file in an Arrow table each; return the
+schema and both tables'''
+        schema = self.recon_schema()
+        column_types = self.sidecar_column_types(schema)
+        return (schema, self.read_table(self.source_file, schema, column_types),
+                self.read_table(self.target_file, schema, column_types))
+
+    @staticmethod
+    def unify_types(source_table, target_table, key_col_names):
+        '''Cast the columns of different data types in the source and target
+table to one data type, as the in memory comparison infers them once for
+both files - a null column to the other data type (float64, if both are
+null), integer and float to float64, and the other key columns to text;
+the measures of other different data types are not comparable'''
+        import pyarrow
+        for col_name in source_table.column_names:
+            if col_name not in target_table.column_names:
+                continue
+            source_type = source_table.schema.field(col_name).type
+            target_type = target_table.schema.field(col_name).type
+            if pyarrow.types.is_null(source_type) and pyarrow.types.is_null(
+                    target_type):
+                data_type = pyarrow.float64()
+            elif source_type == target_type:
+                continue
+            elif pyarrow.types.is_null(source_type):
+                data_type = target_type
+            elif pyarrow.types.is_null(target_type):
+                data_type = source_type
+            elif all(pyarrow.types.is_integer(data_type)
+                     or pyarrow.types.is_floating(data_type)
+                     for data_type in [source_type, target_type]):
+                data_type = pyarrow.float64()
+            elif col_name in key_col_names:
+                data_type = pyarrow.string()
+            else:
+                continue
+            source_table = source_table.set_column(
+                source_table.column_names.index(col_name), col_name,
+                source_table[col_name].cast(data_type))
+            target_table = target_table.set_column(
+                target_table.column_names.index(col_name), col_name,
+                target_table[col_name].cast(data_type))
+        return source_table, target_table
+
+    @staticmethod
+    def duplicate_keys(table, key_col_names):
+        '''Get the duplicate keys of a table and their number of records, by
+the Arrow hash aggregation; the null keys are grouped together'''
+        import pyarrow.compute as pc
+        key_counts = table.group_by(key_col_names, use_threads=False).aggregate(
+            [([], 'count_all')])
+        key_counts = key_counts.filter(pc.greater(key_counts['count_all'], 1))
+        return key_counts.select(key_col_names + ['count_all']).rename_columns(
+            key_col_names + ['No. of records']).to_pandas()
+
+    @staticmethod
+    def join_tables(source_table, target_table, key_col_names):
+        '''Join the source and target records on their key columns - a full
+outer hash join of the key columns and the record positions only, in the
+same order as the in memory comparison: the source records, then the target
+only records; the other columns are then taken by the record positions, kept
+as _source_position and _target_position, null on the other side only. A
+key column with nulls is joined on its null flags and its values with the
+nulls filled, so that the null keys match as in the in memory comparison'''
+        import pyarrow
+        import pyarrow.compute as pc
+        key_tables = [
+            source_table.select(key_col_names).append_column(
+                '_source_position', pyarrow.array(np.arange(source_table.num_rows))),
+            target_table.select(key_col_names).append_column(
+                '_target_position', pyarrow.array(np.arange(target_table.num_rows)))]
+        join_col_names = []
+        null_key_col_names = []
+        for col_name in key_col_names:
+            if all(key_table[col_name].null_count == 0
+                   for key_table in key_tables):
+                join_col_names.append(col_name)
+                continue
+            null_key_col_names.append(col_name)
+            data_type = key_tables[0].schema.field(col_name).type
+            fill_value = ('' if pyarrow.types.is_string(data_type)
+                          else False if pyarrow.types.is_boolean(data_type)
+                          else 0)
+            for side in range(2):
+                key_tables[side] = key_tables[side].append_column(
+                    f"_null_{col_name}", pc.is_null(key_tables[side][col_name]))
+                key_tables[side] = key_tables[side].append_column(
+                    f"_value_{col_name}",
+                    pc.fill_null(key_tables[side][col_name], fill_value))
+            join_col_names += [f"_null_{col_name}", f"_value_{col_name}"]
+        key_tables = [key_table.drop_columns(null_key_col_names)
+                      for key_table in key_tables]
+        position_table = key_tables[0].join(
+            key_tables[1], join_col_names, join_type='full outer',
+            use_threads=True).sort_by([('_source_position', 'ascending'),
+                                       ('_target_position', 'ascending')])
+        source_positions = position_table['_source_position']
+        target_positions = position_table['_target_position']
+        columns = {}
+        for col_name in key_col_names:
+            columns[col_name] = (
+                pc.coalesce(source_table[col_name].take(source_positions),
+                            target_table[col_name].take(target_positions))
+                if col_name in null_key_col_names
+                else position_table[col_name])
+        for table, positions in [(source_table, source_positions),
+                                 (target_table, target_positions)]:
+            for col_name in table.column_names:
+                if col_name not in key_col_names:
+                    columns[col_name] = table[col_name].take(positions)
+        columns['_source_position'] = source_positions
+        columns['_target_position'] = target_positions
+        return pyarrow.table(columns)
+
+    @classmethod
+    def classify_table(cls, joined_table, measure_names):
+        '''Classify each joined record with the Arrow compute kernels, as
+CompareFiles.classify_records. Return the Match flags, the number of records
+of each category, the match flags of each measure (null for the records on
+one side only) and the category code of each record, its position in
+RECON_CATEGORIES'''
+        import pyarrow
+        import pyarrow.compute as pc
+        source_exists = pc.is_valid(joined_table['_source_position'])
+        target_exists = pc.is_valid(joined_table['_target_position'])
+        one_side_flags = pc.invert(pc.and_(source_exists, target_exists))
+        all_both_null = None
+        all_match = None
+        measure_match_flags = {}
+        for measure_name, (source_col_name, target_col_name) in zip(
+                measure_names, cls.value_col_pairs(measure_names)):
+            both_null = pc.and_(pc.is_null(joined_table[source_col_name]),
+                                pc.is_null(joined_table[target_col_name]))
+            measure_match = pc.or_(
+                pc.fill_null(pc.equal(joined_table[source_col_name],
+                                      joined_table[target_col_name]), False),
+                both_null)
+            all_both_null = (both_null if all_both_null is None
+                             else pc.and_(all_both_null, both_null))
+            all_match = (measure_match if all_match is None
+                         else pc.and_(all_match, measure_match))
+            measure_match_flags[measure_name] = pc.if_else(
+                one_side_flags, pyarrow.scalar(None, pyarrow.bool_()),
+                measure_match)
+        category_codes = {category: pyarrow.scalar(position, pyarrow.int8())
+                          for position, category in enumerate(RECON_CATEGORIES)}
+        category_codes = pc.case_when(
+            pc.make_struct(pc.invert(target_exists), pc.invert(source_exists),
+                           all_both_null, all_match,
+                           field_names=['source-only', 'target-only',
+                                        'both-null', 'match']),
+            category_codes['source-only'], category_codes['target-only'],
+            category_codes['both-null'], category_codes['match'],
+            category_codes['value-diff'])
+        category_counts = dict.fromkeys(RECON_CATEGORIES, 0)
+        for value_count in pc.value_counts(category_codes).to_pylist():
+            category_counts[RECON_CATEGORIES[value_count['values']]] = (
+                value_count['counts'])
+        match_flags = pc.less_equal(category_codes,
+                                    RECON_CATEGORIES.index('both-null'))
+        return match_flags, category_counts, measure_match_flags, category_codes
+
+    @classmethod
+    def records_table(cls, joined_table, key_col_names, measure_names,
+                      match_flags, measure_match_flags, category_codes):
+        '''Get the output records of the joined table in the layout of the
+in memory comparison - the key columns, the source and target values (and
+the match flag of each measure, and the number of mismatch measures, for
+more than one measure) and the Match column - with the category code'''
+        import pyarrow
+        import pyarrow.compute as pc
+        columns = {col_name: joined_table[col_name] for col_name in key_col_names}
+        for measure_name, value_col_names in zip(
+                measure_names, cls.value_col_pairs(measure_names)):
+            for col_name in value_col_names:
+                columns[col_name] = joined_table[col_name]
+                # Integer values of the records on one side only are float,
+                # as the nulls of a pandas integer column
+                if (pyarrow.types.is_integer(columns[col_name].type)
+                        and columns[col_name].null_count > 0):
+                    columns[col_name] = columns[col_name].cast(pyarrow.float64())
+            if len(measure_names) > 1:
+                columns[f"{measure_name}_Match"] = measure_match_flags[measure_name]
+        if len(measure_names) > 1:
+            mismatch_measures = [
+                pc.cast(pc.invert(pc.fill_null(measure_match, False)),
+                        pyarrow.int64())
+                for measure_match in measure_match_flags.values()]
+            columns['Mismatch Measures'] = mismatch_measures[0]
+            for measure_mismatch in mismatch_measures[1:]:
+                columns['Mismatch Measures'] = pc.add(
+                    columns['Mismatch Measures'], measure_mismatch)
+        columns['Match'] = match_flags
+        columns['_category_code'] = category_codes
+        return pyarrow.table(columns)
+
+    def export_table(self, output_type, full_file_name, records_table,
+                     key_col_names):
+        '''Export the match or mismatch records of the records table to their
+output sink, converted to pandas a slice at a time; return the sink'''
+        with self.record_sink(output_type, full_file_name,
+                              key_col_names) as sink:
+            # No match output needs no pandas conversion
+            if not isinstance(sink, NoRecordSink):
+                for offset in range(0, records_table.num_rows, self.export_rows):
+                    records_df = records_table.slice(
+                        offset, self.export_rows).to_pandas()
+                    categories = pd.Series(pd.Categorical.from_codes(
+                        records_df.pop('_category_code').to_numpy(),
+                        RECON_CATEGORIES), index=records_df.index)
+                    sink.write(records_df, categories, index_flag = False)
+        return sink
+
+    def csv_file_recon(self):
+        '''Compare two .csv files with Apache Arrow and export the
+reconciliation results'''
+        import pyarrow.compute as pc
+
+        (source_file_name_wo_ext, target_file_name_wo_ext,
+         match_data_full_file_name,
+         mismatch_data_full_file_name) = self.output_file_names()
+
+        # Skip the full comparison, if the files are proven equal
+        summary_stats_df = self.equality_fast_path(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            match_data_full_file_name, mismatch_data_full_file_name)
+        if summary_stats_df is not None:
+            return summary_stats_df
+
+        #*********************************************************************
+        #  Read the source and target file in an Arrow table and Compare
+        #*********************************************************************
+        peak_memory_before_read = peak_memory_mb()
+        schema, source_table, target_table, read_csv_process_time = (
+            self.loaded_files())
+        no_source_records = source_table.num_rows
+        no_target_records = target_table.num_rows
+        logging.info(f"Source and Target csv files read by the pyarrow CSV \
+reader in {read_csv_process_time}")
+        logging.info(f"Peak memory in MB before the read is \
+{peak_memory_before_read} and after the read is {peak_memory_mb()}; source \
+table is {round(source_table.nbytes / 1048576, 1)} MB and target table is \
+{round(target_table.nbytes / 1048576, 1)} MB")
+        logging.info(f'Number of records in source file:{no_source_records}')
+        logging.info(f'Number of records in target file:{no_target_records}')
+
+        # Columns are validated as the in memory comparison
+        self.metrics.begin('index')
+        source_measure_names = schema.measure_names(source_table.column_names)
+        target_measure_names = schema.measure_names(target_table.column_names)
+        key_col_names = [col_name for col_name in source_table.column_names
+                         if not schema.is_measure(col_name)]
+        remarks = None
+        if source_table.column_names != target_table.column_names:
+            remarks = 'Error, source and target file name column or their \
+order does not match'
+        elif None in [source_measure_names, target_measure_names]:
+            remarks = schema.measure_error_remarks()
+        elif not key_col_names:
+            remarks = 'Error, source and target file has no key columns'
+        else:
+            source_table, target_table = self.unify_types(
+                source_table, target_table, key_col_names)
+            if any(source_table.schema.field(measure_name).type
+                   != target_table.schema.field(measure_name).type
+                   for measure_name in source_measure_names):
+                remarks = "Error, source & target measure data type does not \
+match"
+        if remarks is None:
+            duplicate_keys_df = pd.concat(
+                [self.duplicate_keys(source_table, key_col_names).assign(
+                    Side='Source'),
+                 self.duplicate_keys(target_table, key_col_names).assign(
+                    Side='Target')],
+                ignore_index=True)
+            # Duplicate keys cannot be joined, the file pair is not compared
+            if len(duplicate_keys_df) > 0:
+                remarks = self.export_duplicate_keys(source_file_name_wo_ext,
+                                                     duplicate_keys_df)
+        if remarks is not None:
+            logging.info(remarks)
+            print(remarks)
+            self.metrics.begin('summary')
+            summary_stats_data = self.summary_stats_data(
+                source_file_name_wo_ext, target_file_name_wo_ext,
+                no_source_records, no_target_records,
+                recon_performed_flag = 0,
+                remarks = remarks)
+            return self.export_summary_stats(summary_stats_data)
+        self.metrics.end('index', rows = no_source_records + no_target_records)
+        logging.info(f"Source and target measure names are {source_measure_names}")
+        print('Source and Target files are comparable')
+
+        # Check if source = target
+        self.metrics.begin('equality check')
+        overall_match = 1 if source_table.equals(target_table) else 0
+        overall_match_process_time = self.metrics.end(
+            'equality check', rows = no_source_records + no_target_records)
+        print(f"Overall match result is {overall_match} - processed in \
+{overall_match_process_time.total_seconds()} seconds")
+
+        # Join the source and target records on the key columns, the measure
+        # columns renamed as in the in memory comparison
+        self.metrics.begin('concat')
+        value_col_pairs = self.value_col_pairs(source_measure_names)
+        source_col_names = {measure_name: source_col_name
+                            for measure_name, (source_col_name, _)
+                            in zip(source_measure_names, value_col_pairs)}
+        target_col_names = {measure_name: target_col_name
+                            for measure_name, (_, target_col_name)
+                            in zip(target_measure_names, value_col_pairs)}
+        source_table = source_table.rename_columns(
+            [source_col_names.get(col_name, col_name)
+             for col_name in source_table.column_names])
+        target_table = target_table.rename_columns(
+            [target_col_names.get(col_name, col_name)
+             for col_name in target_table.column_names])
+        joined_table = self.join_tables(source_table, target_table,
+                                        key_col_names)
+        concat_records = joined_table.num_rows
+        concat_process_time = self.metrics.end('concat', rows = concat_records)
+        logging.info(f"Source and Target joined in \
+{concat_process_time.total_seconds()} seconds, {concat_records} records")
+
+        # Classify each record with the Arrow compute kernels
+        self.metrics.begin('match')
+        match_flags, category_counts, measure_match_flags, category_codes = (
+            self.classify_table(joined_table, source_measure_names))
+        measure_diff_counts = {
+            measure_name: int(pc.sum(pc.invert(measure_match)).as_py() or 0)
+            for measure_name, measure_match in measure_match_flags.items()}
+        records_table = self.records_table(
+            joined_table, key_col_names, source_measure_names, match_flags,
+            measure_match_flags, category_codes)
+        match_records = category_counts['match'] + category_counts['both-null']
+        mismatch_records = concat_records - match_records
+        classification_process_time = self.metrics.end(
+            'match', rows = concat_records)
+        logging.info(f"Records classified as {category_counts}, value \
+difference records by measure {measure_diff_counts} in \
+{classification_process_time.total_seconds()} seconds")
+        print(f"Count of mismatch records is {mismatch_records} and \
+match records is {match_records}, processed in \
+{classification_process_time.total_seconds()} seconds")
+
+        #*********************************************************************
+        #  Export the match and mismatch data to respective outputs
+        #*********************************************************************
+        for output_type, row_flags, no_of_records in [
+                ('match', match_flags, match_records),
+                ('mismatch', pc.invert(match_flags), mismatch_records)]:
+            self.metrics.begin('export')
+            sink = self.export_table(
+                output_type,
+                match_data_full_file_name if output_type == 'match'
+                else mismatch_data_full_file_name,
+                records_table.filter(row_flags), key_col_names)
+            export_process_time = self.metrics.end(
+                'export', rows = no_of_records, bytes = sink.bytes())
+            if output_type == 'match':
+                match_data_full_file_name = sink.location()
+            else:
+                mismatch_data_full_file_name = sink.location()
+            if sink.location() is not None:
+                logging.info(f"{no_of_records} records has been exported to \
+'{sink.location()}' in {export_process_time.total_seconds()} seconds")
+        self.index_records(key_col_names)
+
+        #*********************************************************************
+        #  Export the summary stats - for full comparison done
+        #*********************************************************************
+        self.metrics.begin('summary')
+        summary_stats_data = self.summary_stats_data(
+            source_file_name_wo_ext, target_file_name_wo_ext,
+            no_source_records, no_target_records,
+            recon_performed_flag = 1,
+            match_records = match_records,
+            mismatch_records = mismatch_records,
+            overall_match = overall_match,
+            match_data_full_file_name = match_data_full_file_name,
+            mismatch_data_full_file_name = mismatch_data_full_file_name,
+            category_counts = category_counts,
+            measure_diff_counts = measure_diff_counts)
+        return self.export_summary_stats(summary_stats_data)
+
+def compare_files_class(source_file, target_file, out_of_core_threshold_mb,
+                        merge_join_order='', file_sizes=None, engine='pandas',
+                        memory_plan=None, partition_threshold_mb=None,
+                        partition_workers=None, partition_col=None):
+    '''Get the file comparison class - in partitions on the partition worker
+processes, by the partition column or the key columns, when either file is
+larger than the partition threshold size in MB; out-of-core, when either
+file is larger than the threshold size in MB or the memory plan of the
+memory budget routes it out-of-core, with the chunk rows and bucket size of
+the plan, else in memory with the engine, one of RECON_ENGINES; merge join
+for the files sorted by their key columns, with the key order checked (C) or
+trusted (T), falling back to the partitioned/out-of-core/in memory
+comparison. The file sizes are taken from the directory inventory, when
+given; the uncompressed size of a compressed file is estimated'''
+    compare_class = ArrowCompareFiles if engine == 'arrow' else CompareFiles
+    if (out_of_core_threshold_mb is not None
+            or partition_threshold_mb is not None):
+        file_sizes = (data_size(source_file, file_sizes and file_sizes[0]),
+                      data_size(target_file, file_sizes and file_sizes[1]))
+    if out_of_core_threshold_mb is not None and (
+            max(file_sizes) > out_of_core_threshold_mb * 1024 * 1024):
+        logging.info(f"{source_file} is reconciled out-of-core")
+        compare_class = OutOfCoreCompareFiles
+    # Chunk rows and bucket size of the memory plan
+    out_of_core_options = {}
+    if memory_plan is not None and memory_plan['out_of_core_flag'] == 1:
+        logging.info(f"{source_file} is reconciled out-of-core in the memory \
+budget, with {memory_plan['chunk_rows']} rows per chunk and \
+{memory_plan['bucket_mb']} MB buckets")
+        compare_class = OutOfCoreCompareFiles
+        out_of_core_options = {'chunk_rows': memory_plan['chunk_rows'],
+                               'bucket_mb': memory_plan['bucket_mb']}
+    if partition_threshold_mb is not None and (
+            max(file_sizes) > partition_threshold_mb * 1024 * 1024):
+        logging.info(f"{source_file} is reconciled in partitions")
+        compare_class = partial(PartitionedCompareFiles,
+                                partition_workers = partition_workers,
+                                partition_col = partition_col,
+                                **out_of_core_options)
+    elif out_of_core_options:
+        compare_class = partial(OutOfCoreCompareFiles, **out_of_core_options)
+    if merge_join_order in ['C', 'T']:
+        logging.info(f"{source_file} is reconciled by merge join")
+        return partial(MergeJoinCompareFiles,
+                       check_order_flag = 1 if merge_join_order == 'C' else 0,
+                       fallback_class = compare_class)
+    return compare_class
+
+def file_pair_compare_files(recon_task, background_writer=None):
+    '''Get the file comparison of a recon task'''
+    return compare_files_class(
+        recon_task['source_file'], recon_task['target_file'],
+        recon_task['out_of_core_threshold_mb'],
+        recon_task['merge_join_order'],
+        recon_task['file_sizes'],
+        recon_task['engine'],
+        recon_task['memory_plan'],
+        recon_task['partition_threshold_mb'],
+        recon_task['partition_workers'],
+        recon_task['partition_col'])(
+        source_file = recon_task['source_file'],
+        target_file = recon_task['target_file'],
+        output_dir = recon_task['output_dir'],
+        summary_stats_fullfilename = recon_task['summary_stats_fullfilename'],
+        sno = recon_task['sno'],
+        export_summary_flag = 0,
+        fast_path_match_export_flag = recon_task['fast_path_match_export_flag'],
+        exclude_col_names = recon_task['exclude_col_names'],
+        parse_cache = recon_task['parse_cache'],
+        measure_col_names = recon_task['measure_col_names'],
+        record_store = recon_task['record_store'],
+        output_format = recon_task['output_format'],
+        match_output = recon_task['match_output'],
+        match_sample_rows = recon_task['match_sample_rows'],
+        background_writer = background_writer
+        )
+
+def prefetch_file_pair(recon_task, background_writer=None):
+    '''Reader thread of the pipeline - get the file comparison of a recon
+task with the file pair read ahead; with the recon result cache, the file
+pair is not read ahead, a cached result needs the file contents digests only'''
+    compare_files = file_pair_compare_files(recon_task, background_writer)
+    if recon_task['result_cache'] is None or recon_task['record_store'] is not None:
+        compare_files.prefetch()
+    return compare_files
+
+def run_manifest_entry(recon_task, summary_row):
+    '''Get the run manifest entry of a reconciled file pair - its input file
+fingerprints and its outputs, by the Summary Stats locations; None, without
+the fingerprints, e.g. a file pair reconciled on its own'''
+    if recon_task['fingerprints'] is None:
+        return None
+    return {
+        'S.No': recon_task['sno'],
+        'Object': recon_task['object'],
+        'Source Fingerprint': recon_task['fingerprints'][0],
+        'Target Fingerprint': recon_task['fingerprints'][1],
+        'Outputs': json.dumps([
+            summary_row[col_name] for col_name in [
+                'Location of Match records', 'Location of Mismatch records']
+            if summary_row.get(col_name)]),
+        'Date & Time': str(datetime.now()),
+        }
+
+def store_summary_row(recon_task, summary_stats_df, error_msg,
+                      background_writer=None):
+    '''Insert the summary row of a file pair into the summary store - an
+error row, if it is not reconciled or, with the background writer, if its
+outputs are not written; return the error'''
+    summary_store = recon_task['summary_store']
+    if background_writer is not None and error_msg is None:
+        error_msg = background_writer.errors.get(recon_task['sno'])
+    try:
+        if error_msg is not None:
+            summary_store.insert_error(recon_task, error_msg)
+        else:
+            summary_rows = summary_records(summary_stats_df)
+            summary_store.insert(
+                summary_rows,
+                'reconciled' if summary_rows[0][
+                    'Reconciliation Performed - Flag'] == 1
+                else 'not reconciled',
+                run_manifest_entry(recon_task, summary_rows[0]))
+    except (sqlite3.Error, OSError) as err:
+        error_msg = "Summary row is not stored: {0}".format(err)
+        if background_writer is not None:
+            background_writer.errors.setdefault(recon_task['sno'], error_msg)
+    return error_msg
+
+def recon_file_pair(recon_task, prefetched=None, background_writer=None):
+    '''Worker - reconcile one file pair, insert its summary row into the
+summary store, when given, and return it; an error is returned, not raised,
+so that one failing pair does not abort the others. The stage metrics are
+appended to the metrics file, and the pair is optionally profiled (cProfile)
+and its memory allocations traced. In the pipeline, the file comparison is
+the prefetched future of the reader thread, and the outputs, the summary row
+and the result cache entry are written by the background writer, whose
+write errors are in its errors. In a memory budget, the estimated and
+actual peak memory of the pair are logged, to calibrate the estimator'''
+    sno = recon_task['sno']
+    memory_plan = recon_task['memory_plan']
+    # Peak memory of this file pair, not of the pairs before it
+    if memory_plan is not None and not reset_peak_memory():
+        logging.info(f"Object#{sno} peak memory is not reset, it is that of \
+the process")
+    profiler = None
+    if recon_task['profile_flag'] == 1:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if recon_task['tracemalloc_flag'] == 1:
+        tracemalloc.start()
+    compare_files = None
+    try:
+        compare_files = (
+            prefetched.result() if prefetched is not None
+            else file_pair_compare_files(recon_task, background_writer))
+        result_cache = recon_task['result_cache']
+        # Cached outputs are .csv files, not the record store tables
+        if result_cache is None or recon_task['record_store'] is not None:
+            summary_stats_df = compare_files.csv_file_recon()
+        else:
+            # Reuse the cached result of the same file contents
+            cache_key = result_cache.cache_key(compare_files)
+            summary_stats_df = result_cache.restore(cache_key, compare_files)
+            if summary_stats_df is None:
+                summary_stats_df = compare_files.csv_file_recon()
+                # Outputs are cached once written
+                if background_writer is None:
+                    result_cache.store(cache_key, compare_files,
+                                       summary_stats_df)
+                else:
+                    background_writer.submit(sno, result_cache.store,
+                                             cache_key, compare_files,
+                                             summary_stats_df)
+        error_msg = None
+    except Exception as err:
+        summary_stats_df = None
+        error_msg = error_message(err)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(
+                recon_task['output_dir'],
+                file_stem(recon_task['source_file']) + ' - profile.prof'))
+        if recon_task['tracemalloc_flag'] == 1:
+            tracemalloc.stop()
+    peak_memory = peak_memory_mb()
+    if memory_plan is not None:
+        logging.info(f"Object#{sno}-{recon_task['object']} \
+{memory_plan['compare_mode']} peak memory: estimated \
+{memory_plan['estimated_peak_mb']} MB, actual {peak_memory} MB")
+    if compare_files is not None and recon_task['metrics_fullfilename']:
+        try:
+            compare_files.metrics.export(
+                recon_task['metrics_fullfilename'], sno = sno,
+                source_file = recon_task['source_file'],
+                target_file = recon_task['target_file'],
+                compare_class = type(compare_files).__name__,
+                source_compression = compression_codec(recon_task['source_file']),
+                target_compression = compression_codec(recon_task['target_file']),
+                estimated_peak_mb = memory_plan and memory_plan['estimated_peak_mb'],
+                peak_memory_mb = peak_memory,
+                error = error_msg)
+        except OSError as err:
+            logging.warning(f"Metrics of Object#{sno} are not exported: {err}")
+    if recon_task['summary_store'] is not None:
+        if background_writer is None:
+            error_msg = store_summary_row(recon_task, summary_stats_df,
+                                          error_msg)
+        else:
+            # Summary row is stored after the outputs of the file pair
+            background_writer.submit(sno, store_summary_row, recon_task,
+                                     summary_stats_df, error_msg,
+                                     background_writer, failed_flag = 1)
+    return sno, summary_stats_df, error_msg
+
+class PeakMemoryEstimator:
+    '''Plan the file pairs in a memory budget - estimate the peak memory in
+MB of a file pair comparison from the file sizes and the bytes per row of a
+sample, as text and loaded with the inferred data types, and route the file
+pairs that cannot fit in the budget in memory to the out-of-core comparison,
+its chunks and buckets sized to the budget. The factors are calibrated from
+the estimated and actual peak memory logged for each file pair'''
+
+    # Resident memory of a process with pandas and numpy imported
+    process_mb = 125
+    # Peak memory of the in memory comparison, in multiples of both files
+    # loaded, of each engine
+    in_memory_factors = {'pandas': 10.5, 'arrow': 10}
+    # Peak memory of the out-of-core comparison - its fixed memory, and the
+    # multiple of the text of a chunk and a bucket pair
+    out_of_core_mb = 30
+    out_of_core_factor = 10
+    # Resident memory added by each forked partition worker process
+    partition_worker_mb = 20
+    # Peak memory of the merge join of the sorted files, streamed by row
+    merge_join_mb = 30
+    # Smallest chunk and bucket of the out-of-core comparison, and the
+    # defaults, which are not exceeded
+    min_chunk_rows = 10000
+    min_bucket_mb = 1
+    max_chunk_rows = 1000000
+    max_bucket_mb = 256
+
+    def __init__(self, memory_budget_mb, sample_rows=10000):
+        '''Initialize the memory budget in MB and the number of sample records
+read of each file'''
+        self.memory_budget_mb = memory_budget_mb
+        self.sample_rows = sample_rows
+
+    def sample_row_bytes(self, file_name, dtypes, usecols):
+        '''Get the bytes per row of the sample of a file - as text, and loaded
+with the data types; (0, 0), if the file has no records'''
+        with open_compressed(file_name) as f:
+            lines = list(islice(f, self.sample_rows + 1))
+        if len(lines) < 2:
+            return 0, 0
+        sample_df = pd.read_csv(io.BytesIO(b''.join(lines)), dtype=dtypes,
+                                usecols=usecols)
+        text_bytes = sum(len(line) for line in lines[1:])
+        memory_bytes = int(sample_df.memory_usage(index=False, deep=True).sum())
+        return text_bytes / len(sample_df), memory_bytes / len(sample_df)
+
+    def file_pair_size(self, recon_task):
+        '''Get the text size and the loaded size in MB of both files, the text
+size of the larger file and the larger text bytes per row; a sample that
+does not parse, e.g. a malformed file, is counted loaded as its text'''
+        schema = ReconSchema(recon_task['source_file'],
+                             recon_task['target_file'],
+                             recon_task['exclude_col_names'],
+                             measure_col_names = recon_task['measure_col_names'])
+        try:
+            dtypes = schema.infer_dtypes()
+        except (ValueError, TypeError):
+            dtypes = None
+        file_sizes = recon_task['file_sizes'] or (None, None)
+        text_mb = loaded_mb = larger_text_mb = row_text_bytes = 0
+        for file_name, file_size in zip([recon_task['source_file'],
+                                         recon_task['target_file']],
+                                        file_sizes):
+            file_text_mb = data_size(file_name, file_size) / 1048576
+            try:
+                file_row_text_bytes, row_memory_bytes = self.sample_row_bytes(
+                    file_name, dtypes, schema.usecols)
+            except (ValueError, TypeError):
+                file_row_text_bytes = row_memory_bytes = 0
+            text_mb += file_text_mb
+            larger_text_mb = max(larger_text_mb, file_text_mb)
+            loaded_mb += (file_text_mb * row_memory_bytes / file_row_text_bytes
+                          if file_row_text_bytes else file_text_mb)
+            row_text_bytes = max(row_text_bytes, file_row_text_bytes)
+        return text_mb, loaded_mb, larger_text_mb, row_text_bytes
+
+    def out_of_core_peak_mb(self, chunk_rows, bucket_mb, row_text_bytes,
+                            partition_workers=0):
+        '''Estimate the peak memory in MB of the out-of-core comparison, with
+a bucket pair reconciled at a time on each partition worker process, if
+partitioned'''
+        return (self.process_mb + self.out_of_core_mb
+                + partition_workers * self.partition_worker_mb
+                + self.out_of_core_factor
+                * (chunk_rows * row_text_bytes / 1048576
+                   + max(1, partition_workers) * bucket_mb))
+
+    def out_of_core_sizes(self, row_text_bytes, partition_workers=0):
+        '''Size the chunk rows and the bucket size in MB of the out-of-core
+comparison to the budget, half of the budget each, the bucket half shared by
+the partition worker processes, if partitioned; the defaults when they fit'''
+        half_mb = max(0, self.memory_budget_mb - self.process_mb
+                      - self.out_of_core_mb) / self.out_of_core_factor / 2
+        chunk_rows = (int(half_mb * 1048576 / row_text_bytes)
+                      if row_text_bytes else self.max_chunk_rows)
+        chunk_rows = min(max(chunk_rows, self.min_chunk_rows),
+                         self.max_chunk_rows)
+        bucket_half_mb = max(0, half_mb - partition_workers
+                             * self.partition_worker_mb
+                             / self.out_of_core_factor)
+        bucket_mb = min(max(int(bucket_half_mb / max(1, partition_workers)),
+                            self.min_bucket_mb),
+                        self.max_bucket_mb)
+        return chunk_rows, bucket_mb
+
+    def plan(self, recon_task):
+        '''Plan a file pair in the budget - its comparison, in memory,
+out-of-core (the out-of-core threshold size, or in memory beyond the
+budget) or merge join, its out-of-core chunk rows and bucket size, and its
+estimated peak memory in MB; return the memory plan, None if the files
+cannot be sampled, their error is that of the comparison'''
+        try:
+            text_mb, loaded_mb, larger_text_mb, row_text_bytes = \
+                self.file_pair_size(recon_task)
+        except (OSError, ValueError, TypeError) as err:
+            logging.warning(f"Object#{recon_task['sno']}-\
+{recon_task['object']} is not planned in the memory budget: {err}")
+            return None
+        in_memory_peak_mb = round(
+            self.process_mb
+            + self.in_memory_factors[recon_task['engine']] * loaded_mb, 1)
+        threshold_mb = recon_task['out_of_core_threshold_mb']
+        out_of_core_flag = 1 if (
+            in_memory_peak_mb > self.memory_budget_mb
+            or (threshold_mb is not None
+                and larger_text_mb > threshold_mb)) else 0
+        # Partitioned file pairs reconcile their buckets on the partition
+        # worker processes at the same time
+        partition_threshold_mb = recon_task['partition_threshold_mb']
+        partition_workers = 0
+        if partition_threshold_mb is not None and (
+                larger_text_mb > partition_threshold_mb):
+            out_of_core_flag = 1
+            partition_workers = (recon_task['partition_workers']
+                                 or os.cpu_count() or 1)
+        chunk_rows = bucket_mb = None
+        if out_of_core_flag == 1:
+            chunk_rows, bucket_mb = self.out_of_core_sizes(row_text_bytes,
+                                                           partition_workers)
+            estimated_peak_mb = round(self.out_of_core_peak_mb(
+                chunk_rows, bucket_mb, row_text_bytes, partition_workers), 1)
+        else:
+            estimated_peak_mb = in_memory_peak_mb
+        compare_mode = ('partitioned' if partition_workers
+                        else 'out-of-core' if out_of_core_flag == 1
+                        else 'in memory')
+        # Trusted merge join streams the sorted files; the checked merge join
+        # is planned as its fall back, as the key order may not match
+        if recon_task['merge_join_order'] == 'T':
+            compare_mode = 'merge join'
+            estimated_peak_mb = self.process_mb + self.merge_join_mb
+        memory_plan = {
+            'compare_mode': compare_mode,
+            'out_of_core_flag': out_of_core_flag,
+            'chunk_rows': chunk_rows,
+            'bucket_mb': bucket_mb,
+            'estimated_peak_mb': estimated_peak_mb,
+            }
+        logging.info(f"Object#{recon_task['sno']}-{recon_task['object']} \
+memory plan of {round(text_mb, 1)} MB text, {round(loaded_mb, 1)} MB loaded: \
+{memory_plan}")
+        if estimated_peak_mb > self.memory_budget_mb:
+            logging.warning(f"Object#{recon_task['sno']}-\
+{recon_task['object']} estimated peak memory {estimated_peak_mb} MB exceeds \
+the memory budget {self.memory_budget_mb} MB; it is reconciled alone")
+        return memory_plan
+
+def task_peak_mb(recon_task):
+    '''Get the estimated peak memory in MB of a recon task, 0 without a
+memory plan'''
+    memory_plan = recon_task['memory_plan']
+    return memory_plan['estimated_peak_mb'] if memory_plan else 0
+
+class ParallelFileRecon:
+    '''Reconcile the independent file pairs in a process pool; in a memory
+budget, the file pairs are admitted to the workers, largest estimated peak
+memory first, only while the estimated peak memory of the running pairs
+fits in the budget; a pair larger than the budget is reconciled alone'''
+
+    def __init__(self, recon_tasks, workers, summary_store,
+                 memory_budget_mb=None):
+        '''Initialize the recon tasks, number of worker processes,
+summary store and the memory budget in MB (default: no budget)'''
+        self.recon_tasks = recon_tasks
+        self.workers = workers
+        self.summary_store = summary_store
+        self.memory_budget_mb = memory_budget_mb
+        # Error of each file pair that is not reconciled, by object name
+        self.errors = {}
+
+    def admit(self, pending_tasks, running_tasks):
+        '''Get the pending recon tasks admitted to the free workers, the
+first that fit in the memory budget with the running tasks; the first
+pending task, when nothing is running'''
+        admitted_tasks = []
+        admitted_mb = sum(map(task_peak_mb, running_tasks))
+        for recon_task in pending_tasks:
+            if len(running_tasks) + len(admitted_tasks) == self.workers:
+                break
+            if (self.memory_budget_mb is not None
+                    and (running_tasks or admitted_tasks)
+                    and admitted_mb + task_peak_mb(recon_task)
+                    > self.memory_budget_mb):
+                continue
+            admitted_tasks.append(recon_task)
+            admitted_mb += task_peak_mb(recon_task)
+        return admitted_tasks
+
+    def run_recon(self):
+        '''Run the recon tasks in the pool; the workers insert the summary
+rows into the summary store, which are also returned by S.No'''
+        summary_rows = {}
+        pending_tasks = list(self.recon_tasks)
+        if self.memory_budget_mb is not None:
+            # Largest pairs first, the smaller pairs fill the budget left
+            pending_tasks.sort(key=task_peak_mb, reverse=True)
+        futures = {}
+        # Worker processes log to the log queue of the program, when queued
+        with worker_pool(self.workers) as executor:
+            while pending_tasks or futures:
+                for recon_task in self.admit(pending_tasks,
+                                             list(futures.values())):
+                    pending_tasks.remove(recon_task)
+                    try:
+                        future = executor.submit(recon_file_pair, recon_task)
+                    except RuntimeError as err:
+                        # Pool is broken by a failed worker process
+                        future = Future()
+                        future.set_exception(err)
+                    futures[future] = recon_task
+                    if self.memory_budget_mb is not None:
+                        logging.info(f"Object#{recon_task['sno']}-\
+{recon_task['object']} admitted with {len(futures)} file pairs running, \
+{round(sum(map(task_peak_mb, futures.values())), 1)} MB estimated peak \
+memory of the {self.memory_budget_mb} MB budget")
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.collect(future, futures.pop(future), summary_rows)
+
+        logging.info(f"{len(summary_rows)} of {len(self.recon_tasks)} \
+parallel recon summary stats are stored successfully")
+        return summary_rows
+
+    def collect(self, future, recon_task, summary_rows):
+        '''Collect the result of a completed recon task into the summary
+rows, by S.No, or its error'''
+        try:
+            sno, summary_stats_df, error_msg = future.result()
+        except Exception as err:
+            # Worker process itself has failed, e.g. killed
+            sno = recon_task['sno']
+            summary_stats_df = None
+            error_msg = "An unexpected worker error: {0}".format(err)
+            self.summary_store.insert_error(recon_task, error_msg)
+        if error_msg is not None:
+            self.errors[recon_task['object']] = error_msg
+            logging.error(f"Object#{sno}-{recon_task['object']} \
+recon failed: {error_msg}")
+            print(f"Object#{sno}-{recon_task['object']}: {error_msg}")
+        else:
+            summary_rows[sno] = summary_stats_df
+            logging.info(f"Object#{sno}-{recon_task['object']} recon \
+processed by a worker process")
+            print(f"Object#{sno}-{recon_task['object']} recon \
+processed by a worker process")
+
+class PipelinedFileRecon:
+    '''Reconcile the file pairs one at a time in S.No order, overlapped with
+their I/O - a reader thread reads the next file pairs ahead, up to the
+prefetch depth, while a file pair is compared, and a writer thread writes
+the outputs and the summary rows, up to the writer queue depth, in the
+same order, so that the outputs are the same as the sequential run. In a
+memory budget, a file pair is read ahead only while the estimated peak
+memory of the file pairs in memory fits in the budget'''
+
+    def __init__(self, recon_tasks, summary_store, prefetch_depth=1,
+                 writer_queue_depth=8, memory_budget_mb=None):
+        '''Initialize the recon tasks, summary store, the number of file
+pairs read ahead (0: none), the number of writes queued to the writer
+thread (0: none, written by the comparison) and the memory budget in MB
+(default: no budget)'''
+        self.recon_tasks = recon_tasks
+        self.summary_store = summary_store
+        self.prefetch_depth = prefetch_depth
+        self.writer_queue_depth = writer_queue_depth
+        self.memory_budget_mb = memory_budget_mb
+        # Error of each file pair that is not reconciled, by object name
+        self.errors = {}
+
+    def fits_budget(self, recon_task, prefetched, ahead_task):
+        '''Check if a file pair read ahead fits in the memory budget, with
+the file pair compared and the file pairs read ahead before it'''
+        if self.memory_budget_mb is None:
+            return True
+        in_memory_tasks = [recon_task, ahead_task] + [
+            prefetched_task for prefetched_task in self.recon_tasks
+            if prefetched_task['sno'] in prefetched
+            and prefetched_task is not recon_task]
+        if sum(map(task_peak_mb, in_memory_tasks)) <= self.memory_budget_mb:
+            return True
+        logging.info(f"Object#{ahead_task['sno']}-{ahead_task['object']} is \
+not read ahead, beyond the {self.memory_budget_mb} MB memory budget")
+        return False
+
+    def run_recon(self):
+        '''Run the recon tasks; the summary rows are inserted into the
+summary store by the writer thread, and also returned by S.No'''
+        summary_rows = {}
+        load_deferred_imports()
+        background_writer = (BackgroundWriter(self.writer_queue_depth)
+                             if self.writer_queue_depth > 0 else None)
+        # Future of each file pair read ahead, by S.No
+        prefetched = {}
+        try:
+            with ThreadPoolExecutor(max_workers=1,
+                                    thread_name_prefix='recon-reader') as reader:
+                for position, recon_task in enumerate(self.recon_tasks):
+                    sno = recon_task['sno']
+                    for ahead_task in self.recon_tasks[
+                            position:position + self.prefetch_depth + 1]:
+                        if (self.prefetch_depth == 0
+                                or ahead_task['sno'] in prefetched):
+                            continue
+                        if (ahead_task is not recon_task
+                                and not self.fits_budget(recon_task,
+                                                         prefetched,
+                                                         ahead_task)):
+                            break
+                        prefetched[ahead_task['sno']] = reader.submit(
+                            prefetch_file_pair, ahead_task,
+                            background_writer)
+                    future = prefetched.pop(sno, None)
+                    if future is not None:
+                        wait_begin_time = time.perf_counter()
+                        wait([future])
+                        logging.info(f"Object#{sno}-{recon_task['object']} \
+waited {round(time.perf_counter() - wait_begin_time, 6)} seconds for its \
+read ahead")
+                    sno, summary_stats_df, error_msg = recon_file_pair(
+                        recon_task, future, background_writer)
+                    if error_msg is not None:
+                        self.errors[recon_task['object']] = error_msg
+                        logging.error(f"Object#{sno}-{recon_task['object']} \
+recon failed: {error_msg}")
+                        print(f"Object#{sno}-{recon_task['object']}: {error_msg}")
+                    else:
+                        summary_rows[sno] = summary_stats_df
+                        print(f"Object#{sno}-{recon_task['object']} recon \
+processed by the pipeline")
+        finally:
+            if background_writer is not None:
+                background_writer.close()
+
+        # Outputs or summary rows not written by the writer thread
+        if background_writer is not None:
+            for recon_task in self.recon_tasks:
+                error_msg = background_writer.errors.get(recon_task['sno'])
+                if (error_msg is not None
+                        and recon_task['object'] not in self.errors):
+                    self.errors[recon_task['object']] = error_msg
+                    summary_rows.pop(recon_task['sno'], None)
+                    logging.error(f"Object#{recon_task['sno']}-\
+{recon_task['object']} outputs are not written: {error_msg}")
+                    print(f"Object#{recon_task['sno']}-{recon_task['object']}: \
+{error_msg}")
+        logging.info(f"{len(summary_rows)} of {len(self.recon_tasks)} \
+pipelined recon summary stats are stored successfully")
+        return summary_rows
+
+class WorkQueue:
+    '''Shared work queue of a directory recon in a run directory - the recon
+tasks, a JSON file each of the file paths and S.No, claimed one at a time by
+any number of worker processes, of this host or of the hosts that mount the
+run, source, target and output directory at the same paths, and the summary
+rows of each file pair written to its own result file. The recon options are
+in the queue file, as plain values; each worker builds its caches and stores
+from them, nothing of the run directory is unpickled. A claim is a lock file
+created exclusively, atomic also on NFS, and kept fresh by its worker; the
+claim of a worker that has died is taken over, as the next attempt, once it
+is older than the claim timeout'''
+
+    queue_filename = 'Work Queue.json'
+    # Recon task items of a task file, the others are the recon options
+    task_keys = ['object', 'sno', 'source_file', 'target_file', 'output_dir',
+                 'summary_stats_fullfilename', 'metrics_fullfilename',
+                 'file_sizes', 'fingerprints', 'memory_plan']
+    # Seconds from which the claim of a file pair is taken over, between the
+    # heartbeats of a claim and between the polls of a waiting worker
+    claim_timeout = 300
+    heartbeat_seconds = 30
+    poll_seconds = 2
+
+    def __init__(self, run_dir):
+        '''Initialize the run directory and its tasks, claims and results
+directory'''
+        self.run_dir = run_dir
+        self.queue_fullfilename = os.path.join(run_dir, self.queue_filename)
+        self.tasks_dir = os.path.join(run_dir, 'tasks')
+        self.claims_dir = os.path.join(run_dir, 'claims')
+        self.results_dir = os.path.join(run_dir, 'results')
+        # Recon task options of the queue file, built once by the worker
+        self.task_options = None
+
+    @staticmethod
+    def worker_id():
+        '''Get the worker id of the process, unique across the hosts'''
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    def write_file(self, fullfilename, data):
+        '''Write a file of the run directory at once, through a temporary file
+renamed over it, so that no worker reads a part of it'''
+        temp_fullfilename = f"{fullfilename}.{self.worker_id()}.tmp"
+        with open(temp_fullfilename, 'wb') as f:
+            f.write(data)
+        os.replace(temp_fullfilename, fullfilename)
+
+    def task_fullfilename(self, sno):
+        '''Get the task file of a file pair'''
+        return os.path.join(self.tasks_dir, f"{sno:06d}.json")
+
+    def claim_fullfilename(self, sno, attempt):
+        '''Get the claim file of an attempt of a file pair'''
+        return os.path.join(self.claims_dir, f"{sno:06d}.{attempt}.claim")
+
+    def result_fullfilename(self, sno):
+        '''Get the result file of a file pair'''
+        return os.path.join(self.results_dir, f"{sno:06d}.json")
+
+    def create(self, recon_tasks, options):
+        '''Queue the recon tasks, their summary rows written to the result
+files; the queue file, written last, lists their S.No and the recon options,
+those of recon_options. Raise ReconError, if the run directory has a work
+queue already'''
+        if os.path.exists(self.queue_fullfilename):
+            raise ReconError(f"Run directory '{self.run_dir}' has a work \
+queue already")
+        for dir_path in [self.tasks_dir, self.claims_dir, self.results_dir]:
+            os.makedirs(dir_path, exist_ok=True)
+        for recon_task in recon_tasks:
+            self.write_file(self.task_fullfilename(recon_task['sno']),
+                            json.dumps({key: recon_task[key]
+                                        for key in self.task_keys}).encode())
+        self.write_file(self.queue_fullfilename, json.dumps({
+            'sno': [recon_task['sno'] for recon_task in recon_tasks],
+            'options': options,
+            'created': str(datetime.now()),
+            }).encode())
+
+    def snos(self):
+        '''Get the S.No of the queued file pairs; None, if the queue is not
+created yet'''
+        try:
+            with open(self.queue_fullfilename) as f:
+                return json.load(f)['sno']
+        except FileNotFoundError:
+            return None
+
+    def done(self):
+        '''Check if every queued file pair has its result'''
+        snos = self.snos()
+        if snos is None:
+            return False
+        results = set(os.listdir(self.results_dir))
+        return all(os.path.basename(self.result_fullfilename(sno)) in results
+                   for sno in snos)
+
+    def claim_attempts(self):
+        '''Get the last claim attempt of each claimed file pair, by S.No'''
+        attempts = {}
+        for claim_filename in os.listdir(self.claims_dir):
+            if not claim_filename.endswith('.claim'):
+                continue
+            sno, attempt = map(int, claim_filename.split('.')[:2])
+            attempts[sno] = max(attempts.get(sno, 0), attempt)
+        return attempts
+
+    def claim(self, worker_id):
+        '''Claim the first file pair in S.No order without a result and a
+live claim; return its recon task and claim file, None if there is none'''
+        snos = self.snos()
+        if snos is None:
+            return None
+        results = set(os.listdir(self.results_dir))
+        attempts = self.claim_attempts()
+        for sno in snos:
+            if os.path.basename(self.result_fullfilename(sno)) in results:
+                continue
+            attempt = attempts.get(sno)
+            if attempt is not None:
+                try:
+                    claim_age = time.time() - os.path.getmtime(
+                        self.claim_fullfilename(sno, attempt))
+                except FileNotFoundError:
+                    continue
+                if claim_age < self.claim_timeout:
+                    continue
+            next_attempt = 1 if attempt is None else attempt + 1
+            claim_fullfilename = self.claim_fullfilename(sno, next_attempt)
+            try:
+                fd = os.open(claim_fullfilename,
+                             os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # Claimed by another worker first
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(worker_id)
+            if attempt is not None:
+                logging.warning(f"Object#{sno} claim of attempt {attempt} is \
+older than {self.claim_timeout} seconds, taken over by {worker_id}")
+            return self.recon_task(sno), claim_fullfilename
+        return None
+
+    def recon_task(self, sno):
+        '''Get the recon task of a file pair from its task file, with the
+parse cache, recon result cache and record store of the recon options of
+the queue file, and the work queue as its summary store'''
+        if self.task_options is None:
+            with open(self.queue_fullfilename) as f:
+                self.task_options = recon_options(**json.load(f)['options'])
+        with open(self.task_fullfilename(sno)) as f:
+            return dict(json.load(f), summary_store=self, **self.task_options)
+
+    @contextmanager
+    def heartbeat(self, claim_fullfilename):
+        '''Keep a claim fresh on a heartbeat thread, while its file pair is
+reconciled'''
+        stop_event = threading.Event()
+
+        def beat():
+            while not stop_event.wait(self.heartbeat_seconds):
+                try:
+                    os.utime(claim_fullfilename)
+                except OSError as err:
+                    logging.warning(f"Claim {claim_fullfilename} is not kept \
+fresh: {err}")
+
+        heartbeat_thread = threading.Thread(target=beat, daemon=True,
+                                            name='work-queue-heartbeat')
+        heartbeat_thread.start()
+        try:
+            yield
+        finally:
+            stop_event.set()
+            heartbeat_thread.join()
+
+    def insert(self, summary_rows, status, manifest_entry=None):
+        '''Write the summary rows of a file pair with their status, and its
+run manifest entry, to its result file, as the summary store of its recon
+task'''
+        if not summary_rows:
+            return 0
+        sno = summary_rows[0]['S.No']
+        self.write_file(self.result_fullfilename(sno), json.dumps({
+            'sno': sno,
+            'status': status,
+            'worker': self.worker_id(),
+            'manifest': manifest_entry,
+            'rows': [{col_name: SummaryStore.sql_value(value)
+                      for col_name, value in summary_row.items()}
+                     for summary_row in summary_rows],
+            }).encode())
+        return len(summary_rows)
+
+    # Error row of a file pair not reconciled, as in the summary store
+    insert_error = SummaryStore.insert_error
+
+    def results(self):
+        '''Get the result of each file pair, in S.No order'''
+        results = []
+        for sno in self.snos() or []:
+            try:
+                with open(self.result_fullfilename(sno)) as f:
+                    results.append(json.load(f))
+            except FileNotFoundError:
+                continue
+        return results
+
+def work_queue_worker(run_dir):
+    '''Worker of a shared work queue - reconcile the file pairs claimed from
+the work queue of the run directory, one at a time, until every queued file
+pair has its result; a worker started before the queue is created waits for
+it. Return the number of file pairs reconciled by the worker'''
+    if not os.path.isdir(run_dir):
+        raise ReconError(f"Run directory '{run_dir}' does not exist")
+    work_queue = WorkQueue(run_dir)
+    worker_id = work_queue.worker_id()
+    logging.info(f"Worker {worker_id} joins the work queue of '{run_dir}'")
+    reconciled = 0
+    while not work_queue.done():
+        claimed = work_queue.claim(worker_id)
+        if claimed is None:
+            # File pairs claimed by the other workers, taken over if stale
+            time.sleep(work_queue.poll_seconds)
+            continue
+        recon_task, claim_fullfilename = claimed
+        logging.info(f"Object#{recon_task['sno']}-{recon_task['object']} \
+claimed by worker {worker_id}")
+        with work_queue.heartbeat(claim_fullfilename):
+            sno, _, error_msg = recon_file_pair(recon_task)
+        if error_msg is not None:
+            logging.error(f"Object#{sno}-{recon_task['object']} recon failed: \
+{error_msg}")
+        print(f"Object#{sno}-{recon_task['object']} recon processed by worker \
+{worker_id}")
+        reconciled += 1
+    logging.info(f"Worker {worker_id} has reconciled {reconciled} file pairs \
+of the work queue of '{run_dir}'")
+    return reconciled
+
+def join_work_queue(run_dir, workers=1):
+    '''Join the work queue of a run directory with the given number of worker
+processes, e.g. from another host; return the number of file pairs
+reconciled'''
+    if workers == 1:
+        return work_queue_worker(run_dir)
+    with worker_pool(workers) as executor:
+        return sum(executor.map(work_queue_worker, [run_dir] * workers))
+
+class WorkQueueFileRecon:
+    '''Reconcile the file pairs through a shared work queue - the coordinator
+queues the file pairs in the run directory and reconciles them with its own
+worker processes, if any, alongside the workers that join the run directory,
+then waits for the result of each file pair and inserts its summary rows
+into the summary store, for the Summary Stats file'''
+
+    def __init__(self, recon_tasks, options, run_dir, workers, summary_store):
+        '''Initialize the recon tasks and their recon options, those of
+recon_options, the run directory of the work queue, the number of worker
+processes of the coordinator (0: none) and the summary store'''
+        self.recon_tasks = recon_tasks
+        self.options = options
+        self.run_dir = run_dir
+        self.workers = workers
+        self.summary_store = summary_store
+        # Error of each file pair that is not reconciled, by object name
+        self.errors = {}
+
+    def run_recon(self):
+        '''Run the recon tasks through the work queue; the summary rows are
+inserted into the summary store, and also returned by S.No'''
+        os.makedirs(self.run_dir, exist_ok=True)
+        work_queue = WorkQueue(self.run_dir)
+        work_queue.create(self.recon_tasks, self.options)
+        logging.info(f"{len(self.recon_tasks)} file pairs are queued in the \
+work queue of '{self.run_dir}'")
+        print(f"{len(self.recon_tasks)} file pairs are queued, more workers \
+join with: --join-work-queue \"{self.run_dir}\"")
+        if self.workers > 0:
+            join_work_queue(self.run_dir, self.workers)
+        # File pairs of the workers of the other hosts
+        while not work_queue.done():
+            time.sleep(work_queue.poll_seconds)
+
+        summary_rows = {}
+        recon_tasks = {recon_task['sno']: recon_task
+                       for recon_task in self.recon_tasks}
+        for result in work_queue.results():
+            recon_task = recon_tasks[result['sno']]
+            self.summary_store.insert(result['rows'], result['status'],
+                                      result['manifest'])
+            if result['status'] == 'error':
+                error_msg = result['rows'][0]['Remarks']
+                self.errors[recon_task['object']] = error_msg
+                print(f"Object#{result['sno']}-{recon_task['object']}: \
+{error_msg}")
+            else:
+                summary_rows[result['sno']] = result['rows']
+        logging.info(f"{len(summary_rows)} of {len(self.recon_tasks)} work \
+queue recon summary stats are stored successfully")
+        return summary_rows
+
+class ReconError(Exception):
+    '''The recon inputs are not valid, or the file pair is not reconciled'''
+
+def validate_directories(source_dir, target_dir, output_dir, recursive_flag=0):
+    '''Validate the source, target and output directory and return the
+source and target directory inventory, each scanned once; raise ReconError,
+if any of the validations fails. The details are in the log file'''
+    # Check for directory existence and directory difference
+    dir_validations_fail1 = [
+                            InputDirectoryValidations(
+                                dir_path = source_dir,
+                                dir_type='Source').dir_check_exists(),
+                            InputDirectoryValidations(
+                                dir_path = target_dir,
+                                dir_type='Target').dir_check_exists(),
+                            InputDirectoryValidations(
+                                dir_path = output_dir,
+                                dir_type='Output').dir_check_exists(),
+                            CompareDirectoriesValidation(
+                                source_dir = source_dir,
+                                target_dir = target_dir,
+                                output_dir = output_dir).dirs_are_same(),
+                            ]
+
+    if 1 in dir_validations_fail1:
+        raise ReconError('Atleast one of the validations has failed. \
+Refer to the log file for error details')
+
+    # 2nd level check as these checks cannot be combined with the 1st one
+    # Because if the directory does not exist, then the program cannot check if it has any files/directory
+    # Check for empty directory and at least one .csv file
+    source_inventory = DirectoryInventory(
+        dir_path = source_dir, dir_type = 'Source',
+        recursive_flag = recursive_flag)
+    target_inventory = DirectoryInventory(
+        dir_path = target_dir, dir_type = 'Target',
+        recursive_flag = recursive_flag)
+    dir_validations_fail2 = [
+                            InputDirectoryValidations(
+                                dir_path = source_dir,
+                                dir_type='Source',
+                                inventory = source_inventory).dir_check_empty(),
+                            InputDirectoryValidations(
+                                dir_path = target_dir
+                                ,dir_type='Target',
+                                inventory = target_inventory).dir_check_empty(),
+                            InputDirectoryValidations(
+                                dir_path = source_dir,
+                                dir_type='Source',
+                                inventory = source_inventory).dir_check_csv(),
+                            InputDirectoryValidations(
+                                dir_path = target_dir,
+                                dir_type='Target',
+                                inventory = target_inventory).dir_check_csv(),
+                            ]
+
+    if 1 in dir_validations_fail2:
+        raise ReconError('Atleast one of the validations has failed. \
+Refer to the log file for error details')
+    return source_inventory, target_inventory
+
+def recon_options(out_of_core_threshold_mb=None, fast_path_match_export_flag=0,
+                  merge_join_order='', exclude_col_names=None,
+                  measure_col_names=None, parse_cache_dir=None,
+                  parse_cache_size_cap_mb=10240, result_cache_dir=None,
+                  result_cache_size_cap_mb=10240, result_cache_outputs_flag=1,
+                  profile_flag=0, tracemalloc_flag=0,
+                  record_store_fullfilename=None, output_format='csv',
+                  match_output='all', match_sample_rows=10000,
+                  engine='pandas', partition_threshold_mb=None,
+                  partition_workers=None, partition_col=None):
+    '''Get the recon task options shared by the file pairs; the parse and
+recon result cache are used when their directory is given, and the record
+store instead of the match/mismatch output files when its file name is
+given. The outputs are in the output format, one of OUTPUT_FORMATS, and the
+match records are output as the match output, one of MATCH_OUTPUTS. The
+in memory comparison engine is one of RECON_ENGINES. A file pair larger than
+the partition threshold size in MB is reconciled in partitions, by the
+partition column or the key columns, on the partition worker processes
+(default: the number of CPUs)'''
+    if merge_join_order not in ['', 'C', 'T']:
+        raise ReconError(f"Invalid merge join order '{merge_join_order}', \
+expected C (check) or T (trust)")
+    if output_format not in OUTPUT_FORMATS:
+        raise ReconError(f"Invalid output format '{output_format}', expected \
+one of {', '.join(OUTPUT_FORMATS)}")
+    if match_output not in MATCH_OUTPUTS:
+        raise ReconError(f"Invalid match output '{match_output}', expected \
+one of {', '.join(MATCH_OUTPUTS)}")
+    if match_sample_rows < 1:
+        raise ReconError('Match records sample size should be at least 1')
+    if partition_workers is not None and partition_workers < 1:
+        raise ReconError('Number of partition worker processes should be at \
+least 1')
+    if engine not in RECON_ENGINES:
+        raise ReconError(f"Invalid engine '{engine}', expected one of \
+{', '.join(RECON_ENGINES)}")
+    if engine == 'arrow' and importlib.util.find_spec('pyarrow') is None:
+        raise ReconError('pyarrow package is not installed for the arrow engine')
+    # Optional packages of the output formats are checked before the run
+    for package_name, package_format in [('pyarrow', 'parquet'),
+                                         ('zstandard', 'csv.zst')]:
+        if (output_format == package_format and record_store_fullfilename is None
+                and importlib.util.find_spec(package_name) is None):
+            raise ReconError(f"{package_name} package is not installed for \
+the {output_format} output format")
+    # The parse cache entries are Feather files, a pickle file would run code
+    # when loaded from a shared cache directory
+    if parse_cache_dir and importlib.util.find_spec('pyarrow') is None:
+        logging.warning('pyarrow package is not installed, the parse cache is \
+disabled')
+        print('pyarrow package is not installed, the parse cache is \
+disabled')
+        parse_cache_dir = None
+    # Key hashes and the records of a file pair cannot share a store table
+    if record_store_fullfilename and match_output == 'key-hash':
+        raise ReconError('Key hash match output is not available with the \
+record store')
+    return {
+        'out_of_core_threshold_mb': out_of_core_threshold_mb,
+        'fast_path_match_export_flag': fast_path_match_export_flag,
+        'merge_join_order': merge_join_order,
+        'exclude_col_names': list(exclude_col_names or []),
+        'measure_col_names': list(measure_col_names or []),
+        'parse_cache': ParseCache(parse_cache_dir, parse_cache_size_cap_mb)
+                       if parse_cache_dir else None,
+        'result_cache': ResultCache(result_cache_dir, result_cache_size_cap_mb,
+                                    result_cache_outputs_flag)
+                        if result_cache_dir else None,
+        'profile_flag': profile_flag,
+        'tracemalloc_flag': tracemalloc_flag,
+        'record_store': RecordStore(record_store_fullfilename)
+                        if record_store_fullfilename else None,
+        'output_format': output_format,
+        'match_output': match_output,
+        'match_sample_rows': match_sample_rows,
+        'engine': engine,
+        'partition_threshold_mb': partition_threshold_mb,
+        'partition_workers': partition_workers,
+        'partition_col': partition_col,
+        }
+
+def summary_records(summary_stats_df):
+    '''Get the Summary Stats rows as a list of dictionaries, None for the
+missing values'''
+    return summary_stats_df.astype(object).where(
+        summary_stats_df.notna(), None).to_dict('records')
+
+def run_date_string(run):
+    '''Get the date and time of a run, as in its output file names, e.g.
+2026-10-17 03.06.08, from the run or the name of one of its output files;
+raise ReconError, if there is none'''
+    match = re.search(r'\d{4}-\d{2}-\d{2} \d{2}\.\d{2}\.\d{2}',
+                      os.path.basename(run))
+    if match is None:
+        raise ReconError(f"Run '{run}' is not a run date and time, e.g. \
+2026-10-17 03.06.08, nor the name of one of its output files")
+    return match.group()
+
+def output_exists(location):
+    '''Check if the output of a Summary Stats location exists - a file, or a
+record store table'''
+    if os.path.isfile(location):
+        return True
+    store_fullfilename, _, table_name = location.rpartition('#')
+    if not os.path.isfile(store_fullfilename):
+        return False
+    with closing(sqlite3.connect(store_fullfilename)) as conn:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' \
+AND name = ?", [table_name]).fetchone() is not None
+
+def resumed_file_pairs(summary_store, object_list, source_inventory,
+                       target_inventory):
+    '''Get the S.No of the file pairs of the resumed run to skip - those in
+its run manifest with the same object at their S.No, the same input file
+fingerprints and their outputs in place; the other file pairs are
+reconciled again'''
+    resumed_snos = set()
+    for sno, manifest_entry in sorted(summary_store.manifest().items()):
+        object = manifest_entry['Object']
+        if sno > len(object_list) or object_list[sno - 1] != object:
+            reason = 'its S.No has changed'
+        elif not (source_inventory.is_file(object)
+                  and target_inventory.is_file(object)):
+            reason = 'its files are not found'
+        elif [manifest_entry['Source Fingerprint'],
+              manifest_entry['Target Fingerprint']] != [
+                  source_inventory.fingerprint(object),
+                  target_inventory.fingerprint(object)]:
+            reason = 'its files have changed'
+        elif not all(map(output_exists, json.loads(manifest_entry['Outputs']))):
+            reason = 'its outputs are not found'
+        else:
+            resumed_snos.add(sno)
+            continue
+        logging.info(f"Object#{sno}-{object} is reconciled again, {reason}")
+    return resumed_snos
+
+def remove_partial_outputs(recon_task):
+    '''Remove the outputs of a file pair in any output format left by the
+resumed run, e.g. of the file pair reconciled when the run has stopped, so
+that no partial output is left when the file pair is reconciled again'''
+    source_file_name_wo_ext = file_stem(recon_task['source_file'])
+    for suffix in set(MATCH_FILE_SUFFIXES.values()) | {MISMATCH_FILE_SUFFIX}:
+        for extension in OUTPUT_FORMATS.values():
+            output_fullfilename = os.path.join(
+                recon_task['output_dir'],
+                source_file_name_wo_ext + suffix + extension)
+            if os.path.isfile(output_fullfilename):
+                os.remove(output_fullfilename)
+                logging.info(f"Output {output_fullfilename} of the resumed run \
+is removed")
+    record_store = recon_task['record_store']
+    if record_store is not None and os.path.isfile(
+            record_store.store_fullfilename):
+        table_name = f"{source_file_name_wo_ext} - {recon_task['sno']}"
+        with record_store.connect() as conn, conn:
+            conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+
+def codec_throughput(metrics_fullfilename):
+    '''Get the read throughput of the file pairs of each compression codec
+(uncompressed, if not compressed), from the read stage of the metrics file;
+in MB/s of the file bytes read and in rows/s'''
+    codec_totals = {}
+    if not os.path.isfile(metrics_fullfilename):
+        return {}
+    with open(metrics_fullfilename, 'r') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['stage'] != 'read':
+                continue
+            codecs = {record.get('source_compression') or 'uncompressed',
+                      record.get('target_compression') or 'uncompressed'}
+            codec = '/'.join(sorted(codecs))
+            totals = codec_totals.setdefault(codec, [0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += record['wall_seconds']
+            totals[2] += record['bytes'] or 0
+            totals[3] += record['rows'] or 0
+    return {codec: {'file_pairs': file_pairs,
+                    'mb_per_sec': round(bytes / 1048576 / wall_seconds, 1)
+                    if wall_seconds > 0 else None,
+                    'rows_per_sec': round(rows / wall_seconds, 1)
+                    if wall_seconds > 0 else None}
+            for codec, (file_pairs, wall_seconds, bytes, rows)
+            in sorted(codec_totals.items())}
+
+def reconcile_files(source_file, target_file, output_dir, sno=1,
+                    metrics_fullfilename=None, memory_budget_mb=None,
+                    **options):
+    '''Reconcile a source and target file pair into the output directory and
+return its Summary Stats row as a dictionary; in a memory budget in MB, the
+file pair is reconciled out-of-core, if it cannot fit in memory. The options
+are those of recon_options. Raise ReconError, if a file or the output directory does not
+exist, or the file pair is not reconciled'''
+    for file_type, file_name in [('Source', source_file),
+                                 ('Target', target_file)]:
+        if not os.path.isfile(file_name):
+            raise ReconError(f"{file_type} file '{file_name}' does not exist")
+    if not os.path.isdir(output_dir):
+        raise ReconError(f"Output directory '{output_dir}' does not exist")
+    if memory_budget_mb is not None and memory_budget_mb <= 0:
+        raise ReconError('Memory budget should be greater than 0 MB')
+    recon_task = {
+        'object': os.path.basename(source_file),
+        'sno': sno,
+        'source_file': source_file,
+        'target_file': target_file,
+        'output_dir': output_dir,
+        # The summary row is returned, not stored
+        'summary_stats_fullfilename': None,
+        'summary_store': None,
+        'file_sizes': None,
+        'fingerprints': None,
+        'metrics_fullfilename': metrics_fullfilename,
+        'memory_plan': None,
+        **recon_options(**options),
+        }
+    if memory_budget_mb is not None:
+        recon_task['memory_plan'] = PeakMemoryEstimator(
+            memory_budget_mb).plan(recon_task)
+    summary_stats_df, error_msg = recon_file_pair(recon_task)[1:]
+    if error_msg is not None:
+        raise ReconError(error_msg)
+    return summary_records(summary_stats_df)[0]
+
+def reconcile_directories(source_dir, target_dir, output_dir, workers=1,
+                          recursive_flag=0, record_store_flag=0,
+                          prefetch_depth=0, writer_queue_depth=0,
+                          memory_budget_mb=None, work_queue_dir=None,
+                          resume_run=None, **options):
+    '''Reconcile the .csv files of the same name in the source and target
+directory into the output directory, in the given number of worker
+processes; with the recursive flag, the files of the subdirectories are
+matched by their relative path. A compressed file (.gz, .bz2, .xz, .zst) is
+matched by its .csv file name and decompressed on the fly. With the record
+store flag, the match and
+mismatch records are written to a SQLite record store of the run, a table
+per file pair, instead of the .csv files. In one process, the file pairs are
+pipelined, when the prefetch depth (file pairs read ahead by a reader
+thread) or the writer queue depth (writes queued to a background writer
+thread) is given, with the same outputs. In a memory budget in MB, the peak
+memory of each file pair is estimated; the file pairs are admitted to the
+worker processes, or read ahead, only while their estimated peak memory fits
+in the budget, and a file pair that cannot fit in memory is reconciled
+out-of-core. With the work queue directory, the file pairs are queued in it
+for the workers that join it, e.g. from other hosts, with the given number
+of worker processes of this process (0: none), and the Summary Stats file is
+built once every file pair has its result. The resume run, its date and
+time or the name of one of its output files in the output directory, is
+completed: the file pairs in its run manifest with their input files
+unchanged and their outputs in place are skipped, the others are reconciled
+again, their partial outputs removed first, and its Summary Stats file is
+exported again, complete and in S.No order. The options are those of
+recon_options. Return a dictionary of the Summary Stats, summary store,
+record store and metrics full file names, the Summary Stats rows in S.No
+order, the read throughput of each compression codec and the error of each
+file pair not reconciled, by object name. Raise ReconError, if the directory
+validations fail'''
+    # Program start time
+    begin_time = datetime.now()
+    logging.info(f"\nProgram execution starts @ {begin_time}")
+    print(f"\nProgram execution starts @ {begin_time}")
+
+    # Date string in the format: yyyy-mm-dd hh.mm.ss; that of the resumed run
+    dt_string = (run_date_string(resume_run) if resume_run is not None
+                 else begin_time.strftime("%Y-%m-%d %H.%M.%S"))
+    # Match and mismatch records of the run, instead of the .csv files
+    record_store_fullfilename = os.path.join(
+        output_dir, 'Recon Records csv File Compare_'+dt_string+'.sqlite') \
+        if record_store_flag == 1 else None
+    recon_task_options = recon_options(
+        record_store_fullfilename = record_store_fullfilename, **options)
+    if prefetch_depth < 0 or writer_queue_depth < 0:
+        raise ReconError('Prefetch depth and writer queue depth should be at \
+least 0')
+    if memory_budget_mb is not None and memory_budget_mb <= 0:
+        raise ReconError('Memory budget should be greater than 0 MB')
+    # Peak memory of each file pair is estimated in the memory budget
+    memory_estimator = (PeakMemoryEstimator(memory_budget_mb)
+                        if memory_budget_mb is not None else None)
+    # File pairs of one process are pipelined with their reads and writes
+    pipeline_flag = 1 if workers == 1 and work_queue_dir is None and (
+        prefetch_depth > 0 or writer_queue_depth > 0) else 0
+    if workers < 0 or (workers == 0 and work_queue_dir is None):
+        raise ReconError('Number of worker processes should be at least 1, \
+or 0 with a work queue')
+    if work_queue_dir is not None and os.path.exists(
+            WorkQueue(work_queue_dir).queue_fullfilename):
+        raise ReconError(f"Run directory '{work_queue_dir}' has a work queue \
+already")
+
+    # Log the user inputs
+    msg = 'User provided source directory path of .csv files for comparison is'
+    logging.info(f"{msg} '{source_dir}'")
+
+    msg = 'User provided target directoy path of .csv files for comparison is'
+    logging.info(f"{msg} '{target_dir}'")
+
+    logging.info(f"User provided output directory path is '{output_dir}'")
+    logging.info(f"Number of parallel worker processes is {workers}")
+    logging.info(f"Pipeline flag is {pipeline_flag}, with the prefetch depth \
+{prefetch_depth} and the writer queue depth {writer_queue_depth}")
+    logging.info(f"Memory budget in MB is {memory_budget_mb}")
+    logging.info(f"Work queue run directory is {work_queue_dir}")
+    logging.info(f"Resumed run is {resume_run and dt_string}")
+    logging.info(f"Include the subdirectories flag is {recursive_flag}")
+    logging.info(f"Record store of the match/mismatch records is \
+{record_store_fullfilename}")
+    logging.info(f"Output format of the match/mismatch records is \
+{recon_task_options['output_format']}, match output is \
+{recon_task_options['match_output']} (sample size \
+{recon_task_options['match_sample_rows']})")
+    logging.info(f"In memory comparison engine is \
+{recon_task_options['engine']}")
+    logging.info(f"Out-of-core recon threshold file size in MB is \
+{recon_task_options['out_of_core_threshold_mb']}")
+    logging.info(f"Partitioned recon threshold file size in MB is \
+{recon_task_options['partition_threshold_mb']}, with \
+{recon_task_options['partition_workers']} worker processes and the \
+partition column {recon_task_options['partition_col']}")
+    logging.info(f"Export match records of the files proven equal flag is \
+{recon_task_options['fast_path_match_export_flag']}")
+    logging.info(f"Merge join recon key order is \
+'{recon_task_options['merge_join_order']}'")
+    logging.info(f"Columns excluded from the comparison are \
+{recon_task_options['exclude_col_names']}")
+    logging.info(f"Measure columns compared are \
+{recon_task_options['measure_col_names']}")
+    logging.info(f"cProfile flag is {recon_task_options['profile_flag']} and \
+tracemalloc flag is {recon_task_options['tracemalloc_flag']}")
+    parse_cache = recon_task_options['parse_cache']
+    if parse_cache is not None:
+        logging.info(f"Parse cache directory is '{parse_cache.cache_dir}' with \
+{parse_cache.size_cap_mb} MB size cap")
+    result_cache = recon_task_options['result_cache']
+    if result_cache is not None:
+        logging.info(f"Recon result cache directory is \
+'{result_cache.cache_dir}' with {result_cache.size_cap_mb} MB size cap")
+
+    #*****************************************************************************
+    #  Validations - User input; If fails, exit the program
+    #*****************************************************************************
+    source_inventory, target_inventory = validate_directories(
+        source_dir, target_dir, output_dir, recursive_flag)
+
+    #*****************************************************************************
+    #  Set the Summary Stats file name
+    #*****************************************************************************
+
+    # Summary Stats file is combination of directory path and hardcoded file name
+    summary_stats_filename = 'Summary Stats csv File Compare_'+dt_string+'.csv'
+    summary_stats_fullfilename = os.path.join(output_dir, summary_stats_filename)
+    # Stage metrics of each file pair, next to the Summary Stats file
+    metrics_fullfilename = os.path.join(
+        output_dir, 'Recon Metrics csv File Compare_'+dt_string+'.jsonl')
+    # Summary store of the Summary Stats rows, next to the Summary Stats file
+    summary_store_fullfilename = os.path.join(
+        output_dir, 'Summary Stats csv File Compare_'+dt_string+'.sqlite')
+    # Run manifest of the resumed run is in its summary store
+    if resume_run is not None and not os.path.isfile(summary_store_fullfilename):
+        raise ReconError(f"Run {dt_string} is not found in the output \
+directory '{output_dir}'")
+
+    #*****************************************************************************
+    #  Load source and target directory objects into a list for processing
+    #*****************************************************************************
+    # Get the unique list of objects
+    # Objects are matched by their relative path, in S.No order; a
+    # compressed .csv file by its .csv file name
+    source_objects = source_inventory.objects
+    target_objects = target_inventory.objects
+    unique_object_list = sorted(set(source_inventory.object_list())
+                                | set(target_inventory.object_list()))
+    msg = 'Combined source and target directory unique object set is'
+    logging.info(f"{msg} {unique_object_list}")
+    msg = 'Total number of unqiue objects identified for processing:'
+    print(f"{msg} {len(unique_object_list)}")
+
+    #*****************************************************************************
+    #  Create the summary store of the Summary Stats rows
+    #*****************************************************************************
+    summary_file_output = SummaryFileOutput(
+        dir_path = output_dir,
+        fullfilename = summary_stats_fullfilename,
+        obj_list = unique_object_list,
+        sno = 'S.No'
+        )
+    summary_store = SummaryStore(summary_store_fullfilename,
+                                 summary_file_output.summary_file_header())
+    # File pairs completed in the resumed run; the rows of the others, e.g.
+    # of the objects not in the directories anymore, are deleted
+    resumed_snos = set()
+    if resume_run is not None:
+        resumed_snos = resumed_file_pairs(summary_store, unique_object_list,
+                                          source_inventory, target_inventory)
+        summary_store.keep(resumed_snos)
+        logging.info(f"{len(resumed_snos)} file pairs completed in the run \
+{dt_string} are not reconciled again")
+        print(f"Resuming the run {dt_string}: {len(resumed_snos)} file pairs \
+completed are not reconciled again")
+
+    #*****************************************************************************
+    #  Loop through each object, check if recon can be performed
+    #*****************************************************************************
+
+    dir_compare = {}
+    s_no = 0
+    # File pairs deferred to the worker processes or the pipeline
+    recon_tasks = []
+    # Error of each file pair that is not reconciled, by object name
+    errors = {}
+
+    for object in unique_object_list:
+        s_no +=1
+        logging.info(f"Object#{s_no}-{object} recon processing starts \
+@ {datetime.now()}")
+        print(f"\nObject#{s_no}-{object} recon processing starts \
+@ {datetime.now()}")
+        object_process_begin_time = datetime.now()
+        dir_compare[object] = {}
+        dir_compare[object]['S.No'] = s_no
+        # If the object 1) ends with .csv and 2) is a file, then it is a .csv file
+        dir_compare[object]['Is csv Flag'] = 1 if object.endswith('.csv') & source_inventory.is_file(object) & target_inventory.is_file(object) else 0
+        logging.info(f".csv file check result is \
 {dir_compare[object]['Is csv Flag']}")
-    dir_compare[object]['In Source Directory Flag'] = 1 if object in source_objects else 0
-    logging.info(f"Source Object exists check result is \
+        dir_compare[object]['In Source Directory Flag'] = 1 if object in source_objects else 0
+        logging.info(f"Source Object exists check result is \
 {dir_compare[object]['In Source Directory Flag']}")
-    dir_compare[object]['In Target Directory Flag'] = 1 if object in target_objects else 0
-    logging.info(f"Target Object exists check result is \
+        dir_compare[object]['In Target Directory Flag'] = 1 if object in target_objects else 0
+        logging.info(f"Target Object exists check result is \
 {dir_compare[object]['In Target Directory Flag']}")
-    dir_compare[object]['Source Object Name'] = object if object in source_objects else None
-    dir_compare[object]['Target Object Name'] = object if object in target_objects else None
-    dir_compare[object]['Source Object Directory & Path'] = os.path.join(source_dir, object) if object in source_objects else None
-    dir_compare[object]['Target Object Directory & Path'] = os.path.join(target_dir, object) if object in target_objects else None
-
-    # Recon flag is based on 2 checks: both source and target file is aviailable and it is in csv file format
-    recon_flag = [dir_compare[object]['Is csv Flag'], dir_compare[object]['In Source Directory Flag'],dir_compare[object]['In Target Directory Flag']]
-    logging.info(f"Recon flag for the object, {object}, in validation order: \
+        dir_compare[object]['Source Object Name'] = source_objects[object] if object in source_objects else None
+        dir_compare[object]['Target Object Name'] = target_objects[object] if object in target_objects else None
+        dir_compare[object]['Source Object Directory & Path'] = os.path.join(source_dir, source_objects[object]) if object in source_objects else None
+        dir_compare[object]['Target Object Directory & Path'] = os.path.join(target_dir, target_objects[object]) if object in target_objects else None
+
+        # Recon flag is based on 2 checks: both source and target file is aviailable and it is in csv file format
+        recon_flag = [dir_compare[object]['Is csv Flag'], dir_compare[object]['In Source Directory Flag'],dir_compare[object]['In Target Directory Flag']]
+        logging.info(f"Recon flag for the object, {object}, in validation order: \
 csv_check, available in source directory, and available in target directory \
 is {recon_flag}")
 
-    #*************************************************************************
-    #  If recon can be performed, call the csv_file_recon function
-    #*************************************************************************
-    # If reconciliation can be done, then call the csv file recon program
-    # Else, print the summary stats only
-    if 0 not in recon_flag:
-
-        logging.info(f"Reconciliation initiated for the file, {object}")
-        try:
-            CompareFiles(source_file = dir_compare[object]['Source Object Directory & Path'],
-                            target_file = dir_compare[object]['Target Object Directory & Path'],
-                            output_dir = output_dir,
-                            summary_stats_fullfilename = summary_stats_fullfilename,
-                            sno = dir_compare[object]['S.No']
-                            ).csv_file_recon()
-        except OSError as err:
-            print("An unexpected OS error: {0}".format(err))
-        except ValueError as err:
-            print("An unexpected Value error: {0}".format(err))
-        except:
-            print('An unexpected error has occured')
-    else:
-        logging.info(f"Reconciliation is not applicable for the object, \
+        #*************************************************************************
+        #  If recon can be performed, call the csv_file_recon function
+        #*************************************************************************
+        # If reconciliation can be done, then call the csv file recon program
+        # Else, print the summary stats only
+        if 0 not in recon_flag:
+            recon_task = {
+                'object': object,
+                'sno': dir_compare[object]['S.No'],
+                'source_file': dir_compare[object]['Source Object Directory & Path'],
+                'target_file': dir_compare[object]['Target Object Directory & Path'],
+                'output_dir': output_dir,
+                'summary_stats_fullfilename': summary_stats_fullfilename,
+                'summary_store': summary_store,
+                'metrics_fullfilename': metrics_fullfilename,
+                'file_sizes': (source_inventory.size(object),
+                               target_inventory.size(object)),
+                'fingerprints': (source_inventory.fingerprint(object),
+                                 target_inventory.fingerprint(object)),
+                'memory_plan': None,
+                **recon_task_options,
+                }
+            if memory_estimator is not None and s_no not in resumed_snos:
+                recon_task['memory_plan'] = memory_estimator.plan(recon_task)
+            # Outputs of a subdirectory file are in the same subdirectory
+            if os.path.dirname(object):
+                recon_task['output_dir'] = os.path.join(
+                    output_dir, os.path.dirname(object))
+                os.makedirs(recon_task['output_dir'], exist_ok=True)
+            # Outputs left by the resumed run are removed before the recon
+            if resume_run is not None and s_no not in resumed_snos:
+                remove_partial_outputs(recon_task)
+            if s_no in resumed_snos:
+                logging.info(f"Reconciliation completed in the run {dt_string} \
+for the file, {object}, with its files unchanged")
+                print(f"Reconciliation completed in the run {dt_string}, the \
+files are unchanged")
+            elif workers > 1 or pipeline_flag == 1 or work_queue_dir is not None:
+                logging.info(f"Reconciliation queued for the file, {object}")
+                recon_tasks.append(recon_task)
+            else:
+                logging.info(f"Reconciliation initiated for the file, {object}")
+                error_msg = recon_file_pair(recon_task)[2]
+                if error_msg is not None:
+                    errors[object] = error_msg
+                    print(error_msg)
+        else:
+            logging.info(f"Reconciliation is not applicable for the object, \
 {object}, because at least one of the validations has failed")
-        print(f"Reconciliation is not applicable for the object, \
+            print(f"Reconciliation is not applicable for the object, \
 {object}, because at least one of the validations has failed")
-    object_process_end_time = datetime.now()
-    object_process_time = object_process_end_time - object_process_begin_time
-    logging.info(f"Object#{s_no}-{object} recon processed in \
+        object_process_end_time = datetime.now()
+        object_process_time = object_process_end_time - object_process_begin_time
+        logging.info(f"Object#{s_no}-{object} recon processed in \
 {object_process_time.total_seconds()} seconds")
-    print(f"Object#{s_no}-{object} recon processed in \
+        print(f"Object#{s_no}-{object} recon processed in \
 {object_process_time.total_seconds()} seconds")
-    logging.info(f"Object#{s_no}-{object} recon processing ends \
+        logging.info(f"Object#{s_no}-{object} recon processing ends \
 @ {datetime.now()}")
-    print(f"Object#{s_no}-{object} recon processing ends @ \
+        print(f"Object#{s_no}-{object} recon processing ends @ \
 {datetime.now()}")
 
-#*****************************************************************************
-#  Load dir_compare library into a dataframe and 
-#  Create a recon_na dataframe to update summary file with uncomaprable data
-#  based on file exists & .csv checks; other checks are done during comparison
-#*****************************************************************************
-df = pd.DataFrame(dir_compare)
-df = df.T
-df.index.name = 'Object Name'
-logging.debug(f"Source and Target directory comparison result is \n{df}")
-
-# Get the files that can be reconciled
-df_recon = df[(df['Is csv Flag'] == 1) & 
-              (df['In Source Directory Flag'] == 1) &
-              (df['In Target Directory Flag'] == 1)]
-logging.debug(f"Source and Target files identified for recon are \n{df_recon}")
-
-# When the source and target file name is not the same or
-# when the file is not .csv, reconciliation is not applicable
-df_recon_na = df[(df['Is csv Flag'] == 0) | 
-                 (df['In Source Directory Flag'] == 0) |
-                 (df['In Target Directory Flag'] == 0)]
-msg = 'Reconciliation is not applicable for the object set:'
-logging.debug(f"\n{msg} {df_recon_na}")
+    #*****************************************************************************
+    #  Reconcile the queued file pairs in the pipeline or the worker processes
+    #*****************************************************************************
+    if recon_tasks and work_queue_dir is not None:
+        work_queue_begin_time = datetime.now()
+        work_queue_file_recon = WorkQueueFileRecon(
+            recon_tasks = recon_tasks,
+            options = dict(options, record_store_fullfilename =
+                           record_store_fullfilename),
+            run_dir = work_queue_dir,
+            workers = workers,
+            summary_store = summary_store
+            )
+        work_queue_file_recon.run_recon()
+        errors.update(work_queue_file_recon.errors)
+        logging.info(f"{len(recon_tasks)} file pairs reconciled by the work \
+queue in {(datetime.now() - work_queue_begin_time).total_seconds()} seconds")
+        print(f"{len(recon_tasks)} file pairs reconciled by the work queue in \
+{(datetime.now() - work_queue_begin_time).total_seconds()} seconds")
+    elif recon_tasks and pipeline_flag == 1:
+        pipeline_begin_time = datetime.now()
+        pipelined_file_recon = PipelinedFileRecon(
+            recon_tasks = recon_tasks,
+            summary_store = summary_store,
+            prefetch_depth = prefetch_depth,
+            writer_queue_depth = writer_queue_depth,
+            memory_budget_mb = memory_budget_mb
+            )
+        pipelined_file_recon.run_recon()
+        errors.update(pipelined_file_recon.errors)
+        logging.info(f"{len(recon_tasks)} file pairs reconciled by the \
+pipeline in {(datetime.now() - pipeline_begin_time).total_seconds()} seconds")
+        print(f"{len(recon_tasks)} file pairs reconciled by the pipeline in \
+{(datetime.now() - pipeline_begin_time).total_seconds()} seconds")
+    elif recon_tasks:
+        parallel_begin_time = datetime.now()
+        parallel_file_recon = ParallelFileRecon(
+            recon_tasks = recon_tasks,
+            workers = workers,
+            summary_store = summary_store,
+            memory_budget_mb = memory_budget_mb
+            )
+        parallel_file_recon.run_recon()
+        errors.update(parallel_file_recon.errors)
+        logging.info(f"{len(recon_tasks)} file pairs reconciled by {workers} \
+worker processes in {(datetime.now() - parallel_begin_time).total_seconds()} \
+seconds")
+        print(f"{len(recon_tasks)} file pairs reconciled by {workers} \
+worker processes in {(datetime.now() - parallel_begin_time).total_seconds()} \
+seconds")
 
-#*****************************************************************************
-#  Update the Summary Stats with objects that cannot be compared
-#*****************************************************************************
-## Set the output file to export the summary stats
-## Add additional columns to the dataframe faciliate the summary stats export
-
-# Add the available columns from recon_na dataframe
-df_recon_na_summary_stats = df_recon_na.loc[:,['S.No',
-                                               'Source Object Name',
-                                               'Target Object Name',
-                                               'Source Object Directory & Path',
-                                               'Target Object Directory & Path'
-                                               ]]
-# Assign values to applicable columns
-df_recon_na_summary_stats['Source Object Exists - Flag'] = df['In Source Directory Flag']
-df_recon_na_summary_stats['Target Object Exists - Flag'] = df['In Target Directory Flag']
-df_recon_na_summary_stats['Source & Target Object is csv - Flag'] = 0
-df_recon_na_summary_stats['Reconciliation Performed - Flag'] = 0
-df_recon_na_summary_stats['Date & Time'] = datetime.now()
-msg = 'Summary Stats export for objects that cannot be reconciled'
-logging.debug(f"{msg} {df_recon_na_summary_stats}")
-
-# Export the summary stats
-# Do not export the index and header, and write to Summary Stats file in append mode
-df_recon_na_summary_stats.to_csv(summary_stats_fullfilename,index=False,
-                                 mode='a', header=None)
+    #*****************************************************************************
+    #  Load dir_compare library into a dataframe and 
+    #  Create a recon_na dataframe to update summary file with uncomaprable data
+    #  based on file exists & .csv checks; other checks are done during comparison
+    #*****************************************************************************
+    df = pd.DataFrame(dir_compare)
+    df = df.T
+    df.index.name = 'Object Name'
+    logging.debug("Source and Target directory comparison result is \n%s", df)
 
-#*****************************************************************************
-#  Sort the Summary Stats file based on S.No
-#*****************************************************************************
-SummaryFileOutput(
-    dir_path = output_dir,
-    fullfilename = summary_stats_fullfilename,
-    # obj_list info is a dummmy entry passed to satisfy the syntax
-    obj_list = '',
-    sno = 'S.No',
-    ).print_summary_file_header()
+    # Get the files that can be reconciled
+    df_recon = df[(df['Is csv Flag'] == 1) & 
+                  (df['In Source Directory Flag'] == 1) &
+                  (df['In Target Directory Flag'] == 1)]
+    logging.debug("Source and Target files identified for recon are \n%s",
+                  df_recon)
 
-#*****************************************************************************
-#  Program run successfully print message
-#*****************************************************************************
-# Last info message of the program, if it successful
-msg = 'File compare Program has completed successfully without any errors'
-logging.info(msg)
-print(f'\n{msg}')
-logging.info(f"Total program run time: \
+    # When the source and target file name is not the same or
+    # when the file is not .csv, reconciliation is not applicable
+    df_recon_na = df[(df['Is csv Flag'] == 0) | 
+                     (df['In Source Directory Flag'] == 0) |
+                     (df['In Target Directory Flag'] == 0)]
+    msg = 'Reconciliation is not applicable for the object set:'
+    logging.debug("\n%s %s", msg, df_recon_na)
+
+    #*****************************************************************************
+    #  Update the Summary Stats with objects that cannot be compared
+    #*****************************************************************************
+    ## Set the output file to export the summary stats
+    ## Add additional columns to the dataframe faciliate the summary stats export
+
+    # Add the available columns from recon_na dataframe
+    df_recon_na_summary_stats = df_recon_na.loc[:,['S.No',
+                                                   'Source Object Name',
+                                                   'Target Object Name',
+                                                   'Source Object Directory & Path',
+                                                   'Target Object Directory & Path'
+                                                   ]]
+    # Assign values to applicable columns
+    df_recon_na_summary_stats['Source Object Exists - Flag'] = df_recon_na['In Source Directory Flag']
+    df_recon_na_summary_stats['Target Object Exists - Flag'] = df_recon_na['In Target Directory Flag']
+    df_recon_na_summary_stats['Source & Target Object is csv - Flag'] = 0
+    df_recon_na_summary_stats['Reconciliation Performed - Flag'] = 0
+    df_recon_na_summary_stats['Date & Time'] = datetime.now()
+    msg = 'Summary Stats store for objects that cannot be reconciled'
+    logging.debug("%s %s", msg, df_recon_na_summary_stats)
+
+    # Store the summary stats
+    summary_store.insert(summary_records(df_recon_na_summary_stats),
+                         'not applicable')
+
+    #*****************************************************************************
+    #  Export the summary store to the Summary Stats file, sorted by S.No
+    #*****************************************************************************
+    summary_rows = summary_file_output.export_summary_store(summary_store)
+
+    # Read throughput of each compression codec, from the metrics file
+    read_throughput = codec_throughput(metrics_fullfilename)
+    for codec, throughput in read_throughput.items():
+        logging.info(f"Read throughput of the {codec} file pairs: {throughput}")
+        print(f"Read throughput of the {codec} file pairs: \
+{throughput['mb_per_sec']} MB/s, {throughput['rows_per_sec']} rows/s")
+
+    logging.info(f"Total program run time: \
 {(datetime.now() - begin_time).total_seconds()} seconds")
-print(f"Total program run time: \
+    print(f"Total program run time: \
 {(datetime.now() - begin_time).total_seconds()} seconds")
-# Program End log
-logging.info(f"Program execution ends @ {datetime.now()}")
-print(f"Program execution ends @ {datetime.now()}")
+    return {'summary_stats_fullfilename': summary_stats_fullfilename,
+            'summary_store_fullfilename': summary_store_fullfilename,
+            'record_store_fullfilename': record_store_fullfilename,
+            'metrics_fullfilename': metrics_fullfilename,
+            'summary_stats': summary_rows,
+            'codec_throughput': read_throughput,
+            'errors': errors}
 
-#*****************************************************************************
-#  Final user input to allow the user to see the results when run as .exe
-#*****************************************************************************
-input('Enter any key to Quit the program\n')
-print('\n')
+
+def comma_separated(text):
+    '''Split a comma separated list of column names'''
+    return [col_name.strip() for col_name in text.split(',') if col_name.strip()]
+
+def parse_args(argv=None):
+    '''Parse the command line arguments; without the source, target and
+output directory, the inputs are prompted'''
+    parser = argparse.ArgumentParser(
+        description='Compare the .csv files of the same name in a source and \
+target directory',
+        epilog='Without the source, target and output directory, the inputs \
+are prompted as before')
+    parser.add_argument('-s', '--source-dir',
+                        help='source directory path of .csv files')
+    parser.add_argument('-t', '--target-dir',
+                        help='target directory path of .csv files')
+    parser.add_argument('-o', '--output-dir', help='output directory path')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='include the subdirectories, files matched by \
+their relative path')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='number of parallel worker processes (default 1)')
+    parser.add_argument('--work-queue', default=None,
+                        help='run directory of a shared work queue; the file \
+pairs are queued in it for the workers that join it, also with -w 0 \
+(default: no work queue)')
+    parser.add_argument('--resume', default=None,
+                        help='resume a run of the output directory, by its \
+date and time, e.g. "2026-10-17 03.06.08", or one of its output files; \
+the file pairs completed with their files unchanged are skipped')
+    parser.add_argument('--join-work-queue', default=None,
+                        help='join the shared work queue of a run directory \
+with -w worker processes, e.g. from another host')
+    parser.add_argument('--prefetch-depth', type=int, default=0,
+                        help='number of file pairs read ahead by a reader \
+thread, with 1 worker process (default 0: none)')
+    parser.add_argument('--writer-queue-depth', type=int, default=0,
+                        help='number of output writes queued to a background \
+writer thread, with 1 worker process (default 0: none)')
+    parser.add_argument('--memory-budget-mb', type=int, default=None,
+                        help='memory budget in MB of the run; the file pairs \
+are admitted to the workers within it, and reconciled out-of-core if they \
+cannot fit in memory (default: no budget)')
+    parser.add_argument('--engine', choices=RECON_ENGINES, default='pandas',
+                        help='in memory comparison engine, arrow needs the \
+pyarrow package (default pandas)')
+    parser.add_argument('--out-of-core-mb', type=int, default=None,
+                        help='file size in MB from which a file pair is \
+reconciled out-of-core (default: in memory)')
+    parser.add_argument('--partition-mb', type=int, default=None,
+                        help='file size in MB from which a file pair is \
+reconciled in partitions on several cores (default: not partitioned)')
+    parser.add_argument('--partition-workers', type=int, default=None,
+                        help='number of worker processes of the partitions \
+(default: number of CPUs)')
+    parser.add_argument('--partition-column', default=None,
+                        help='key column the file pair is partitioned by, \
+e.g. a date or an entity (default: a hash of the key columns)')
+    parser.add_argument('--export-fast-path-matches', action='store_true',
+                        help='export the match records of the files proven \
+equal')
+    parser.add_argument('--merge-join', choices=['C', 'T'], default='',
+                        help='merge join recon of the files sorted by their \
+key columns, key order checked (C) or trusted (T)')
+    parser.add_argument('--record-store', action='store_true',
+                        help='write the match/mismatch records to a SQLite \
+database of the run, a table per file pair, instead of the .csv files')
+    parser.add_argument('--output-format', choices=list(OUTPUT_FORMATS),
+                        default='csv',
+                        help='file format of the match/mismatch records \
+(default csv)')
+    parser.add_argument('--match-output', choices=MATCH_OUTPUTS,
+                        default='all',
+                        help='match records output: all, none, a random \
+sample or the key hashes only (default all)')
+    parser.add_argument('--match-sample-rows', type=int, default=10000,
+                        help='number of match records sampled (default 10000)')
+    parser.add_argument('--exclude-columns', type=comma_separated, default=[],
+                        help='column names to exclude from the comparison, \
+comma separated')
+    parser.add_argument('--measure-columns', type=comma_separated, default=[],
+                        help='measure column names to compare, comma separated \
+(default Value/Values)')
+    parser.add_argument('--parse-cache-dir',
+                        help='parse cache directory of the parsed .csv \
+files, disabled without the pyarrow package')
+    parser.add_argument('--parse-cache-mb', type=int, default=10240,
+                        help='parse cache size cap in MB (default 10240)')
+    parser.add_argument('--result-cache-dir',
+                        help='recon result cache directory')
+    parser.add_argument('--result-cache-mb', type=int, default=10240,
+                        help='recon result cache size cap in MB (default 10240)')
+    parser.add_argument('--no-cached-outputs', action='store_true',
+                        help='do not cache the match/mismatch outputs')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not use the parse and recon result cache')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile each file pair with cProfile')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='trace the memory allocations of each file pair')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='validate the directories, without the comparison')
+    parser.add_argument('--log-file', default='python.log',
+                        help='log file (default python.log)')
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='log level; DEBUG logs the dataframes \
+(default INFO)')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text',
+                        help='log file format, text or a JSON object per \
+line (default text)')
+    args = parser.parse_args(argv)
+    if args.workers < 0 or (args.workers == 0 and args.work_queue is None):
+        parser.error('the number of worker processes should be at least 1, \
+or 0 with a work queue')
+    if args.match_sample_rows < 1:
+        parser.error('the match records sample size should be at least 1')
+    if args.prefetch_depth < 0 or args.writer_queue_depth < 0:
+        parser.error('the prefetch depth and the writer queue depth should be \
+at least 0')
+    if args.memory_budget_mb is not None and args.memory_budget_mb < 1:
+        parser.error('the memory budget should be at least 1 MB')
+    if args.partition_workers is not None and args.partition_workers < 1:
+        parser.error('the number of partition worker processes should be at \
+least 1')
+    args.interactive_flag = 0
+    if args.join_work_queue is not None:
+        if args.workers < 1:
+            parser.error('a worker of a work queue needs at least 1 process')
+    elif args.source_dir is None and args.target_dir is None \
+            and args.output_dir is None:
+        args.interactive_flag = 1
+    elif None in [args.source_dir, args.target_dir, args.output_dir]:
+        parser.error('the source, target and output directory are required')
+    return args
+
+def prompt_args(args):
+    '''Prompt the source, target and output directory and the number of worker
+processes, when they are not given on the command line, e.g. when run as
+.exe; the other options are those of the command line arguments'''
+    #*****************************************************************************
+    #  User inputs for source and target directory
+    #*****************************************************************************
+
+    text = 'Enter the source directoy path of .csv files for comparison:\n'
+    args.source_dir = input(text)
+
+    text = 'Enter the target directory path of .csv files for comparison:\n'
+    args.target_dir = input(text)
+
+    #*****************************************************************************
+    #  User inputs for Output file path and Summary file path
+    #*****************************************************************************
+    text = 'Enter the Output directory path:\n'
+    args.output_dir = input(text)
+
+    #*****************************************************************************
+    #  User input for the number of parallel worker processes
+    #*****************************************************************************
+    text = 'Enter the number of parallel worker processes (default 1):\n'
+    workers = input(text).strip()
+    if workers.isdigit() and int(workers) > 0:
+        args.workers = int(workers)
+    elif workers:
+        logging.warning(f"Invalid number of worker processes '{workers}', \
+defaulted to 1")
+    return args
+
+def main(argv=None):
+    '''Run the directory comparison for the command line arguments, or the
+prompted user inputs; return the program exit code - 0 if every file pair is
+reconciled, 1 if the inputs are not valid, 2 if a file pair is not reconciled
+for an error'''
+    args = parse_args(argv)
+    setup_logging(args.log_file, args.log_level, args.log_format)
+    # Program start log
+    logging.info('Program execution starts')
+    if args.interactive_flag == 1:
+        prompt_args(args)
+    if args.no_cache:
+        # --no-cache overrides the parse and recon result cache
+        args.parse_cache_dir = None
+        args.result_cache_dir = None
+        logging.info('Parse and recon result cache are not used (--no-cache)')
+
+    failed_objects = []
+    try:
+        if args.join_work_queue is not None:
+            reconciled = join_work_queue(args.join_work_queue, args.workers)
+            msg = f"{reconciled} file pairs of the work queue reconciled"
+            logging.info(msg)
+            print(msg)
+        elif args.validate_only:
+            validate_directories(args.source_dir, args.target_dir,
+                                 args.output_dir,
+                                 1 if args.recursive else 0)
+            msg = 'Source, target and output directory validations have passed'
+            logging.info(msg)
+            print(msg)
+        else:
+            run_result = reconcile_directories(
+                args.source_dir, args.target_dir, args.output_dir,
+                workers = args.workers,
+                prefetch_depth = args.prefetch_depth,
+                writer_queue_depth = args.writer_queue_depth,
+                memory_budget_mb = args.memory_budget_mb,
+                work_queue_dir = args.work_queue,
+                resume_run = args.resume,
+                recursive_flag = 1 if args.recursive else 0,
+                record_store_flag = 1 if args.record_store else 0,
+                output_format = args.output_format,
+                match_output = args.match_output,
+                match_sample_rows = args.match_sample_rows,
+                out_of_core_threshold_mb = args.out_of_core_mb,
+                partition_threshold_mb = args.partition_mb,
+                partition_workers = args.partition_workers,
+                partition_col = args.partition_column,
+                fast_path_match_export_flag =
+                    1 if args.export_fast_path_matches else 0,
+                merge_join_order = args.merge_join,
+                engine = args.engine,
+                exclude_col_names = args.exclude_columns,
+                measure_col_names = args.measure_columns,
+                parse_cache_dir = args.parse_cache_dir,
+                parse_cache_size_cap_mb = args.parse_cache_mb,
+                result_cache_dir = args.result_cache_dir,
+                result_cache_size_cap_mb = args.result_cache_mb,
+                result_cache_outputs_flag = 0 if args.no_cached_outputs else 1,
+                profile_flag = 1 if args.profile else 0,
+                tracemalloc_flag = 1 if args.tracemalloc else 0)
+            # File pairs failed for an unexpected error, or not reconciled
+            # for an error in their remarks, e.g. duplicate keys
+            failed_objects = list(run_result['errors']) + [
+                summary_row['Source Object Name']
+                for summary_row in run_result['summary_stats']
+                if summary_row['Reconciliation Performed - Flag'] == 0
+                and str(summary_row['Remarks'] or '').startswith('Error')]
+    except ReconError as err:
+        logging.critical(f"{err}. Enter valid inputs! Exiting the program...")
+        print(err)
+        return 1
+
+    #*****************************************************************************
+    #  Program run successfully print message
+    #*****************************************************************************
+    if failed_objects:
+        msg = f"File compare Program has completed, {len(failed_objects)} \
+file pairs are not reconciled for errors: {', '.join(map(str, failed_objects))}"
+        logging.error(msg)
+        print(f'\n{msg}')
+    elif not args.validate_only:
+        # Last info message of the program, if it successful
+        msg = 'File compare Program has completed successfully without any errors'
+        logging.info(msg)
+        print(f'\n{msg}')
+    # Program End log
+    logging.info(f"Program execution ends @ {datetime.now()}")
+    print(f"Program execution ends @ {datetime.now()}")
+
+    #*****************************************************************************
+    #  Final user input to allow the user to see the results when run as .exe
+    #*****************************************************************************
+    if args.interactive_flag == 1:
+        input('Enter any key to Quit the program\n')
+        print('\n')
+    return 2 if failed_objects else 0
+
+if __name__ == '__main__':
+    # A worker process of the .exe runs the worker, not the program again
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,74 @@
+'''Tests of the tiered file equality check'''
+import gzip
+import os
+
+import pytest
+
+from test_recon_paths import recon
+
+
+def write_file(file_name, text):
+    '''Write a file, compressed if its name ends with .gz'''
+    if file_name.endswith('.gz'):
+        with gzip.open(file_name, 'wt') as f:
+            f.write(text)
+    else:
+        with open(file_name, 'w') as f:
+            f.write(text)
+    return file_name
+
+
+def test_size_differs_uncompressed(tmp_path):
+    source_file = write_file(str(tmp_path / 'source.csv'), 'Id,Value\n1,10\n')
+    target_file = write_file(str(tmp_path / 'target.csv'), 'Id,Value\n1,100\n')
+    equal_check = recon.FileEqualityCheck(source_file, target_file)
+    assert equal_check.files_equal() == (0, 'file size and header', None, None)
+
+
+def test_compressed_target_reaches_row_fingerprint(tmp_path):
+    source_file = write_file(str(tmp_path / 'gz.csv'),
+                             'Id,Value\n1,10\n2,20\n3,30\n')
+    target_file = write_file(str(tmp_path / 'gz.csv.gz'),
+                             'Id,Value\n3,30\n1,10\n2,20\n')
+    equal_check = recon.FileEqualityCheck(source_file, target_file)
+    assert equal_check.files_equal() == (1, 'row fingerprint', 3, 3)
+
+
+def test_compressed_header_differs(tmp_path):
+    source_file = write_file(str(tmp_path / 'gz.csv'), 'Id,Value\n1,10\n')
+    target_file = write_file(str(tmp_path / 'gz.csv.gz'), 'Id,Amount\n1,10\n')
+    equal_check = recon.FileEqualityCheck(source_file, target_file)
+    assert equal_check.size_n_header_check() == 0
+
+
+def test_fast_path_counts_the_record_categories(tmp_path, monkeypatch):
+    source_file = write_file(str(tmp_path / 'source.csv'),
+                             'Id,Value\n1,10\n2,\n3,30\n')
+    target_file = write_file(str(tmp_path / 'target.csv'),
+                             'Id,Value\n3,30\n1,10\n2,\n')
+    for run in ['fast', 'full']:
+        os.makedirs(str(tmp_path / run))
+    summary_row = recon.reconcile_files(source_file, target_file,
+                                        str(tmp_path / 'fast'))
+    monkeypatch.setattr(recon.CompareFiles, 'equality_fast_path',
+                        lambda self, *args: None)
+    in_memory_row = recon.reconcile_files(source_file, target_file,
+                                          str(tmp_path / 'full'))
+    assert summary_row['Remarks'].startswith(
+        'Dataset match proven by row fingerprint check')
+    for col_name in (list(recon.RECON_CATEGORY_COL_NAMES.values())
+                     + [recon.MEASURE_COUNTS_COL_NAME, 'No. of Match records']):
+        assert summary_row[col_name] == in_memory_row[col_name]
+
+
+@pytest.mark.parametrize('target_text', ['Id,Value\n1,10\n1,10\n2,20\n',
+                                         'Id,Value\n2,20\n1,10\n1,10\n'])
+def test_fast_path_reports_duplicate_keys(tmp_path, target_text):
+    source_file = write_file(str(tmp_path / 'source.csv'),
+                             'Id,Value\n1,10\n1,10\n2,20\n')
+    target_file = write_file(str(tmp_path / 'target.csv'), target_text)
+    summary_row = recon.reconcile_files(source_file, target_file,
+                                        str(tmp_path))
+    assert summary_row['Reconciliation Performed - Flag'] == 0
+    assert summary_row['Remarks'].startswith(
+        'Error, source and/or target file has 2 duplicate keys')
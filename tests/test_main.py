@@ -0,0 +1,23 @@
+'''Tests of the program exit code'''
+import os
+
+import pytest
+
+from test_recon_paths import recon
+
+
+@pytest.mark.parametrize('source_text, exit_code', [
+    ('Id,Value\n1,10\n2,20\n', 0),
+    ('Id,Value\n1,10\n1,20\n', 2),
+])
+def test_exit_code(tmp_path, source_text, exit_code):
+    for dir_name, text in [('source', source_text),
+                           ('target', 'Id,Value\n1,10\n2,20\n')]:
+        os.makedirs(str(tmp_path / dir_name))
+        with open(str(tmp_path / dir_name / 'pair.csv'), 'w') as f:
+            f.write(text)
+    os.makedirs(str(tmp_path / 'output'))
+    assert recon.main(['-s', str(tmp_path / 'source'),
+                       '-t', str(tmp_path / 'target'),
+                       '-o', str(tmp_path / 'output'),
+                       '--log-file', str(tmp_path / 'python.log')]) == exit_code
@@ -0,0 +1,57 @@
+'''Tests of the parse cache of the parsed .csv files'''
+import importlib.util
+import os
+
+import pytest
+
+from test_recon_paths import recon
+
+pd = recon.pd
+
+
+def parse(tmp_path, cache_dir, dtypes):
+    '''Parse a .csv file of text, integer, float, boolean and null columns,
+through the parse cache'''
+    file_name = str(tmp_path / 'source.csv')
+    if not os.path.exists(file_name):
+        with open(file_name, 'w') as f:
+            f.write('Key,Id,Flag,Comment,Value\nA,1,True,x,1.5\nB,2,,,\n')
+    parse_cache = recon.ParseCache(cache_dir)
+    df = pd.read_csv(file_name, dtype=dtypes)
+    cached_df_n_dtypes = parse_cache.load(file_name, dtypes, [])
+    if cached_df_n_dtypes is None:
+        parse_cache.store(file_name, parse_cache.file_stat(file_name), dtypes,
+                          [], df, dtypes)
+    return parse_cache, df, cached_df_n_dtypes
+
+
+def test_cached_dataframe_is_the_parsed_dataframe(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    dtypes = {'Key': 'category', 'Id': 'int64', 'Value': 'float64'}
+    assert parse(tmp_path, cache_dir, dtypes)[2] is None
+    _, df, (cached_df, cached_dtypes) = parse(tmp_path, cache_dir, dtypes)
+    assert cached_dtypes == dtypes
+    assert list(cached_df.dtypes) == list(df.dtypes)
+    pd.testing.assert_frame_equal(cached_df, df)
+
+
+def test_pickle_entry_is_not_loaded_with_pyarrow(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache_dir = str(tmp_path / 'cache')
+    parse_cache = parse(tmp_path, cache_dir, {})[0]
+    assert parse_cache.entry_ext == '.feather'
+    for entry_file_name in os.listdir(cache_dir):
+        os.rename(os.path.join(cache_dir, entry_file_name),
+                  os.path.join(cache_dir,
+                               os.path.splitext(entry_file_name)[0] + '.pkl'))
+    assert parse(tmp_path, cache_dir, {})[2] is None
+
+
+def test_cache_is_disabled_without_pyarrow(tmp_path, monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name, *args: (
+        None if name == 'pyarrow' else find_spec(name, *args)))
+    cache_dir = str(tmp_path / 'cache')
+    options = recon.recon_options(parse_cache_dir = cache_dir)
+    assert options['parse_cache'] is None
+    assert not os.path.exists(cache_dir)
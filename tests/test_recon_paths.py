@@ -0,0 +1,171 @@
+'''Regression tests - the in memory, out-of-core and partitioned comparison
+of a file pair give the same Summary Stats row and the same outputs'''
+import importlib.util
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+MODULE_FILE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'compare_csv_files_in_two_directories_v02.3.py')
+
+
+def load_module():
+    '''Import the program by its file path, its file name is not a module
+name'''
+    spec = importlib.util.spec_from_file_location('compare_csv_files',
+                                                  MODULE_FILE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+recon = load_module()
+
+# Source and target file records of each file pair, after the header
+# Key1,Key2 and the measure columns (default: Value)
+FILE_PAIRS = {
+    # Integer source measure, float target measure of the same values
+    'int_float': ([f"A,{i},{i}" for i in range(50)],
+                  [f"A,{i},{i}.0" for i in range(50)]),
+    # Null measures on one or both sides, and a value difference
+    'nulls': (['A,1,', 'A,2,', 'A,3,3.5', 'B,1,1', 'B,2,2'],
+              ['A,1,', 'A,2,2.5', 'A,3,', 'B,1,1', 'B,2,2.25']),
+    # Source only and target only records, text and integer keys
+    'source_target_only': (['A,1,10', 'A,2,20', 'B,1,30', 'C,1,40'],
+                           ['A,1,10', 'B,1,31', 'B,2,50', 'D,1,60']),
+    # Duplicate key in the source file
+    'duplicate_keys': (['A,1,1', 'A,1,2', 'A,2,3'], ['A,1,1', 'A,2,3']),
+    # Two measures, a value difference in one or both, null measures
+    'multi_measure': (['A,1,10,1.5', 'A,2,20,', 'A,3,30,3.5', 'B,1,,'],
+                      ['A,1,10,1.5', 'A,2,21,', 'A,3,31,3.25', 'B,2,5,5']),
+    # Integer measure with a null beyond the sample of the data types
+    'widened': ([f"K,{i},{i}" for i in range(12000)],
+                [f"K,{i},{'' if i == 11000 else i}" for i in range(12000)]),
+    # Integer keys above 2**53, different in the source and target, and a
+    # null measure beyond the sample of the data types
+    'large_int_keys': ([f"K,{2**60 + i * 3},{'' if i == 11000 else i}"
+                        for i in range(12000)],
+                       [f"K,{2**60 + i * 3 + 1},{i}" for i in range(12000)]),
+    # Null integer key beyond the sample of the data types
+    'widened_key': ([f"K,{i},{i}" for i in range(12000)] + ['K,,1'],
+                    [f"K,{i},{i + (i == 5)}" for i in range(12000)] + ['K,,1']),
+}
+
+# Measure columns of the file pairs of more than one measure
+MEASURE_COL_NAMES = {'multi_measure': ['Value', 'Amount']}
+
+# Recon options of each comparison path
+COMPARE_PATHS = {
+    'in memory': {},
+    'out-of-core': {'out_of_core_threshold_mb': 0},
+    'partitioned': {'partition_threshold_mb': 0, 'partition_workers': 2},
+    'merge join': {'merge_join_order': 'C'},
+}
+
+
+def write_file_pair(base_dir, name, source_records, target_records):
+    '''Write the source and target file of a file pair'''
+    header = ','.join(['Key1', 'Key2'] + MEASURE_COL_NAMES.get(name, ['Value']))
+    file_names = []
+    for side, records in [('source', source_records),
+                          ('target', target_records)]:
+        os.makedirs(os.path.join(base_dir, side), exist_ok=True)
+        file_name = os.path.join(base_dir, side, f"{name}.csv")
+        with open(file_name, 'w') as f:
+            f.write('\n'.join([header] + records) + '\n')
+        file_names.append(file_name)
+    return file_names
+
+
+def reconcile(tmp_path, name, compare_path):
+    '''Reconcile a file pair on a comparison path; return the summary row,
+without its time and output directory, and the outputs by file name'''
+    source_file, target_file = write_file_pair(str(tmp_path), name,
+                                               *FILE_PAIRS[name])
+    output_dir = os.path.join(str(tmp_path), compare_path)
+    os.makedirs(output_dir)
+    summary_row = recon.reconcile_files(
+        source_file, target_file, output_dir,
+        measure_col_names = MEASURE_COL_NAMES.get(name),
+        **COMPARE_PATHS[compare_path])
+    summary_row.pop('Date & Time')
+    summary_row = {col_name: (value.replace(output_dir, '')
+                              if isinstance(value, str) else value)
+                   for col_name, value in summary_row.items()}
+    outputs = {}
+    for output_file_name in sorted(os.listdir(output_dir)):
+        with open(os.path.join(output_dir, output_file_name), 'rb') as f:
+            outputs[output_file_name] = f.read()
+    return summary_row, outputs
+
+
+@pytest.mark.parametrize('name', sorted(FILE_PAIRS))
+@pytest.mark.parametrize('compare_path', ['out-of-core', 'partitioned'])
+def test_same_summary_and_outputs_as_in_memory(tmp_path, name, compare_path):
+    in_memory_row, in_memory_outputs = reconcile(tmp_path, name, 'in memory')
+    summary_row, outputs = reconcile(tmp_path, name, compare_path)
+    assert summary_row == in_memory_row
+    assert outputs == in_memory_outputs
+
+
+def test_int_float_measures_are_comparable(tmp_path):
+    summary_row, _ = reconcile(tmp_path, 'int_float', 'out-of-core')
+    assert summary_row['Reconciliation Performed - Flag'] == 1
+    assert summary_row['No. of Match records'] == 50
+    assert summary_row['No. of Mismatch records'] == 0
+
+
+@pytest.mark.parametrize('compare_path',
+                         ['out-of-core', 'partitioned', 'merge join'])
+def test_duplicate_keys_are_reported(tmp_path, compare_path):
+    summary_row, outputs = reconcile(tmp_path, 'duplicate_keys', compare_path)
+    assert summary_row['Reconciliation Performed - Flag'] == 0
+    assert summary_row['Remarks'].startswith(
+        'Error, source and/or target file has 1 duplicate keys')
+    assert outputs['duplicate_keys - duplicate keys.csv'] == (
+        b'Key1,Key2,No. of records,Side\nA,1,2,Source\n')
+
+
+@pytest.mark.parametrize('compare_path', ['out-of-core', 'partitioned'])
+def test_measures_are_reconciled_out_of_core(tmp_path, monkeypatch,
+                                             compare_path):
+    def in_memory_recon(self):
+        raise AssertionError('reconciled in memory')
+    monkeypatch.setattr(recon.CompareFiles, 'csv_file_recon', in_memory_recon)
+    summary_row, _ = reconcile(tmp_path, 'multi_measure', compare_path)
+    assert summary_row['Value Difference records by Measure'] == (
+        'Value: 2; Amount: 1')
+
+
+def test_large_int_keys_are_not_rounded(tmp_path):
+    summary_row, _ = reconcile(tmp_path, 'large_int_keys', 'in memory')
+    assert summary_row['Reconciliation Performed - Flag'] == 1
+    assert summary_row['No. of Source Only records'] == 12000
+    assert summary_row['No. of Target Only records'] == 12000
+
+
+def test_widened_key_is_not_float(tmp_path):
+    _, outputs = reconcile(tmp_path, 'widened_key', 'in memory')
+    assert outputs['widened_key - mismatch records.csv'].splitlines()[1] == (
+        b'K,5,5,6,False')
+
+
+@pytest.fixture(params=['spawn', 'forkserver'])
+def start_method(request):
+    '''Start the worker processes with another start method than fork'''
+    if request.param not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{request.param} start method is not available")
+    default_start_method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method(request.param, force=True)
+    yield request.param
+    multiprocessing.set_start_method(default_start_method, force=True)
+
+
+def test_partitions_under_start_method(tmp_path, start_method):
+    in_memory_row, in_memory_outputs = reconcile(tmp_path, 'nulls', 'in memory')
+    summary_row, outputs = reconcile(tmp_path, 'nulls', 'partitioned')
+    assert summary_row == in_memory_row
+    assert outputs == in_memory_outputs
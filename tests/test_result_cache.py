@@ -0,0 +1,46 @@
+'''Tests of the recon result cache across runs'''
+import json
+import os
+
+from test_recon_paths import recon
+
+
+def reconcile(tmp_path, run, **options):
+    '''Reconcile the file pair into the output directory of a run, with the
+result cache'''
+    output_dir = str(tmp_path / run)
+    os.makedirs(output_dir)
+    return recon.reconcile_files(
+        str(tmp_path / 'source' / 'pair.csv'),
+        str(tmp_path / 'target' / 'pair.csv'), output_dir,
+        result_cache_dir = str(tmp_path / 'cache'), **options)
+
+
+def write_file_pair(tmp_path, source_text, target_text):
+    '''Write the source and target file of the file pair'''
+    for side, text in [('source', source_text), ('target', target_text)]:
+        os.makedirs(str(tmp_path / side))
+        with open(str(tmp_path / side / 'pair.csv'), 'w') as f:
+            f.write(text)
+
+
+def test_sidecar_change_is_not_served_from_cache(tmp_path):
+    write_file_pair(tmp_path, 'Id,Comment,Value\n1,a,10\n2,b,20\n',
+                    'Id,Comment,Value\n1,a,10\n2,c,20\n')
+    summary_row = reconcile(tmp_path, 'run1')
+    assert summary_row['Dataset Match - Flag'] == 0
+    assert summary_row['No. of Match records'] == 1
+    with open(str(tmp_path / 'source' / 'pair.csv.schema.json'), 'w') as f:
+        json.dump({'exclude_columns': ['Comment']}, f)
+    summary_row = reconcile(tmp_path, 'run2')
+    assert summary_row['Dataset Match - Flag'] == 1
+    assert summary_row['No. of Match records'] == 2
+
+
+def test_merge_join_order_is_in_the_cache_key(tmp_path):
+    write_file_pair(tmp_path, 'Id,Value\n2,20\n1,11\n',
+                    'Id,Value\n1,10\n2,20\n')
+    checked_row = reconcile(tmp_path, 'run1', merge_join_order='C')
+    trusted_row = reconcile(tmp_path, 'run2', merge_join_order='T')
+    assert checked_row['No. of Mismatch records'] == 1
+    assert trusted_row['No. of Mismatch records'] == 2
@@ -0,0 +1,44 @@
+'''Tests of the Summary Stats rows of a directory comparison'''
+import os
+
+import pytest
+
+from test_recon_paths import recon
+
+
+def write_files(dir_name, file_names):
+    '''Write the .csv files of a directory'''
+    os.makedirs(dir_name)
+    for file_name in file_names:
+        with open(os.path.join(dir_name, file_name), 'w') as f:
+            f.write('Id,Value\n1,10\n2,20\n')
+    return dir_name
+
+
+@pytest.mark.parametrize('source_file_names, target_file_names', [
+    (['a.csv', 'b.csv'], ['a.csv', 'b.csv']),
+    (['a.csv', 'b.csv'], ['a.csv', 'c.csv']),
+])
+def test_one_summary_row_per_object(tmp_path, source_file_names,
+                                    target_file_names):
+    source_dir = write_files(str(tmp_path / 'source'), source_file_names)
+    target_dir = write_files(str(tmp_path / 'target'), target_file_names)
+    output_dir = str(tmp_path / 'output')
+    os.makedirs(output_dir)
+    summary_rows = recon.reconcile_directories(
+        source_dir, target_dir, output_dir)['summary_stats']
+    object_names = sorted(set(source_file_names) | set(target_file_names))
+    assert [summary_row['S.No'] for summary_row in summary_rows] == list(
+        range(1, len(object_names) + 1))
+    assert all(summary_row['Source Object Name'] or
+               summary_row['Target Object Name']
+               for summary_row in summary_rows)
+
+
+def test_row_without_sno_is_rejected(tmp_path):
+    summary_store = recon.SummaryStore(str(tmp_path / 'summary.db'),
+                                       ['S.No', 'Source Object Name'])
+    with pytest.raises(ValueError):
+        summary_store.insert([{'S.No': None, 'Source Object Name': 'a'}],
+                             'not applicable')
+    assert summary_store.rows() == []
@@ -0,0 +1,92 @@
+'''Tests of the shared work queue - a coordinator without worker processes
+and the workers that join its run directory'''
+import json
+import os
+import subprocess
+import sys
+
+from test_recon_paths import MODULE_FILE, recon
+
+# Target file records of each file pair; the source file records are
+# Id,Value 1,10 2,20 3,30
+TARGET_TEXTS = {
+    'a.csv': 'Id,Value\n1,10\n2,20\n3,30\n',
+    'b.csv': 'Id,Value\n1,10\n2,21\n3,30\n',
+    'c.csv': 'Id,Value\n1,10\n2,20\n4,40\n',
+}
+
+
+def write_directories(tmp_path):
+    '''Write the source and target directory of the file pairs, and create
+the output directory'''
+    for file_name, target_text in TARGET_TEXTS.items():
+        for side, text in [('source', 'Id,Value\n1,10\n2,20\n3,30\n'),
+                           ('target', target_text)]:
+            os.makedirs(str(tmp_path / side), exist_ok=True)
+            with open(str(tmp_path / side / file_name), 'w') as f:
+                f.write(text)
+    os.makedirs(str(tmp_path / 'output'))
+    return str(tmp_path / 'source'), str(tmp_path / 'target'), str(
+        tmp_path / 'output')
+
+
+def start_workers(tmp_path, run_dir, workers):
+    '''Start the worker programs that join the work queue of the run
+directory, before the work queue is created'''
+    os.makedirs(run_dir)
+    return [subprocess.Popen([sys.executable, MODULE_FILE,
+                              '--join-work-queue', run_dir,
+                              '--log-file', str(tmp_path / f"worker{i}.log")],
+                             stdout = subprocess.DEVNULL)
+            for i in range(workers)]
+
+
+def summary_counts(summary_rows):
+    '''Get the Summary Stats rows without their time and output locations'''
+    return [{col_name: value for col_name, value in summary_row.items()
+             if col_name != 'Date & Time' and not col_name.startswith(
+                 'Location of')}
+            for summary_row in summary_rows]
+
+
+def test_workers_join_the_work_queue(tmp_path):
+    source_dir, target_dir, output_dir = write_directories(tmp_path)
+    run_dir = str(tmp_path / 'run')
+    worker_processes = start_workers(tmp_path, run_dir, 2)
+    run_result = recon.reconcile_directories(
+        source_dir, target_dir, output_dir, workers = 0,
+        work_queue_dir = run_dir)
+    assert [worker_process.wait(timeout = 300)
+            for worker_process in worker_processes] == [0, 0]
+    assert run_result['errors'] == {}
+    assert sorted(os.listdir(os.path.join(run_dir, 'tasks'))) == [
+        '000001.json', '000002.json', '000003.json']
+    with open(os.path.join(run_dir, 'results', '000001.json')) as f:
+        assert json.load(f)['worker'] != recon.WorkQueue.worker_id()
+
+    os.makedirs(str(tmp_path / 'local'))
+    local_result = recon.reconcile_directories(source_dir, target_dir,
+                                               str(tmp_path / 'local'))
+    assert summary_counts(run_result['summary_stats']) == summary_counts(
+        local_result['summary_stats'])
+
+
+def test_resumed_run_queues_the_file_pairs_not_completed(tmp_path):
+    source_dir, target_dir, output_dir = write_directories(tmp_path)
+    run_result = recon.reconcile_directories(source_dir, target_dir,
+                                             output_dir)
+    for output_file_name in os.listdir(output_dir):
+        if output_file_name.startswith('b - '):
+            os.remove(os.path.join(output_dir, output_file_name))
+    run_dir = str(tmp_path / 'run')
+    worker_processes = start_workers(tmp_path, run_dir, 1)
+    resumed_result = recon.reconcile_directories(
+        source_dir, target_dir, output_dir, workers = 0,
+        work_queue_dir = run_dir,
+        resume_run = os.path.basename(run_result['summary_stats_fullfilename']))
+    assert worker_processes[0].wait(timeout = 300) == 0
+    assert recon.WorkQueue(run_dir).snos() == [2]
+    assert resumed_result['summary_stats_fullfilename'] == run_result[
+        'summary_stats_fullfilename']
+    assert summary_counts(resumed_result['summary_stats']) == summary_counts(
+        run_result['summary_stats'])